@@ -1,12 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from models import User, Player, DB
 from functools import partial
+from backend import get_backend
+from db_worker import get_worker
+from reports_window import ReportsWindow
 
 class AdminInterface:
-    def __init__(self, root, user_id):
+    def __init__(self, root, session):
         self.root = root
-        self.user = User.get(User.id == user_id)
+        self.session = session
+        self.backend = get_backend()
+        self.worker = get_worker()
         self.frame = tk.Frame(root)
         self.frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
         
@@ -34,50 +38,65 @@ class AdminInterface:
             fg="white"
         ).pack(side=tk.LEFT, padx=5)
 
+        tk.Button(
+            control_frame,
+            text="Отчеты за сезон",
+            command=self.show_reports_window,
+            bg="#607D8B",
+            fg="white"
+        ).pack(side=tk.LEFT, padx=5)
+
+    def show_reports_window(self):
+        """Открывает окно построения отчетов игроков"""
+        if self.backend.remote:
+            # Процессам отчетов нужен файл БД, он есть только на компьютере сервера
+            messagebox.showinfo(
+                "Отчеты за сезон",
+                "Отчеты строятся на компьютере с базой данных клуба:\npython reports.py --season ГОД"
+            )
+            return
+        ReportsWindow(self.root)
+
     def show_coaches_list(self):
-        """Показывает список тренеров с кнопками удаления"""
+        """Показывает список тренеров с удалением выбранных"""
         self.clear_interface()
         
         coaches_frame = tk.LabelFrame(self.frame, text="Список тренеров", padx=10, pady=10)
         coaches_frame.pack(fill=tk.BOTH, expand=True)
 
-        # Создаем Treeview
-        tree = ttk.Treeview(coaches_frame, columns=("id", "username"), show="headings")
+        # Создаем Treeview с выбором нескольких строк
+        tree = ttk.Treeview(coaches_frame, columns=("id", "username"), show="headings", selectmode="extended")
         tree.heading("id", text="ID")
         tree.heading("username", text="Имя")
         
         tree.column("id", width=50, anchor='center')
         tree.column("username", width=200)
 
-        # Отдельный фрейм для кнопок
-        buttons_frame = tk.Frame(coaches_frame)
-        buttons_frame.pack(fill=tk.X, pady=5)
-
-        # Заполняем данными
-        coaches = User.select().where(User.role == 'coach').order_by(User.username)
-        for coach in coaches:
-            tree.insert("", tk.END, values=(coach.id, coach.username))
-            
-            # Добавляем кнопку удаления в отдельный фрейм
-            tk.Button(
-                buttons_frame,
-                text=f"Удалить {coach.username}",
-                command=partial(self.delete_user, coach.id),
-                bg="#f44336",
-                fg="white"
-            ).pack(side=tk.LEFT, padx=5)
+        tk.Button(
+            coaches_frame,
+            text="Удалить выбранных",
+            command=partial(self.delete_users, tree),
+            bg="#f44336",
+            fg="white"
+        ).pack(side=tk.BOTTOM, anchor='w', pady=5)
 
         tree.pack(fill=tk.BOTH, expand=True)
+        self.worker.read(self.backend.coaches, partial(self.fill_coaches_list, tree))
+
+    def fill_coaches_list(self, tree, coaches):
+        """Заполняет список тренеров данными"""
+        for coach in coaches:
+            tree.insert("", tk.END, iid=str(coach.id), values=(coach.id, coach.username))
 
     def show_players_list(self):
-        """Показывает список игроков с кнопками удаления"""
+        """Показывает список игроков с удалением выбранных"""
         self.clear_interface()
         
         players_frame = tk.LabelFrame(self.frame, text="Список игроков", padx=10, pady=10)
         players_frame.pack(fill=tk.BOTH, expand=True)
 
-        # Создаем Treeview
-        tree = ttk.Treeview(players_frame, columns=("id", "name", "jersey"), show="headings")
+        # Создаем Treeview с выбором нескольких строк
+        tree = ttk.Treeview(players_frame, columns=("id", "name", "jersey"), show="headings", selectmode="extended")
         tree.heading("id", text="ID")
         tree.heading("name", text="Имя")
         tree.heading("jersey", text="Номер")
@@ -86,50 +105,57 @@ class AdminInterface:
         tree.column("name", width=200)
         tree.column("jersey", width=80, anchor='center')
 
-        # Отдельный фрейм для кнопок
-        buttons_frame = tk.Frame(players_frame)
-        buttons_frame.pack(fill=tk.X, pady=5)
-
-        # Заполняем данными
-        players = Player.select().join(User).order_by(Player.name)
-        for player in players:
-            tree.insert("", tk.END, values=(player.id, player.name, player.jersey_number))
-            
-            # Добавляем кнопку удаления в отдельный фрейм
-            tk.Button(
-                buttons_frame,
-                text=f"Удалить {player.name}",
-                command=partial(self.delete_player, player.id),
-                bg="#f44336",
-                fg="white"
-            ).pack(side=tk.LEFT, padx=5)
+        tk.Button(
+            players_frame,
+            text="Удалить выбранных",
+            command=partial(self.delete_players, tree),
+            bg="#f44336",
+            fg="white"
+        ).pack(side=tk.BOTTOM, anchor='w', pady=5)
 
         tree.pack(fill=tk.BOTH, expand=True)
+        self.worker.read(self.backend.players, partial(self.fill_players_list, tree))
 
-    def delete_user(self, user_id):
-        """Удаляет пользователя (тренера)"""
-        if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить этого тренера?"):
-            try:
-                with DB.atomic():
-                    User.delete().where(User.id == user_id).execute()
-                    messagebox.showinfo("Успех", "Тренер успешно удален")
-                    self.show_coaches_list()
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Не удалось удалить тренера: {str(e)}")
-
-    def delete_player(self, player_id):
-        """Удаляет игрока и связанного пользователя"""
-        if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите удалить этого игрока?"):
-            try:
-                with DB.atomic():
-                    player = Player.get(Player.id == player_id)
-                    user_id = player.user.id
-                    Player.delete().where(Player.id == player_id).execute()
-                    User.delete().where(User.id == user_id).execute()
-                    messagebox.showinfo("Успех", "Игрок успешно удален")
-                    self.show_players_list()
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Не удалось удалить игрока: {str(e)}")
+    def fill_players_list(self, tree, players):
+        """Заполняет список игроков данными"""
+        for player in players:
+            tree.insert("", tk.END, iid=str(player.id), values=(player.id, player.name, player.jersey_number))
+
+    def selected_ids(self, tree):
+        """Возвращает id выбранных в списке записей"""
+        return [int(iid) for iid in tree.selection()]
+
+    def delete_users(self, tree):
+        """Удаляет выбранных пользователей (тренеров)"""
+        user_ids = self.selected_ids(tree)
+        if not user_ids:
+            messagebox.showwarning("Внимание", "Выберите тренеров для удаления")
+            return
+        if messagebox.askyesno("Подтверждение", f"Удалить выбранных тренеров ({len(user_ids)}) вместе с их тренировками?"):
+            self.worker.write(
+                partial(self.backend.delete_users, user_ids),
+                lambda _: self.on_deleted(f"Удалено тренеров: {len(user_ids)}", tree, user_ids),
+                lambda e: messagebox.showerror("Ошибка", f"Не удалось удалить тренеров: {str(e)}")
+            )
+
+    def delete_players(self, tree):
+        """Удаляет выбранных игроков и связанных пользователей"""
+        player_ids = self.selected_ids(tree)
+        if not player_ids:
+            messagebox.showwarning("Внимание", "Выберите игроков для удаления")
+            return
+        if messagebox.askyesno("Подтверждение", f"Удалить выбранных игроков ({len(player_ids)}) вместе с их статистикой?"):
+            self.worker.write(
+                partial(self.backend.delete_players, player_ids),
+                lambda _: self.on_deleted(f"Удалено игроков: {len(player_ids)}", tree, player_ids),
+                lambda e: messagebox.showerror("Ошибка", f"Не удалось удалить игроков: {str(e)}")
+            )
+
+    def on_deleted(self, message, tree, ids):
+        """Убирает удаленные записи из списка без его перезагрузки"""
+        if tree.winfo_exists():
+            tree.delete(*[str(pk) for pk in ids if tree.exists(str(pk))])
+        messagebox.showinfo("Успех", message)
 
     def clear_interface(self):
         """Очищает текущий интерфейс"""
@@ -0,0 +1,205 @@
+from array import array
+from collections import namedtuple
+from functools import cache
+from peewee import fn
+from models import Match, PlayerStats
+from queries import date_range
+from snapshot import reading_database
+
+@cache
+def load_numpy():
+    """numpy или None, если он не установлен; импортируется при первом расчете, а не при запуске"""
+    try:
+        import numpy
+    except ImportError:  # без numpy те же расчеты выполняются циклами по массивам array
+        return None
+    return numpy
+
+# Аналитика по статистике игроков. Строки player_stats загружаются не в
+# объекты моделей, а в столбцы - компактные массивы целых чисел (array('q'),
+# при наличии numpy - ndarray поверх того же буфера без копирования).
+# Строки упорядочены по игроку и дате матча, поэтому матчи одного игрока
+# занимают непрерывный отрезок столбцов.
+#
+# Минуты на поле не записываются, поэтому показатели "за 90 минут" считаются
+# из предположения, что игрок проводит на поле весь матч.
+
+# Матчей в скользящем окне формы
+FORM_WINDOW = 5
+# Минут на поле за один матч в статистике
+MINUTES_PER_MATCH = 90
+# Дней между 0001-01-01 (порядковый номер 1) и началом юлианских дней
+JULIAN_DAY_OFFSET = 1721424.5
+# Строк, читаемых из курсора за раз
+FETCH_SIZE = 5000
+
+COLUMNS = ('player', 'day', 'goals', 'assists', 'yellow_cards', 'red_cards')
+
+Rates = namedtuple('Rates', 'appearances goals assists cards')
+PlayerForm = namedtuple('PlayerForm', 'matches form goals_per_90 assists_per_90 cards_per_90 '
+                                      'goal_streak best_goal_streak')
+
+class StatsColumns:
+    """Статистика игроков по столбцам.
+
+    day - дата матча как порядковый номер дня (date.toordinal()).
+    ranges - отрезок строк каждого игрока: {player_id: (начало, конец)}.
+    """
+
+    def __init__(self, columns):
+        for name in COLUMNS:
+            setattr(self, name, as_vector(columns[name]))
+        self.ranges = player_ranges(columns['player'])
+
+    def __len__(self):
+        return len(self.player)
+
+    def column(self, name, player_id):
+        """Столбец name для матчей одного игрока"""
+        start, end = self.ranges.get(player_id, (0, 0))
+        return getattr(self, name)[start:end]
+
+def as_vector(column):
+    """ndarray поверх буфера array без копирования; без numpy - сам array"""
+    numpy = load_numpy()
+    if numpy is None:
+        return column
+    if not column:
+        return numpy.zeros(0, dtype=numpy.int64)
+    return numpy.frombuffer(column, dtype=numpy.int64)
+
+def player_ranges(players):
+    ranges = {}
+    start = 0
+    for index in range(1, len(players) + 1):
+        if index == len(players) or players[index] != players[start]:
+            ranges[players[start]] = (start, index)
+            start = index
+    return ranges
+
+def load_columns(player_id=None, date_from=None, date_to=None):
+    """Загружает статистику в столбцы одним запросом без создания объектов моделей.
+
+    Строки читаются из курсора пачками и раскладываются по столбцам
+    транспонированием пачки, без обработки каждого значения в Python.
+    """
+    day = (fn.julianday(Match.date) - JULIAN_DAY_OFFSET).cast('INTEGER')
+    query = (PlayerStats
+             .select(PlayerStats.player, day, PlayerStats.goals, PlayerStats.assists,
+                     PlayerStats.yellow_cards, PlayerStats.red_cards)
+             .join(Match)
+             .order_by(PlayerStats.player, Match.date, PlayerStats.id))
+    if player_id is not None:
+        query = query.where(PlayerStats.player == player_id)
+    query = date_range(query, Match.date, date_from, date_to)
+
+    columns = {name: array('q') for name in COLUMNS}
+    cursor = reading_database().execute_sql(*query.sql())
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            return StatsColumns(columns)
+        for name, values in zip(COLUMNS, zip(*rows)):
+            columns[name].extend(values)
+
+def contributions(columns, player_id):
+    """Голы плюс передачи в каждом матче игрока"""
+    numpy = load_numpy()
+    goals = columns.column('goals', player_id)
+    assists = columns.column('assists', player_id)
+    if numpy is not None:
+        return goals + assists
+    return array('q', map(sum, zip(goals, assists)))
+
+def rolling_form(values, window=FORM_WINDOW):
+    """Скользящее среднее по последним window матчам для каждого матча"""
+    numpy = load_numpy()
+    if numpy is not None:
+        values = numpy.asarray(values, dtype=numpy.float64)
+        totals = numpy.cumsum(values)
+        totals[window:] -= totals[:-window].copy()
+        return totals / numpy.minimum(numpy.arange(1, len(values) + 1), window)
+
+    form = array('d')
+    total = 0
+    for index, value in enumerate(values):
+        total += value
+        if index >= window:
+            total -= values[index - window]
+        form.append(total / min(index + 1, window))
+    return form
+
+def streaks(flags):
+    """Текущая (по последним матчам) и самая длинная серия матчей с flags != 0"""
+    numpy = load_numpy()
+    if numpy is not None:
+        flags = numpy.asarray(flags) != 0
+        misses = numpy.flatnonzero(~flags)
+        bounds = numpy.concatenate(([-1], misses, [len(flags)]))
+        runs = numpy.diff(bounds) - 1
+        current = len(flags) - 1 - misses[-1] if len(misses) else len(flags)
+        return int(current), int(runs.max())
+
+    current = longest = 0
+    for flag in flags:
+        current = current + 1 if flag else 0
+        longest = max(longest, current)
+    return current, longest
+
+def per_90(columns):
+    """Показатели каждого игрока за 90 минут: {player_id: Rates}"""
+    numpy = load_numpy()
+    if not len(columns):
+        return {}
+    players = list(columns.ranges)
+    starts = [columns.ranges[player][0] for player in players]
+    appearances = [end - start for start, end in columns.ranges.values()]
+
+    if numpy is not None:
+        cards = columns.yellow_cards + columns.red_cards
+        minutes = numpy.array(appearances, dtype=numpy.float64) * MINUTES_PER_MATCH
+        totals = [numpy.add.reduceat(column, starts) * 90 / minutes
+                  for column in (columns.goals, columns.assists, cards)]
+        return {player: Rates(appearances[i], *(float(total[i]) for total in totals))
+                for i, player in enumerate(players)}
+
+    rates = {}
+    for player, (start, end) in columns.ranges.items():
+        minutes = (end - start) * MINUTES_PER_MATCH
+        goals = sum(columns.goals[start:end])
+        assists = sum(columns.assists[start:end])
+        cards = sum(columns.yellow_cards[start:end]) + sum(columns.red_cards[start:end])
+        rates[player] = Rates(end - start, goals * 90 / minutes, assists * 90 / minutes, cards * 90 / minutes)
+    return rates
+
+def player_form(player_id, window=FORM_WINDOW, date_from=None, date_to=None):
+    """Сводка формы игрока за период или None, если матчей нет"""
+    columns = load_columns(player_id, date_from, date_to)
+    if not len(columns):
+        return None
+    rates = per_90(columns)[player_id]
+    form = rolling_form(contributions(columns, player_id), window)
+    goal_streak, best_goal_streak = streaks(columns.column('goals', player_id))
+    return PlayerForm(
+        matches=rates.appearances,
+        form=round(float(form[-1]), 2),
+        goals_per_90=round(rates.goals, 2),
+        assists_per_90=round(rates.assists, 2),
+        cards_per_90=round(rates.cards, 2),
+        goal_streak=goal_streak,
+        best_goal_streak=best_goal_streak
+    )
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from models import ensure_database
+    ensure_database()
+
+    start = time.perf_counter()
+    columns = load_columns()
+    rates = per_90(columns)
+    print(f"Строк: {len(columns)}, игроков: {len(rates)}, "
+          f"{(time.perf_counter() - start) * 1000:.1f} мс ({'numpy' if load_numpy() is not None else 'array'})")
+    for player_id in map(int, sys.argv[1:]):
+        print(player_id, player_form(player_id))
@@ -0,0 +1,83 @@
+import importlib
+from functools import partial, wraps
+from settings import load_server_settings
+
+# Функции commands и queries, через которые интерфейсы работают с данными
+COMMANDS = ('register_user', 'authenticate_user', 'add_training', 'add_match',
+            'save_player', 'add_player_stats', 'save_match_sheet', 'delete_users', 'delete_players')
+QUERIES = ('trainings_page', 'matches_page', 'match_sheet', 'player_stats', 'player_season_totals',
+           'coaches', 'players')
+
+def prepare_local(ensure_database, start_snapshot):
+    """Подготавливает БД и запускает обновление снимка для отчетов"""
+    ensure_database()
+    start_snapshot()
+
+def deferred(module_name, name):
+    """Функция name модуля, который импортируется при первом вызове, а не при запуске"""
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(module_name), name)(*args, **kwargs)
+    return call
+
+def bootstrapped(func, ensure_database):
+    """Перед вызовом func подготавливает БД, если это еще не сделано"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        ensure_database()
+        return func(*args, **kwargs)
+    return wrapper
+
+class LocalBackend:
+    """Работа напрямую с файлом БД через commands и queries.
+
+    БД подключается и мигрируется при первом обращении к данным, а не при
+    создании объекта, чтобы окно входа появлялось сразу.
+    """
+
+    remote = False
+
+    def __init__(self):
+        import commands
+        import queries
+        from leaderboard import leaderboard
+        from search import search
+        from match_index import match_index
+        from models import DB, ensure_database
+        import snapshot
+
+        self.database = DB
+        self.prepare = partial(prepare_local, ensure_database, snapshot.start)
+        self.match_index = match_index
+        # Импорт, выгрузка, аналитика и отчеты подгружают тяжелые
+        # необязательные пакеты, поэтому их модули импортируются при первом вызове
+        self.import_file = bootstrapped(deferred('importer', 'import_file'), ensure_database)
+        self.export_file = bootstrapped(deferred('export', 'export_file'), ensure_database)
+        self.player_form = bootstrapped(deferred('analytics', 'player_form'), ensure_database)
+        self.generate_reports = bootstrapped(deferred('reports', 'generate_reports'), ensure_database)
+        self.leaderboard = bootstrapped(leaderboard, ensure_database)
+        self.search = bootstrapped(search, ensure_database)
+        for name in COMMANDS:
+            setattr(self, name, bootstrapped(getattr(commands, name), ensure_database))
+        for name in QUERIES:
+            setattr(self, name, bootstrapped(getattr(queries, name), ensure_database))
+
+    def logout(self):
+        """Сессия живет только в этом процессе, закрывать нечего"""
+
+_backend = None
+
+def get_backend():
+    """Возвращает источник данных приложения.
+
+    Если в разделе [server] задан url, данные загружаются с сервера клуба
+    (server.py), иначе приложение само открывает файл БД.
+    """
+    global _backend
+    if _backend is None:
+        settings = load_server_settings()
+        if settings['url']:
+            from client import ServerClient
+            _backend = ServerClient(settings['url'], settings['timeout'])
+        else:
+            _backend = LocalBackend()
+    return _backend
@@ -0,0 +1,11 @@
+"""Генератор тестовых данных и замеры скорости основных запросов.
+
+Бенчмарки работают только с временными базами в SCRATCH_DIR: путь к БД
+переопределяется до импорта моделей, чтобы не затронуть рабочую базу клуба.
+"""
+import os
+import tempfile
+
+SCRATCH_DIR = os.environ.get('FCLUB_BENCH_DIR', os.path.join(tempfile.gettempdir(), 'fclub_bench'))
+os.makedirs(SCRATCH_DIR, exist_ok=True)
+os.environ['FCLUB_DATABASE_PATH'] = os.path.join(SCRATCH_DIR, 'scratch.db')
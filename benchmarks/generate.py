@@ -0,0 +1,115 @@
+import argparse
+import os
+import random
+from datetime import date, timedelta
+from peewee import chunked
+from benchmarks import SCRATCH_DIR
+from models import (DB, User, Player, Training, Match, PlayerStats, ROLE_COACH, ROLE_PLAYER,
+                    configure_database, ensure_database)
+from commands import hash_password
+
+# Пароль всех сгенерированных пользователей
+PASSWORD = 'bench123'
+# Доля тренеров среди сгенерированных пользователей
+COACH_SHARE = 0.1
+CHUNK_SIZE = 500
+
+POSITIONS = ("Вратарь", "Защитник", "Полузащитник", "Нападающий")
+FOCUS_AREAS = ("Стандарты", "Физподготовка", "Тактика", "Пасы", "Удары", "Прессинг")
+
+# Наборы объемов данных: пользователи, матчи, тренировки, строки статистики
+SIZES = {
+    'small': (100, 200, 500, 5000),
+    'medium': (1000, 2000, 5000, 50000),
+    'large': (5000, 10000, 50000, 500000),
+}
+
+def scratch_path(name):
+    return os.path.join(SCRATCH_DIR, f"{name}.db")
+
+def use_database(path):
+    """Подключается к базе path, создает таблицы и применяет миграции"""
+    configure_database(path)
+    ensure_database()
+
+def remove_database(path):
+    if not DB.is_closed():
+        DB.close()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def insert_rows(model, rows):
+    with DB.atomic():
+        for chunk in chunked(rows, CHUNK_SIZE):
+            model.insert_many(chunk).execute()
+
+def random_dates(rng, count, start=date(2015, 7, 1), days=365 * 10):
+    return (start + timedelta(days=rng.randrange(days)) for _ in range(count))
+
+def generate(path, users, matches, trainings, stats, seed=0):
+    """Создает заново базу path и заполняет ее тестовыми данными"""
+    rng = random.Random(seed)
+    remove_database(path)
+    use_database(path)
+
+    password = hash_password(PASSWORD)
+    coaches = max(1, int(users * COACH_SHARE))
+    insert_rows(User, ({
+        'username': f"user{i}",
+        'password': password,
+        'email': f"user{i}@club.com",
+        'role': ROLE_COACH if i < coaches else ROLE_PLAYER,
+    } for i in range(users)))
+
+    coach_ids = [row[0] for row in User.select(User.id).where(User.role == ROLE_COACH).tuples()]
+    player_user_ids = (User
+                       .select(User.id)
+                       .where((User.role == ROLE_PLAYER) & (User.username.startswith('user')))
+                       .tuples())
+    insert_rows(Player, ({
+        'user': user_id,
+        'name': f"Игрок {user_id}",
+        'position': rng.choice(POSITIONS),
+        'jersey_number': rng.randint(1, 99),
+    } for (user_id,) in player_user_ids))
+
+    insert_rows(Match, ({
+        'opponent': f"Соперник {rng.randint(1, 40)}",
+        'date': match_date,
+        'location': f"Стадион {rng.randint(1, 20)}",
+        'score': f"{rng.randint(0, 4)}:{rng.randint(0, 4)}",
+        'notes': rng.choice(("Отработка стандартов", "Игра в прессинг", None)),
+    } for match_date in random_dates(rng, matches)))
+
+    insert_rows(Training, ({
+        'coach': rng.choice(coach_ids),
+        'date': training_date,
+        'duration': rng.choice((60, 75, 90, 120)),
+        'focus_area': rng.choice(FOCUS_AREAS),
+        'notes': rng.choice(("Работа над стандартами", "Восстановление", None)),
+    } for training_date in random_dates(rng, trainings)))
+
+    player_ids = [row[0] for row in Player.select(Player.id).tuples()]
+    match_ids = [row[0] for row in Match.select(Match.id).tuples()]
+    insert_rows(PlayerStats, ({
+        'player': rng.choice(player_ids),
+        'match': rng.choice(match_ids),
+        'goals': rng.choice((0, 0, 0, 1, 1, 2)),
+        'assists': rng.choice((0, 0, 1, 1, 2)),
+        'yellow_cards': rng.choice((0, 0, 0, 0, 1)),
+        'red_cards': rng.choice((0,) * 20 + (1,)),
+    } for _ in range(stats)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Заполнение временной БД тестовыми данными")
+    parser.add_argument('--db', default=scratch_path('generated'), help="путь к создаваемой БД")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--matches', type=int, default=2000)
+    parser.add_argument('--trainings', type=int, default=5000)
+    parser.add_argument('--stats', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generate(args.db, args.users, args.matches, args.trainings, args.stats, args.seed)
+    print(f"База с тестовыми данными создана: {args.db}")
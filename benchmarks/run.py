@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import statistics
+import time
+from benchmarks.generate import SIZES, PASSWORD, generate, scratch_path
+from benchmarks import SCRATCH_DIR
+from peewee import fn
+from models import DB, User, Player, Training, Match, ROLE_COACH, season_of, season_range
+import commands
+import queries
+import leaderboard
+import search
+import export
+import analytics
+import prepared
+import snapshot
+from match_index import match_index
+
+# Тренировок у каждого удаляемого в замере тренера
+BENCH_COACH_TRAININGS = 50
+
+# Список замеров: (название, функция(ctx, i))
+BENCHMARKS = []
+
+def benchmark(name):
+    """Регистрирует функцию замера; замеры выполняются в порядке регистрации"""
+    def decorator(func):
+        BENCHMARKS.append((name, func))
+        return func
+    return decorator
+
+class Context:
+    """Идентификаторы записей, на которых выполняются замеры"""
+
+    def __init__(self, repeat):
+        player = Player.select(Player.id).order_by(Player.id).first()
+        self.player_id = player.id
+        self.username = User.select(User.username).where(User.username.startswith('user')).first().username
+
+        middle = Training.select().count() // 2
+        training = (Training
+                    .select(Training.id, Training.date)
+                    .order_by(Training.date.desc(), Training.id.desc())
+                    .offset(middle)
+                    .first())
+        self.training_key = (training.date, training.id) if training else None
+        # Период таблицы лидеров - последний сезон с матчами
+        last_match = Match.select(fn.MAX(Match.date)).scalar()
+        self.season = season_range(season_of(last_match))
+
+        # Удаляемые в замерах игроки и тренеры со своими тренировками
+        self.delete_player_ids = [p.id for p in Player.select(Player.id).order_by(Player.id.desc()).limit(repeat)]
+        self.delete_coach_ids = []
+        for i in range(repeat):
+            commands.register_user(f"bench_coach_{i}", None, PASSWORD, ROLE_COACH)
+            coach_id = User.get(User.username == f"bench_coach_{i}").id
+            Training.insert_many([{
+                'coach': coach_id,
+                'date': training.date,
+                'duration': 90,
+                'focus_area': "Тактика",
+            } for training in Training.select(Training.date).limit(BENCH_COACH_TRAININGS)]).execute()
+            self.delete_coach_ids.append(coach_id)
+
+# Чтение: запросы за методами update_* и списками администратора
+
+@benchmark("CoachInterface.update_trainings_list")
+def bench_trainings_first_page(ctx, i):
+    queries.trainings_page()
+
+@benchmark("PagedTreeview: страница тренировок из середины")
+def bench_trainings_deep_page(ctx, i):
+    queries.trainings_page(after=ctx.training_key)
+
+@benchmark("CoachInterface.update_matches_list")
+def bench_matches_first_page(ctx, i):
+    queries.matches_page()
+
+@benchmark("PlayerInterface.update_stats_table")
+def bench_player_stats(ctx, i):
+    queries.player_stats(ctx.player_id)
+    queries.player_season_totals(ctx.player_id)
+
+@benchmark("PlayerInterface.update_matches_list")
+def bench_match_index(ctx, i):
+    match_index.invalidate()
+    match_index.labels()
+
+@benchmark("AdminInterface.show_coaches_list")
+def bench_coaches(ctx, i):
+    queries.coaches()
+
+@benchmark("AdminInterface.show_players_list")
+def bench_players(ctx, i):
+    queries.players()
+
+@benchmark("CoachInterface.update_leaderboard: без кэша")
+def bench_leaderboard(ctx, i):
+    leaderboard.cache.clear()
+    leaderboard.leaderboard(*ctx.season)
+
+@benchmark("CoachInterface.update_leaderboard: из кэша")
+def bench_leaderboard_cached(ctx, i):
+    leaderboard.leaderboard(*ctx.season)
+
+@benchmark("SearchBox.search")
+def bench_search(ctx, i):
+    search.search("стандарт")
+
+@benchmark("ExportWindow: статистика игроков за сезон в CSV")
+def bench_export(ctx, i):
+    export.export_file('player_stats', os.path.join(SCRATCH_DIR, "export.csv"),
+                       date_from=ctx.season[0], date_to=ctx.season[1])
+
+@benchmark("PlayerInterface.update_form")
+def bench_player_form(ctx, i):
+    analytics.player_form(ctx.player_id)
+
+@benchmark("analytics: столбцы и показатели за 90 минут всех игроков")
+def bench_columns(ctx, i):
+    analytics.per_90(analytics.load_columns())
+
+@benchmark("snapshot.refresh")
+def bench_snapshot(ctx, i):
+    snapshot.refresh()
+
+@benchmark("authenticate_user")
+def bench_authenticate(ctx, i):
+    commands.authenticate_user(ctx.username, PASSWORD)
+
+# Подготовленные запросы против того же запроса, собираемого через ORM
+
+@benchmark("ORM: страница тренировок из середины")
+def bench_orm_trainings_page(ctx, i):
+    list(queries.trainings_page_query.query(after_date=ctx.training_key[0], after_id=ctx.training_key[1],
+                                            limit=queries.PAGE_SIZE))
+
+@benchmark("prepared: страница тренировок из середины")
+def bench_prepared_trainings_page(ctx, i):
+    queries.trainings_page_query.execute(after_date=ctx.training_key[0], after_id=ctx.training_key[1],
+                                         limit=queries.PAGE_SIZE)
+
+@benchmark("ORM: страница матчей")
+def bench_orm_matches_page(ctx, i):
+    list(queries.matches_page_query.query(limit=queries.PAGE_SIZE))
+
+@benchmark("prepared: страница матчей")
+def bench_prepared_matches_page(ctx, i):
+    queries.matches_page_query.execute(limit=queries.PAGE_SIZE)
+
+@benchmark("ORM: статистика игрока с матчами")
+def bench_orm_player_stats(ctx, i):
+    list(queries.player_stats_query.query(player_id=ctx.player_id))
+
+@benchmark("prepared: статистика игрока с матчами")
+def bench_prepared_player_stats(ctx, i):
+    queries.player_stats_query.execute(player_id=ctx.player_id)
+
+@benchmark("ORM: итоги игрока по сезонам")
+def bench_orm_totals(ctx, i):
+    list(queries.player_season_totals_query.query(player_id=ctx.player_id))
+
+@benchmark("prepared: итоги игрока по сезонам")
+def bench_prepared_totals(ctx, i):
+    queries.player_season_totals_query.execute(player_id=ctx.player_id)
+
+@benchmark("ORM: пользователь по имени")
+def bench_orm_user(ctx, i):
+    User.get_or_none(User.username == ctx.username)
+
+@benchmark("prepared: пользователь по имени")
+def bench_prepared_user(ctx, i):
+    prepared.REGISTRY['users_by_username'].instances(User, value=ctx.username)
+
+# Запись: выполняется после чтения, так как меняет данные
+
+@benchmark("register_user")
+def bench_register(ctx, i):
+    commands.register_user(f"bench_user_{i}", None, PASSWORD, 'player')
+
+@benchmark("AdminInterface.delete_players")
+def bench_delete_players(ctx, i):
+    commands.delete_players([ctx.delete_player_ids[i]])
+
+@benchmark("AdminInterface.delete_users")
+def bench_delete_users(ctx, i):
+    commands.delete_users([ctx.delete_coach_ids[i]])
+
+def run_benchmarks(repeat):
+    """Выполняет все замеры на текущей БД и возвращает {название: [мс, ...]}"""
+    ctx = Context(repeat)
+    results = {}
+    for name, func in BENCHMARKS:
+        timings = []
+        for i in range(repeat):
+            start = time.perf_counter()
+            func(ctx, i)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = timings
+    return results
+
+def print_report(report):
+    sizes = list(report)
+    names = [name for name, _ in BENCHMARKS]
+    width = max(len(name) for name in names)
+    print(f"{'Медиана, мс':<{width}}" + "".join(f"{size:>12}" for size in sizes))
+    for name in names:
+        cells = "".join(f"{statistics.median(report[size][name]):>12.3f}" for size in sizes)
+        print(f"{name:<{width}}{cells}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замеры основных запросов на разных объемах данных")
+    parser.add_argument('--sizes', default='small,medium', help=f"наборы данных: {', '.join(SIZES)}")
+    parser.add_argument('--repeat', type=int, default=20, help="повторов каждого замера")
+    parser.add_argument('--json', help="сохранить результаты в JSON-файл")
+    args = parser.parse_args()
+
+    report = {}
+    for size in args.sizes.split(','):
+        # Замеры записи меняют данные, поэтому база каждый раз создается заново
+        print(f"Генерация данных '{size}'...")
+        generate(scratch_path(size), *SIZES[size])
+        report[size] = run_benchmarks(args.repeat)
+        DB.close()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
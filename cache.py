@@ -0,0 +1,153 @@
+import threading
+from collections import OrderedDict
+from functools import partial
+from models import User, Player, Match
+from prepared import register
+
+# Общий для процесса кэш часто запрашиваемых записей (identity map): по
+# первичному ключу и по естественным ключам возвращается один и тот же
+# объект, пока запись не изменена через commands. Записи, измененные другим
+# процессом, обновляются только после сброса кэша, поэтому в кэше держатся
+# модели, которые меняются редко. Объекты из кэша общие для всех окон и
+# потоков: их нельзя изменять на месте.
+
+# Сколько записей одной модели хранится в кэше
+CACHE_SIZE = 1000
+
+def lookup_query(model, field, value):
+    return model.select().where(getattr(model, field) == value).limit(1)
+
+class IdentityMap:
+    """LRU-кэш записей модели по первичному ключу и естественным ключам"""
+
+    def __init__(self, model, natural_keys=(), size=CACHE_SIZE):
+        self.model = model
+        self.natural_keys = natural_keys
+        self.size = size
+        self._lock = threading.Lock()
+        self._rows = OrderedDict()
+        # (поле, значение) -> первичный ключ
+        self._keys = {}
+        # Увеличивается при каждом сбросе, чтобы не сохранить запись, прочитанную до него
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        # Чтение записи по ключу - подготовленный запрос на каждое ключевое поле
+        self._pk = model._meta.primary_key.name
+        self._lookups = {
+            field: register(f"{model._meta.table_name}_by_{field}", partial(lookup_query, model, field))
+            for field in (self._pk,) + tuple(natural_keys)
+        }
+
+    def _cached(self, pk):
+        # Вызывается под self._lock
+        row = self._rows.get(pk)
+        if row is not None:
+            self._rows.move_to_end(pk)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return row
+
+    def get(self, pk):
+        """Запись по первичному ключу; при отсутствии в БД - DoesNotExist"""
+        with self._lock:
+            row = self._cached(pk)
+            version = self._version
+        if row is None:
+            row = self._lookup(self._pk, pk)
+            if row is None:
+                raise self.model.DoesNotExist(f"{self.model.__name__} {pk}")
+            self._store(row, version)
+        return row
+
+    def get_by(self, field, value):
+        """Запись по естественному ключу field или None, если ее нет"""
+        with self._lock:
+            pk = self._keys.get((field, value))
+            row = self._cached(pk) if pk is not None else None
+            if pk is None:
+                self.misses += 1
+            version = self._version
+        if row is None:
+            row = self._lookup(field, value)
+            if row is not None:
+                self._store(row, version)
+        return row
+
+    def _lookup(self, field, value):
+        rows = self._lookups[field].instances(self.model, value=value)
+        return rows[0] if rows else None
+
+    def get_many(self, pks):
+        """Записи по набору первичных ключей: {pk: запись}; недостающие читаются одним запросом"""
+        found, missing = {}, []
+        with self._lock:
+            for pk in set(pks):
+                row = self._cached(pk)
+                if row is None:
+                    missing.append(pk)
+                else:
+                    found[pk] = row
+            version = self._version
+        if missing:
+            for row in self.model.select().where(self.model._meta.primary_key.in_(missing)):
+                self._store(row, version)
+                found[row.get_id()] = row
+        return found
+
+    def put(self, row):
+        """Кладет в кэш только что записанную через приложение запись"""
+        with self._lock:
+            version = self._version
+        self._store(row, version)
+
+    def _store(self, row, version):
+        with self._lock:
+            if version != self._version:
+                return
+            pk = row.get_id()
+            self._forget(pk)
+            self._rows[pk] = row
+            for field in self.natural_keys:
+                self._keys[(field, row.__data__.get(field))] = pk
+            while len(self._rows) > self.size:
+                self._forget(next(iter(self._rows)))
+
+    def _forget(self, pk):
+        # Вызывается под self._lock
+        row = self._rows.pop(pk, None)
+        if row is not None:
+            for field in self.natural_keys:
+                self._keys.pop((field, row.__data__.get(field)), None)
+
+    def invalidate(self, pk=None):
+        """Сбрасывает запись pk или, без pk, весь кэш модели"""
+        with self._lock:
+            self._version += 1
+            if pk is None:
+                self._rows.clear()
+                self._keys.clear()
+            else:
+                self._forget(pk)
+
+    def invalidate_key(self, field, value):
+        """Сбрасывает запись с естественным ключом field = value, если она в кэше"""
+        with self._lock:
+            pk = self._keys.get((field, value))
+            if pk is not None:
+                self._version += 1
+                self._forget(pk)
+
+    def stats(self):
+        with self._lock:
+            return {'rows': len(self._rows), 'hits': self.hits, 'misses': self.misses}
+
+users = IdentityMap(User, natural_keys=('username',))
+players = IdentityMap(Player, natural_keys=('user',))
+matches = IdentityMap(Match)
+
+def clear():
+    """Сбрасывает кэши всех моделей, например после смены файла БД"""
+    for identity_map in (users, players, matches):
+        identity_map.invalidate()
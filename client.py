@@ -0,0 +1,279 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from models import Match
+from session import Session
+from importer import ImportResult
+
+# Поля с датами в ответах сервера
+DATE_FIELDS = ('date', 'join_date')
+# Сколько секунд подписи матчей считаются актуальными без запроса к серверу
+MATCH_INDEX_TTL = 30
+# Тип тела запроса с загружаемым файлом, как в server.UPLOAD_CONTENT_TYPE
+UPLOAD_CONTENT_TYPE = 'application/octet-stream'
+
+class ServerError(Exception):
+    """Ошибка, возвращенная сервером клуба, или недоступность сервера"""
+
+def to_record(value):
+    """Преобразует данные из JSON в объект с доступом к полям через точку"""
+    if isinstance(value, list):
+        return [to_record(item) for item in value]
+    if isinstance(value, dict):
+        return SimpleNamespace(**{
+            name: datetime.strptime(item, '%Y-%m-%d').date()
+            if name in DATE_FIELDS and isinstance(item, str) else to_record(item)
+            for name, item in value.items()
+        })
+    return value
+
+def page_key(key):
+    date, pk = key
+    return f"{date.strftime('%Y-%m-%d')},{pk}"
+
+def day_param(value):
+    return value and value.strftime('%Y-%m-%d')
+
+class RemoteMatchIndex:
+    """Подписи матчей с сервера с тем же интерфейсом, что и match_index.MatchIndex"""
+
+    def __init__(self, client):
+        self.client = client
+        self._lock = threading.Lock()
+        self._labels = []
+        self._ids = {}
+        self._loaded_at = None
+
+    def labels(self):
+        pairs = self.client.call('GET', '/matches/index')
+        with self._lock:
+            self._labels = [label for label, _ in pairs]
+            self._ids = dict(pairs)
+            self._loaded_at = time.monotonic()
+            return list(self._labels)
+
+    def cached_labels(self):
+        # Матчи могли добавить с других компьютеров, поэтому кэш живет недолго
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > MATCH_INDEX_TTL:
+                return None
+            return list(self._labels)
+
+    def match_id(self, label):
+        with self._lock:
+            if label not in self._ids:
+                raise Match.DoesNotExist(label)
+            return self._ids[label]
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+class ServerClient:
+    """Работа с БД через сервер клуба (server.py).
+
+    Методы повторяют функции commands и queries, которые используют
+    интерфейсы, и возвращают объекты с теми же полями.
+    """
+
+    remote = True
+    # Локальной БД нет: записи в транзакциях выполняет сервер
+    database = None
+
+    def __init__(self, url, timeout):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.token = None
+        self.match_index = RemoteMatchIndex(self)
+
+    def prepare(self):
+        """БД подготавливает сам сервер при запуске"""
+
+    def call(self, method, path, payload=None, **params):
+        """Выполняет запрос к серверу и возвращает данные ответа"""
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        return self.send(method, path, data, 'application/json', params)
+
+    def upload(self, path, file_path, **params):
+        """Отправляет файл file_path телом POST-запроса, читая его по частям"""
+        with open(file_path, 'rb') as f:
+            return self.send('POST', path, f, UPLOAD_CONTENT_TYPE, params,
+                             length=os.path.getsize(file_path))
+
+    def send(self, method, path, data, content_type, params, length=None):
+        url = self.url + path
+        params = {name: value for name, value in params.items() if value is not None}
+        if params:
+            url += '?' + urlencode(params)
+        request = Request(url, data=data, method=method)
+        request.add_header('Content-Type', content_type)
+        if length is not None:
+            # Без длины файл ушел бы chunked, а сервер ее требует
+            request.add_header('Content-Length', str(length))
+        if self.token:
+            request.add_header('Authorization', f"Bearer {self.token}")
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except HTTPError as e:
+            try:
+                message = json.loads(e.read().decode('utf-8'))['error']
+            except (ValueError, KeyError):
+                message = f"HTTP {e.code}"
+            raise ServerError(message)
+        except URLError as e:
+            raise ServerError(f"Сервер {self.url} недоступен: {e.reason}")
+
+    # Регистрация и вход
+
+    def register_user(self, username, email, password, role):
+        try:
+            result = self.call('POST', '/register', {
+                'username': username, 'email': email, 'password': password, 'role': role
+            })
+        except ServerError as e:
+            return False, str(e)
+        return result['success'], result['message']
+
+    def authenticate_user(self, username, password):
+        try:
+            result = self.call('POST', '/login', {'username': username, 'password': password})
+        except ServerError as e:
+            return False, str(e), None
+        if not result['success']:
+            return False, result['message'], None
+        self.token = result['token']
+        return True, result['message'], Session(to_record(result['user']), to_record(result['player']))
+
+    def logout(self):
+        """Закрывает сессию на сервере; недоступность сервера при выходе не ошибка"""
+        if self.token is None:
+            return
+        try:
+            self.call('POST', '/logout')
+        except ServerError:
+            pass
+        self.token = None
+
+    # Тренировки и матчи
+
+    def trainings_page(self, after=None, before=None, limit=None, date_from=None, date_to=None):
+        return to_record(self.call(
+            'GET', '/trainings',
+            after=after and page_key(after), before=before and page_key(before), limit=limit,
+            date_from=day_param(date_from), date_to=day_param(date_to)
+        ))
+
+    def matches_page(self, after=None, before=None, limit=None, date_from=None, date_to=None):
+        return to_record(self.call(
+            'GET', '/matches',
+            after=after and page_key(after), before=before and page_key(before), limit=limit,
+            date_from=day_param(date_from), date_to=day_param(date_to)
+        ))
+
+    def add_training(self, coach, date, duration, focus_area, notes=None):
+        # Тренер определяется сервером по сессии
+        return to_record(self.call('POST', '/trainings', {
+            'date': date.strftime('%Y-%m-%d'), 'duration': duration,
+            'focus_area': focus_area, 'notes': notes
+        }))
+
+    def add_match(self, opponent, date, location, score=None, notes=None):
+        match = to_record(self.call('POST', '/matches', {
+            'opponent': opponent, 'date': date.strftime('%Y-%m-%d'),
+            'location': location, 'score': score, 'notes': notes
+        }))
+        self.match_index.invalidate()
+        return match
+
+    def match_sheet(self, match_id):
+        return to_record(self.call('GET', '/matches/sheet', match=match_id))
+
+    def save_match_sheet(self, match_id, played, absent=()):
+        return self.call('POST', '/matches/sheet', {
+            'match': match_id, 'played': list(played), 'absent': list(absent)
+        })
+
+    def import_file(self, kind, path, **defaults):
+        data = self.upload('/import', path, kind=kind, filename=os.path.basename(path))
+        result = ImportResult()
+        result.inserted = data['inserted']
+        result.rejected = [tuple(item) for item in data['rejected']]
+        if kind == 'matches':
+            self.match_index.invalidate()
+        return result
+
+    def leaderboard(self, date_from=None, date_to=None):
+        return to_record(self.call(
+            'GET', '/leaderboard',
+            date_from=day_param(date_from),
+            date_to=day_param(date_to)
+        ))
+
+    def search(self, text, kind=None):
+        return to_record(self.call('GET', '/search', q=text, kind=kind))
+
+    def export_file(self, kind, path, progress=None, player_id=None, date_from=None, date_to=None):
+        from export import export_format, write_rows
+        export_format(path)
+        params = {
+            'kind': kind,
+            'player_id': player_id,
+            'date_from': day_param(date_from),
+            'date_to': day_param(date_to),
+        }
+        page = self.call('GET', '/export', **params)
+        return write_rows(path, page['header'], self.export_rows(page, params), progress=progress)
+
+    def export_rows(self, page, params):
+        """Строки выгрузки; следующая страница запрашивается, когда записана предыдущая"""
+        while True:
+            for row in page['rows']:
+                yield row
+            if page['after'] is None:
+                return
+            page = self.call('GET', '/export', after=json.dumps(page['after']), **params)
+
+    # Игрок и статистика
+
+    def save_player(self, player_id, user, name, position, jersey_number, join_date):
+        return to_record(self.call('POST', '/player', {
+            'name': name, 'position': position, 'jersey_number': jersey_number,
+            'join_date': join_date.strftime('%Y-%m-%d')
+        }))
+
+    def player_stats(self, player_id, date_from=None, date_to=None):
+        return to_record(self.call(
+            'GET', '/stats', date_from=day_param(date_from), date_to=day_param(date_to)
+        ))
+
+    def player_season_totals(self, player_id):
+        return to_record(self.call('GET', '/stats/totals'))
+
+    def player_form(self, player_id, date_from=None, date_to=None):
+        return to_record(self.call(
+            'GET', '/stats/form', date_from=day_param(date_from), date_to=day_param(date_to)
+        ))
+
+    def add_player_stats(self, player, match, **counts):
+        return to_record(self.call('POST', '/stats', dict(counts, match=match)))
+
+    # Администрирование
+
+    def coaches(self):
+        return to_record(self.call('GET', '/coaches'))
+
+    def players(self):
+        return to_record(self.call('GET', '/players'))
+
+    def delete_users(self, user_ids):
+        self.call('POST', '/users/delete', {'ids': list(user_ids)})
+
+    def delete_players(self, player_ids):
+        self.call('POST', '/players/delete', {'ids': list(player_ids)})
@@ -1,13 +1,34 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from models import Training, User, DB, Match
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
 from functools import partial
+from importer import IMPORT_KINDS
+from leaderboard import cards_to_suspension
+from commands import STATS_FIELDS
+from models import Match
+from backend import get_backend
+from db_worker import get_worker
+from widgets import PagedTreeview, DateRangeBar
+from search_window import SearchBox
+from export_window import ExportWindow
+
+# Порядок таблицы лидеров: подпись -> поле с местом игрока
+LEADERBOARD_ORDERS = {
+    "Голы": 'goals_rank',
+    "Передачи": 'assists_rank',
+    "Карточки": 'cards_rank',
+}
+
+# Заголовки столбцов листа матча; поля статистики идут в порядке STATS_FIELDS
+MATCH_SHEET_COLUMNS = ("Играл", "№", "Игрок", "Позиция", "Голы", "Передачи", "ЖК", "КК")
 
 class CoachInterface:
-    def __init__(self, root, user_id):
+    def __init__(self, root, session):
         self.root = root
-        self.coach = User.get(User.id == user_id)
+        self.session = session
+        self.coach_id = session.user_id
+        self.backend = get_backend()
+        self.worker = get_worker()
         self.frame = tk.Frame(root)
         self.frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
         
@@ -37,6 +58,45 @@ class CoachInterface:
             padx=10
         ).pack(side=tk.LEFT, padx=5)
 
+        tk.Button(
+            control_frame,
+            text="Лист матча",
+            command=self.show_match_sheet,
+            bg="#795548",
+            fg="white",
+            padx=10
+        ).pack(side=tk.LEFT, padx=5)
+
+        tk.Button(
+            control_frame,
+            text="Таблица лидеров",
+            command=self.show_leaderboard,
+            bg="#9C27B0",
+            fg="white",
+            padx=10
+        ).pack(side=tk.LEFT, padx=5)
+
+        tk.Button(
+            control_frame,
+            text="Импорт данных",
+            command=self.show_import_window,
+            bg="#607D8B",
+            fg="white",
+            padx=10
+        ).pack(side=tk.LEFT, padx=5)
+
+        tk.Button(
+            control_frame,
+            text="Экспорт статистики",
+            command=partial(ExportWindow, self.root),
+            bg="#607D8B",
+            fg="white",
+            padx=10
+        ).pack(side=tk.LEFT, padx=5)
+
+        # Поиск по темам и заметкам тренировок и матчей
+        SearchBox(control_frame, self.root).pack(side=tk.RIGHT)
+
     def show_trainings_management(self):
         """Показывает интерфейс управления тренировками"""
         # Очищаем текущий интерфейс
@@ -55,6 +115,22 @@ class CoachInterface:
         self.create_control_buttons()
         self.create_matches_section()
 
+    def show_leaderboard(self):
+        """Показывает таблицу лидеров команды"""
+        for widget in self.frame.winfo_children():
+            widget.destroy()
+        
+        self.create_control_buttons()
+        self.create_leaderboard_section()
+
+    def show_match_sheet(self):
+        """Показывает лист матча для ввода статистики всей команды"""
+        for widget in self.frame.winfo_children():
+            widget.destroy()
+
+        self.create_control_buttons()
+        self.create_match_sheet_section()
+
     def create_trainings_section(self):
         """Создает раздел управления тренировками"""
         trainings_frame = tk.LabelFrame(self.frame, text="Управление тренировками", padx=10, pady=10)
@@ -69,6 +145,10 @@ class CoachInterface:
             fg="white"
         ).pack(pady=5, anchor=tk.NE)
 
+        # Период списка, по умолчанию текущий сезон
+        self.trainings_period = DateRangeBar(trainings_frame, self.filter_trainings)
+        self.trainings_period.pack(fill=tk.X, pady=5)
+
         # Таблица тренировок
         columns = ("id", "date", "duration", "focus_area", "coach")
         self.trainings_tree = ttk.Treeview(
@@ -91,10 +171,13 @@ class CoachInterface:
         self.trainings_tree.column("coach", width=150)
         
         scrollbar = ttk.Scrollbar(trainings_frame, orient="vertical", command=self.trainings_tree.yview)
-        self.trainings_tree.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side="right", fill="y")
         self.trainings_tree.pack(fill=tk.BOTH, expand=True)
         
+        self.trainings_list = PagedTreeview(
+            self.trainings_tree, scrollbar, self.backend.trainings_page, self.format_training_row,
+            runner=self.worker.read, filters=self.trainings_period.filters()
+        )
         self.update_trainings_list()
 
     def create_matches_section(self):
@@ -111,6 +194,10 @@ class CoachInterface:
             fg="white"
         ).pack(pady=5, anchor=tk.NE)
 
+        # Период списка, по умолчанию текущий сезон
+        self.matches_period = DateRangeBar(matches_frame, self.filter_matches)
+        self.matches_period.pack(fill=tk.X, pady=5)
+
         # Таблица матчей
         columns = ("id", "opponent", "date", "location", "score")
         self.matches_tree = ttk.Treeview(
@@ -133,12 +220,88 @@ class CoachInterface:
         self.matches_tree.column("score", width=80, anchor='center')
         
         scrollbar = ttk.Scrollbar(matches_frame, orient="vertical", command=self.matches_tree.yview)
-        self.matches_tree.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side="right", fill="y")
         self.matches_tree.pack(fill=tk.BOTH, expand=True)
         
+        self.matches_list = PagedTreeview(
+            self.matches_tree, scrollbar, self.backend.matches_page, self.format_match_row,
+            runner=self.worker.read, filters=self.matches_period.filters()
+        )
         self.update_matches_list()
 
+    def create_leaderboard_section(self):
+        """Создает раздел таблицы лидеров за выбранный период"""
+        leaderboard_frame = tk.LabelFrame(self.frame, text="Таблица лидеров", padx=10, pady=10)
+        leaderboard_frame.pack(fill=tk.BOTH, expand=True)
+
+        # Период (по умолчанию текущий сезон) и порядок
+        filter_frame = tk.Frame(leaderboard_frame)
+        filter_frame.pack(fill=tk.X, pady=5)
+
+        self.leaders_period = DateRangeBar(filter_frame, self.update_leaderboard)
+        self.leaders_period.pack(side=tk.LEFT)
+        self.leaders_order_var = tk.StringVar(value=next(iter(LEADERBOARD_ORDERS)))
+
+        tk.Label(filter_frame, text="Сортировка:").pack(side=tk.LEFT, padx=(10, 0))
+        order_combobox = ttk.Combobox(
+            filter_frame, textvariable=self.leaders_order_var,
+            values=list(LEADERBOARD_ORDERS), state="readonly", width=12
+        )
+        order_combobox.pack(side=tk.LEFT, padx=5)
+        order_combobox.bind("<<ComboboxSelected>>", lambda _: self.fill_leaderboard(self.leaderboard_rows))
+
+        tk.Label(
+            leaderboard_frame,
+            text="Желтым выделены игроки, которым до дисквалификации осталась одна карточка",
+            fg="gray"
+        ).pack(anchor="w")
+
+        # Таблица лидеров
+        columns = ("place", "name", "jersey", "appearances", "goals", "assists", "yellow", "red", "suspension")
+        self.leaderboard_tree = ttk.Treeview(leaderboard_frame, columns=columns, show="headings")
+
+        headings = ("Место", "Игрок", "Номер", "Матчи", "Голы", "Передачи", "Желтые", "Красные", "ЖК до дисквал.")
+        for column, text in zip(columns, headings):
+            self.leaderboard_tree.heading(column, text=text)
+            self.leaderboard_tree.column(column, width=80, anchor='center')
+        self.leaderboard_tree.column("name", width=200, anchor='w')
+        self.leaderboard_tree.tag_configure('suspension', background="#FFF3CD")
+
+        scrollbar = ttk.Scrollbar(leaderboard_frame, orient="vertical", command=self.leaderboard_tree.yview)
+        self.leaderboard_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.leaderboard_tree.pack(fill=tk.BOTH, expand=True)
+
+        self.leaderboard_rows = []
+        self.update_leaderboard(self.leaders_period.filters())
+
+    def update_leaderboard(self, filters):
+        """Загружает таблицу лидеров за выбранный период"""
+        self.worker.read(
+            partial(self.backend.leaderboard, **filters),
+            self.fill_leaderboard,
+            lambda e: messagebox.showerror("Ошибка", f"Не удалось загрузить таблицу лидеров: {str(e)}")
+        )
+
+    def fill_leaderboard(self, rows):
+        """Заполняет таблицу лидеров в выбранном порядке"""
+        self.leaderboard_rows = rows
+        rank = LEADERBOARD_ORDERS[self.leaders_order_var.get()]
+        self.leaderboard_tree.delete(*self.leaderboard_tree.get_children())
+        for row in sorted(rows, key=lambda row: (getattr(row, rank), row.name)):
+            to_suspension = cards_to_suspension(row.yellow_cards)
+            self.leaderboard_tree.insert("", tk.END, values=(
+                getattr(row, rank),
+                row.name,
+                row.jersey_number,
+                row.appearances,
+                row.goals,
+                row.assists,
+                row.yellow_cards,
+                row.red_cards,
+                to_suspension
+            ), tags=('suspension',) if to_suspension == 1 else ())
+
     def show_add_training_window(self):
         """Показывает окно добавления новой тренировки"""
         add_window = tk.Toplevel(self.root)
@@ -236,11 +399,225 @@ class CoachInterface:
             fg="white"
         ).pack(side=tk.LEFT, padx=5)
 
+    def create_match_sheet_section(self):
+        """Создает лист матча: статистика всех игроков за выбранный матч"""
+        sheet_frame = tk.LabelFrame(self.frame, text="Лист матча", padx=10, pady=10)
+        sheet_frame.pack(fill=tk.BOTH, expand=True)
+
+        match_frame = tk.Frame(sheet_frame)
+        match_frame.pack(fill=tk.X, pady=5)
+        tk.Label(match_frame, text="Матч:").pack(side=tk.LEFT)
+        self.sheet_match_var = tk.StringVar()
+        self.sheet_match_combobox = ttk.Combobox(
+            match_frame, textvariable=self.sheet_match_var, state="readonly", width=50,
+            postcommand=self.refresh_sheet_matches
+        )
+        self.sheet_match_combobox.pack(side=tk.LEFT, padx=5)
+        self.sheet_match_combobox.bind("<<ComboboxSelected>>", lambda _: self.load_match_sheet())
+        tk.Button(
+            match_frame,
+            text="Сохранить лист",
+            command=self.save_match_sheet,
+            bg="#4CAF50",
+            fg="white"
+        ).pack(side=tk.RIGHT, padx=5)
+
+        tk.Label(
+            sheet_frame,
+            text="Отметьте сыгравших игроков и заполните статистику. "
+                 "Сохраняются только измененные строки, одной транзакцией.",
+            fg="gray"
+        ).pack(anchor="w")
+
+        # Строки игроков в прокручиваемой области
+        canvas = tk.Canvas(sheet_frame, highlightthickness=0)
+        scrollbar = ttk.Scrollbar(sheet_frame, orient="vertical", command=canvas.yview)
+        self.sheet_grid = tk.Frame(canvas)
+        self.sheet_grid.bind("<Configure>", lambda _: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.create_window((0, 0), window=self.sheet_grid, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas.pack(fill=tk.BOTH, expand=True)
+
+        # id игрока -> (строка листа, сохраненные значения, переменные полей)
+        self.sheet_lines = {}
+        self.sheet_match_id = None
+        self.worker.read(self.backend.match_index.labels, self.fill_sheet_matches)
+
+    def refresh_sheet_matches(self):
+        """Перед открытием списка подставляет актуальные матчи из общего индекса"""
+        labels = self.backend.match_index.cached_labels()
+        if labels is None:
+            self.worker.read(self.backend.match_index.labels, self.fill_sheet_matches)
+        else:
+            self.sheet_match_combobox['values'] = labels
+
+    def fill_sheet_matches(self, labels):
+        self.sheet_match_combobox['values'] = labels
+        if labels and not self.sheet_match_var.get():
+            self.sheet_match_var.set(labels[0])
+            self.load_match_sheet()
+
+    def load_match_sheet(self):
+        """Загружает лист выбранного матча"""
+        try:
+            match_id = self.backend.match_index.match_id(self.sheet_match_var.get())
+        except Match.DoesNotExist:
+            messagebox.showerror("Ошибка", "Выбранный матч не найден")
+            return
+        self.worker.read(
+            partial(self.backend.match_sheet, match_id),
+            partial(self.fill_match_sheet, match_id),
+            lambda e: messagebox.showerror("Ошибка", f"Не удалось загрузить лист матча: {str(e)}")
+        )
+
+    def fill_match_sheet(self, match_id, lines):
+        """Строит строки листа: отметка участия, игрок и поля статистики"""
+        if not self.sheet_grid.winfo_exists():
+            return
+        for widget in self.sheet_grid.winfo_children():
+            widget.destroy()
+        self.sheet_match_id = match_id
+        self.sheet_lines = {}
+
+        for column, text in enumerate(MATCH_SHEET_COLUMNS):
+            tk.Label(self.sheet_grid, text=text, font=("Arial", 9, "bold")).grid(row=0, column=column, padx=4)
+
+        for row, line in enumerate(lines, 1):
+            played_var = tk.BooleanVar(value=bool(line.played))
+            count_vars = {field: tk.IntVar(value=getattr(line, field)) for field in STATS_FIELDS}
+            tk.Checkbutton(self.sheet_grid, variable=played_var).grid(row=row, column=0)
+            tk.Label(self.sheet_grid, text=line.jersey_number).grid(row=row, column=1)
+            tk.Label(self.sheet_grid, text=line.name, anchor="w").grid(row=row, column=2, sticky="w", padx=4)
+            tk.Label(self.sheet_grid, text=line.position, anchor="w").grid(row=row, column=3, sticky="w", padx=4)
+            for column, field in enumerate(STATS_FIELDS, 4):
+                tk.Spinbox(self.sheet_grid, from_=0, to=99, width=4,
+                           textvariable=count_vars[field]).grid(row=row, column=column, padx=2)
+                # Введенная статистика означает, что игрок сыграл
+                count_vars[field].trace_add("write", partial(self.mark_played, played_var, count_vars[field]))
+            saved = (bool(line.played), {field: getattr(line, field) for field in STATS_FIELDS})
+            self.sheet_lines[line.player_id] = (line, saved, played_var, count_vars)
+
+    def mark_played(self, played_var, count_var, *_):
+        try:
+            if count_var.get() > 0:
+                played_var.set(True)
+        except tk.TclError:
+            pass
+
+    def sheet_changes(self):
+        """Измененные строки листа: (строки сыгравших, id не игравших)"""
+        played, absent = [], []
+        for player_id, (line, (was_played, saved), played_var, count_vars) in self.sheet_lines.items():
+            try:
+                counts = {field: var.get() for field, var in count_vars.items()}
+            except tk.TclError:
+                raise ValueError(f"{line.name}: статистика указывается целыми числами")
+            if any(value < 0 for value in counts.values()):
+                raise ValueError(f"{line.name}: статистика не может быть отрицательной")
+            if played_var.get():
+                if not was_played or counts != saved:
+                    played.append(dict(counts, player=player_id))
+            elif was_played:
+                absent.append(player_id)
+        return played, absent
+
+    def save_match_sheet(self):
+        """Сохраняет измененные строки листа одним запросом к БД"""
+        if self.sheet_match_id is None:
+            messagebox.showerror("Ошибка", "Выберите матч")
+            return
+        try:
+            played, absent = self.sheet_changes()
+        except ValueError as e:
+            messagebox.showerror("Ошибка ввода", str(e))
+            return
+        if not played and not absent:
+            messagebox.showinfo("Лист матча", "Изменений нет")
+            return
+
+        self.worker.write(
+            partial(self.backend.save_match_sheet, self.sheet_match_id, played, absent),
+            partial(self.on_match_sheet_saved, self.sheet_match_id, played, absent),
+            lambda e: messagebox.showerror("Ошибка", f"Не удалось сохранить лист матча: {str(e)}")
+        )
+
+    def on_match_sheet_saved(self, match_id, played, absent, count):
+        messagebox.showinfo("Успех", f"Лист матча сохранен, строк статистики: {count}")
+        # Записанные значения становятся исходными, лист не перечитывается
+        if match_id != self.sheet_match_id or not self.sheet_grid.winfo_exists():
+            return
+        saved = {row['player']: (True, {field: row[field] for field in STATS_FIELDS}) for row in played}
+        saved.update((player_id, (False, dict.fromkeys(STATS_FIELDS, 0))) for player_id in absent)
+        for player_id, values in saved.items():
+            line, _, played_var, count_vars = self.sheet_lines[player_id]
+            if not values[0]:
+                for var in count_vars.values():
+                    var.set(0)
+            self.sheet_lines[player_id] = (line, values, played_var, count_vars)
+
+    def show_import_window(self):
+        """Показывает окно импорта данных из CSV/JSON"""
+        import_window = tk.Toplevel(self.root)
+        import_window.title("Импорт данных")
+        import_window.resizable(False, False)
+
+        frame = tk.Frame(import_window, padx=10, pady=10)
+        frame.pack(expand=True)
+
+        tk.Label(frame, text="Что импортировать:").pack(anchor="w")
+        kind_var = tk.StringVar(value='matches')
+        for kind, title in IMPORT_KINDS.items():
+            tk.Radiobutton(frame, text=title, variable=kind_var, value=kind).pack(anchor="w")
+
+        tk.Label(
+            frame,
+            text="Поддерживаются файлы CSV, JSON и JSON Lines.\n"
+                 "Тренировки без тренера добавляются от вашего имени.",
+            justify=tk.LEFT,
+            fg="gray"
+        ).pack(anchor="w", pady=5)
+
+        tk.Button(
+            frame,
+            text="Выбрать файл...",
+            command=partial(self.import_data, kind_var, import_window),
+            bg="#2196F3",
+            fg="white"
+        ).pack(pady=5, fill=tk.X)
+
+    def import_data(self, kind_var, window):
+        """Импортирует выбранный файл в фоновом потоке"""
+        path = filedialog.askopenfilename(
+            parent=window,
+            filetypes=[("Данные", "*.csv *.json *.jsonl *.ndjson"), ("Все файлы", "*.*")]
+        )
+        if not path:
+            return
+        kind = kind_var.get()
+        window.destroy()
+
+        # Импорт сам разбивает вставку на транзакции
+        self.worker.write(
+            partial(self.backend.import_file, kind, path, coach=self.coach_id),
+            partial(self.on_data_imported, kind),
+            lambda e: messagebox.showerror("Ошибка", f"Не удалось импортировать данные: {str(e)}"),
+            transaction=False
+        )
+
+    def on_data_imported(self, kind, result):
+        messagebox.showinfo("Импорт завершен", result.summary())
+        # Обновляем список, если он сейчас открыт
+        if kind == 'trainings' and hasattr(self, 'trainings_tree') and self.trainings_tree.winfo_exists():
+            self.update_trainings_list()
+        elif kind == 'matches' and hasattr(self, 'matches_tree') and self.matches_tree.winfo_exists():
+            self.update_matches_list()
+
     def save_training(self, window):
         """Сохраняет новую тренировку в БД"""
         try:
             training_data = {
-                'coach': self.coach,
+                'coach': self.coach_id,
                 'date': datetime.strptime(self.training_date_var.get(), '%Y-%m-%d').date(),
                 'duration': self.duration_var.get(),
                 'focus_area': self.focus_area_var.get().strip()
@@ -251,17 +628,23 @@ class CoachInterface:
                 raise ValueError("Укажите область внимания")
             if training_data['duration'] <= 0:
                 raise ValueError("Длительность должна быть положительным числом")
-
-            with DB.atomic():
-                Training.create(**training_data)
-                messagebox.showinfo("Успех", "Тренировка успешно добавлена")
-                window.destroy()
-                self.update_trainings_list()
-
         except ValueError as e:
             messagebox.showerror("Ошибка ввода", str(e))
+            return
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось сохранить тренировку: {str(e)}")
+            return
+
+        self.worker.write(
+            partial(self.backend.add_training, **training_data),
+            partial(self.on_training_saved, window),
+            lambda e: messagebox.showerror("Ошибка", f"Не удалось сохранить тренировку: {str(e)}")
+        )
+
+    def on_training_saved(self, window, training):
+        messagebox.showinfo("Успех", "Тренировка успешно добавлена")
+        window.destroy()
+        self.trainings_list.upsert(training)
 
     def save_match(self, window):
         """Сохраняет новый матч в БД"""
@@ -278,49 +661,56 @@ class CoachInterface:
                 raise ValueError("Укажите противника")
             if not match_data['location']:
                 raise ValueError("Укажите стадион")
-
-            with DB.atomic():
-                Match.create(**match_data)
-                messagebox.showinfo("Успех", "Матч успешно добавлен")
-                window.destroy()
-                self.update_matches_list()
-
         except ValueError as e:
             messagebox.showerror("Ошибка ввода", str(e))
+            return
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось сохранить матч: {str(e)}")
+            return
+
+        self.worker.write(
+            partial(self.backend.add_match, **match_data),
+            partial(self.on_match_saved, window),
+            lambda e: messagebox.showerror("Ошибка", f"Не удалось сохранить матч: {str(e)}")
+        )
+
+    def on_match_saved(self, window, match):
+        messagebox.showinfo("Успех", "Матч успешно добавлен")
+        window.destroy()
+        self.matches_list.upsert(match)
 
     def update_trainings_list(self):
         """Обновляет список тренировок в таблице"""
-        for item in self.trainings_tree.get_children():
-            self.trainings_tree.delete(item)
-            
-        trainings = (Training
-                    .select(Training, User)
-                    .join(User)
-                    .order_by(Training.date.desc()))
-        
-        for training in trainings:
-            self.trainings_tree.insert("", tk.END, values=(
-                training.id,
-                training.date.strftime('%Y-%m-%d'),
-                training.duration,
-                training.focus_area,
-                training.coach.username
-            ))
+        self.trainings_list.reload()
 
     def update_matches_list(self):
         """Обновляет список матчей в таблице"""
-        for item in self.matches_tree.get_children():
-            self.matches_tree.delete(item)
-            
-        matches = Match.select().order_by(Match.date.desc())
-        
-        for match in matches:
-            self.matches_tree.insert("", tk.END, values=(
-                match.id,
-                match.opponent,
-                match.date.strftime('%Y-%m-%d'),
-                match.location,
-                match.score if match.score else "-"
-            ))
\ No newline at end of file
+        self.matches_list.reload()
+
+    def filter_trainings(self, filters):
+        """Показывает тренировки за выбранный период"""
+        self.trainings_list.set_filters(filters)
+
+    def filter_matches(self, filters):
+        """Показывает матчи за выбранный период"""
+        self.matches_list.set_filters(filters)
+
+    def format_training_row(self, training):
+        """Формирует строку таблицы тренировок"""
+        return (
+            training.id,
+            training.date.strftime('%Y-%m-%d'),
+            training.duration,
+            training.focus_area,
+            training.coach.username
+        )
+
+    def format_match_row(self, match):
+        """Формирует строку таблицы матчей"""
+        return (
+            match.id,
+            match.opponent,
+            match.date.strftime('%Y-%m-%d'),
+            match.location,
+            match.score if match.score else "-"
+        )
\ No newline at end of file
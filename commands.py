@@ -1,6 +1,14 @@
-from models import DB, User, ROLE_PLAYER, ROLE_COACH, ROLE_ADMIN
-from peewee import DoesNotExist
+from models import DB, User, Player, Training, Match, PlayerStats, PlayerSeasonTotals, ROLE_PLAYER, ROLE_COACH, ROLE_ADMIN
+from peewee import chunked, DoesNotExist, JOIN
 from hashlib import sha256
+from match_index import match_index
+from session import Session
+import cache
+
+# Максимальное число id в одном условии IN при удалении
+DELETE_CHUNK_SIZE = 500
+# Поля статистики игрока за матч
+STATS_FIELDS = ('goals', 'assists', 'yellow_cards', 'red_cards')
 
 def hash_password(password):
     """Хеширование пароля с использованием SHA-256"""
@@ -30,22 +38,115 @@ def register_user(username, email, password, role):
         return False, f"Ошибка при регистрации: {str(e)}"
 
 def authenticate_user(username, password):
-    """Аутентификация пользователя"""
+    """Аутентификация пользователя.
+
+    Пользователь и связанный с ним игрок загружаются одним запросом, а не
+    из кэша записей: пароль всегда сверяется с текущей строкой БД, даже если
+    пользователя удалили или сменили ему пароль из другого процесса.
+    Прочитанные записи обновляют кэш.
+    """
     try:
-        user = User.get(User.username == username)
-        if user.password == hash_password(password):
-            return True, "Успешная авторизация", user.role
-        return False, "Неверный пароль", None
+        user = (User
+                .select(User, Player)
+                .join(Player, JOIN.LEFT_OUTER, on=(Player.user == User.id), attr='player')
+                .where(User.username == username)
+                .get())
     except DoesNotExist:
+        cache.users.invalidate_key('username', username)
         return False, "Пользователь не найден", None
     except Exception as e:
         return False, f"Ошибка при авторизации: {str(e)}", None
 
-# Инициализация базы данных при импорте
-if not DB.is_closed():
-    DB.close()
+    cache.users.put(user)
+    if user.player is not None:
+        cache.players.put(user.player)
+    if user.password == hash_password(password):
+        return True, "Успешная авторизация", Session(user, user.player)
+    return False, "Неверный пароль", None
+
+def add_training(**training_data):
+    """Добавляет новую тренировку и возвращает ее вместе с тренером"""
+    with DB.atomic():
+        training = Training.create(**training_data)
+    training.coach = cache.users.get(training.coach_id)
+    return training
+
+def add_match(**match_data):
+    """Добавляет новый матч"""
+    with DB.atomic():
+        match = Match.create(**match_data)
+    match_index.invalidate()
+    return match
+
+def save_player(player_id, **player_data):
+    """Создает или обновляет данные игрока и возвращает запись игрока"""
+    with DB.atomic():
+        if player_id is None:
+            player = Player.create(**player_data)
+        else:
+            Player.update(**player_data).where(Player.id == player_id).execute()
+            player = Player.get(Player.id == player_id)
+    cache.players.invalidate(player.id)
+    cache.players.put(player)
+    return player
+
+def add_player_stats(**stats_data):
+    """Добавляет статистику игрока за матч и возвращает ее вместе с матчем"""
+    with DB.atomic():
+        match = cache.matches.get(stats_data.pop('match'))
+        return PlayerStats.create(match=match, **stats_data)
+
+def save_match_sheet(match_id, played, absent=()):
+    """Сохраняет лист матча одной транзакцией и возвращает число записанных строк.
+
+    played - строки сыгравших игроков: словари с player и полями STATS_FIELDS;
+    absent - id игроков, чьи строки за матч удаляются. Прежние строки
+    игроков листа заменяются: удаление одним запросом, вставка одним
+    insert_many. Итоги, счетчик таблицы лидеров и индекс поиска
+    обновляются триггерами.
+    """
+    cache.matches.get(match_id)  # DoesNotExist, если матча уже нет
+    rows = []
+    for line in played:
+        counts = {field: int(line.get(field, 0)) for field in STATS_FIELDS}
+        if any(value < 0 for value in counts.values()):
+            raise ValueError("Статистика не может быть отрицательной")
+        rows.append(dict(counts, player=int(line['player']), match=match_id))
+    player_ids = [row['player'] for row in rows] + [int(pk) for pk in absent]
+
+    with DB.atomic():
+        for chunk in chunked(player_ids, DELETE_CHUNK_SIZE):
+            PlayerStats.delete().where((PlayerStats.match == match_id) & PlayerStats.player.in_(chunk)).execute()
+        for chunk in chunked(rows, DELETE_CHUNK_SIZE):
+            PlayerStats.insert_many(chunk).execute()
+    return len(rows)
+
+def delete_user_graph(user_ids):
+    """Удаляет пользователей со всеми зависимыми записями несколькими запросами.
+
+    Дублирует ON DELETE CASCADE, чтобы не оставлять мусора и при отключенных внешних ключах.
+    """
+    players = Player.select(Player.id).where(Player.user.in_(user_ids))
+    # Итоги удаляются заранее, чтобы триггеры статистики не пересчитывали их
+    PlayerSeasonTotals.delete().where(PlayerSeasonTotals.player.in_(players)).execute()
+    PlayerStats.delete().where(PlayerStats.player.in_(players)).execute()
+    Player.delete().where(Player.user.in_(user_ids)).execute()
+    Training.delete().where(Training.coach.in_(user_ids)).execute()
+    User.delete().where(User.id.in_(user_ids)).execute()
+    # id удаленных игроков уже не узнать, поэтому кэш игроков сбрасывается целиком
+    for user_id in user_ids:
+        cache.users.invalidate(user_id)
+    cache.players.invalidate()
+
+def delete_users(user_ids):
+    """Удаляет пользователей (тренеров) вместе с их тренировками"""
+    with DB.atomic():
+        for chunk in chunked(user_ids, DELETE_CHUNK_SIZE):
+            delete_user_graph(chunk)
 
-DB.connect()
-if not User.table_exists():
-    from models import initialize_database
-    initialize_database()
\ No newline at end of file
+def delete_players(player_ids):
+    """Удаляет игроков вместе с их статистикой и пользователями"""
+    with DB.atomic():
+        for chunk in chunked(player_ids, DELETE_CHUNK_SIZE):
+            user_ids = Player.select(Player.user).where(Player.id.in_(chunk))
+            delete_user_graph([user_id for (user_id,) in user_ids.tuples()])
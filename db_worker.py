@@ -0,0 +1,119 @@
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+from functools import partial
+from models import DB
+import instrumentation
+
+# Количество потоков для чтения из БД
+READ_WORKERS = 2
+# Период проверки готовых результатов в потоке Tk (мс)
+POLL_INTERVAL = 30
+
+class DBWorker:
+    """Выполняет запросы к БД в фоновых потоках и возвращает результаты в поток Tk.
+
+    Чтение выполняется пулом потоков, все записи - одним выделенным потоком
+    внутри транзакции, поэтому записи никогда не конкурируют между собой.
+    Колбэки on_success/on_error вызываются в главном потоке через root.after.
+    database=None - записи выполняет сервер клуба, локальных транзакций нет.
+    """
+
+    def __init__(self, root, read_workers=READ_WORKERS, database=DB):
+        self.root = root
+        self.database = database
+        self.readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="db-read")
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+        self.results = queue.Queue()
+        self.pending = 0
+        self.busy_listeners = []
+
+    def read(self, func, on_success=None, on_error=None):
+        """Ставит в очередь задачу чтения"""
+        self.submit(self.readers, func, on_success, on_error)
+
+    def write(self, func, on_success=None, on_error=None, transaction=True):
+        """Ставит в очередь задачу записи.
+
+        По умолчанию задача выполняется в одной транзакции; задачи, которые
+        сами разбивают работу на транзакции, передают transaction=False.
+        """
+        if transaction and self.database is not None:
+            func = self.atomic(func)
+        self.submit(self.writer, func, on_success, on_error)
+
+    def atomic(self, func):
+        def job():
+            with self.database.atomic():
+                return func()
+        return job
+
+    def submit(self, executor, func, on_success, on_error):
+        # Запросы задачи учитываются за экраном, который ее поставил
+        func = partial(instrumentation.run_in_screen, instrumentation.current_screen(), func)
+        if self.pending == 0:
+            self.notify_busy(True)
+            self.root.after(POLL_INTERVAL, self.poll)
+        self.pending += 1
+        executor.submit(self.run, func, on_success, on_error)
+
+    def run(self, func, on_success, on_error):
+        """Выполняется в фоновом потоке"""
+        try:
+            result = func()
+        except Exception as e:
+            self.results.put((on_error or self.show_error, e))
+        else:
+            self.results.put((on_success, result))
+
+    def poll(self):
+        """Доставляет готовые результаты в главном потоке"""
+        while True:
+            try:
+                callback, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            if callback is not None:
+                try:
+                    callback(value)
+                except tk.TclError:
+                    # Окно, ожидавшее результат, уже закрыто
+                    pass
+                except Exception as e:
+                    self.show_error(e)
+
+        if self.pending > 0:
+            self.root.after(POLL_INTERVAL, self.poll)
+        else:
+            self.notify_busy(False)
+
+    def add_busy_listener(self, listener):
+        """Регистрирует функцию listener(busy), вызываемую при смене состояния"""
+        self.busy_listeners.append(listener)
+
+    def notify_busy(self, busy):
+        for listener in self.busy_listeners:
+            listener(busy)
+
+    def show_error(self, error):
+        messagebox.showerror("Ошибка", f"Ошибка базы данных: {str(error)}")
+
+    def shutdown(self):
+        self.readers.shutdown(wait=False, cancel_futures=True)
+        self.writer.shutdown(wait=True)
+
+_worker = None
+
+def init_worker(root, database=DB):
+    """Создает общий для приложения исполнитель запросов"""
+    global _worker
+    _worker = DBWorker(root, database=database)
+    return _worker
+
+def get_worker():
+    """Возвращает общий исполнитель запросов"""
+    if _worker is None:
+        raise RuntimeError("Исполнитель запросов не инициализирован")
+    return _worker
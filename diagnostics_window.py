@@ -0,0 +1,97 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+import instrumentation
+
+class DiagnosticsWindow:
+    """Окно со счетчиками запросов по экранам и списком медленных запросов"""
+
+    def __init__(self, root):
+        self.window = tk.Toplevel(root)
+        self.window.title("Диагностика запросов")
+        self.window.geometry("1000x600")
+
+        main_frame = tk.Frame(self.window, padx=10, pady=10)
+        main_frame.pack(expand=True, fill=tk.BOTH)
+
+        btn_frame = tk.Frame(main_frame)
+        btn_frame.pack(fill=tk.X, pady=5)
+        tk.Button(btn_frame, text="Обновить", command=self.refresh).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Сбросить", command=self.reset).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Сохранить в файл...", command=self.save).pack(side=tk.LEFT, padx=5)
+        tk.Label(
+            btn_frame,
+            text=f"Порог медленного запроса: {instrumentation.SETTINGS['slow_query_ms']:g} мс",
+            fg="gray"
+        ).pack(side=tk.RIGHT)
+
+        # Счетчики по экранам
+        screens_frame = tk.LabelFrame(main_frame, text="Экраны", padx=5, pady=5)
+        screens_frame.pack(fill=tk.BOTH, expand=True)
+        columns = ("screen", "calls", "queries", "queries_per_call", "rows_per_call", "time_ms", "ms_per_call")
+        self.screens_tree = ttk.Treeview(screens_frame, columns=columns, show="headings")
+        headings = ("Экран", "Обращений", "Запросов", "Запросов/обр.", "Строк/обр.", "Время, мс", "мс/обр.")
+        for column, text in zip(columns, headings):
+            self.screens_tree.heading(column, text=text)
+            self.screens_tree.column(column, width=90, anchor='center')
+        self.screens_tree.column("screen", width=300, anchor='w')
+        self.screens_tree.pack(fill=tk.BOTH, expand=True)
+
+        # Последние медленные запросы
+        slow_frame = tk.LabelFrame(main_frame, text="Медленные запросы", padx=5, pady=5)
+        slow_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.slow_tree = ttk.Treeview(slow_frame, columns=("time_ms", "screen", "sql"), show="headings")
+        self.slow_tree.heading("time_ms", text="мс")
+        self.slow_tree.heading("screen", text="Экран")
+        self.slow_tree.heading("sql", text="SQL")
+        self.slow_tree.column("time_ms", width=70, anchor='center')
+        self.slow_tree.column("screen", width=250)
+        self.slow_tree.column("sql", width=600)
+        self.slow_tree.pack(fill=tk.BOTH, expand=True)
+
+        # Время от запуска приложения до основных событий
+        startup_frame = tk.LabelFrame(main_frame, text="Запуск приложения", padx=5, pady=5)
+        startup_frame.pack(fill=tk.X)
+        self.startup_var = tk.StringVar()
+        tk.Label(startup_frame, textvariable=self.startup_var, justify=tk.LEFT,
+                 font=("Courier", 9)).pack(anchor="w")
+
+        self.refresh()
+
+    def refresh(self):
+        """Перечитывает счетчики"""
+        data = instrumentation.snapshot()
+        self.screens_tree.delete(*self.screens_tree.get_children())
+        screens = sorted(data['screens'].items(), key=lambda item: item[1]['time_ms'], reverse=True)
+        for label, stats in screens:
+            self.screens_tree.insert("", tk.END, values=(
+                label,
+                stats['calls'],
+                stats['queries'],
+                stats['queries_per_call'],
+                stats['rows_per_call'],
+                stats['time_ms'],
+                stats['ms_per_call']
+            ))
+
+        self.slow_tree.delete(*self.slow_tree.get_children())
+        for entry in reversed(data['slow_queries']):
+            self.slow_tree.insert("", tk.END, values=(entry['time_ms'], entry['screen'], entry['sql']))
+
+        self.startup_var.set("\n".join(f"{ms:>9.1f} мс  {name}" for name, ms in data['startup']))
+
+    def reset(self):
+        instrumentation.reset()
+        self.refresh()
+
+    def save(self):
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json")]
+        )
+        if path:
+            try:
+                instrumentation.dump(path)
+                messagebox.showinfo("Успех", "Данные диагностики сохранены", parent=self.window)
+            except OSError as e:
+                messagebox.showerror("Ошибка", f"Не удалось сохранить файл: {str(e)}", parent=self.window)
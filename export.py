@@ -0,0 +1,218 @@
+import csv
+import os
+from peewee import fn, JOIN, Tuple
+from models import Player, Match, PlayerStats, PlayerSeasonTotals, SEASON_START_MONTH, season_label
+from queries import date_range
+from snapshot import reading_database
+
+# Выгрузка статистики в CSV и XLSX. Строки читаются курсором
+# (.tuples().iterator()) и сразу пишутся в файл, поэтому память не растет
+# с объемом истории: в памяти находится одна строка запроса.
+
+# Через сколько строк сообщать о ходе выгрузки
+PROGRESS_STEP = 1000
+# Разделитель CSV: Excel с русской локалью ожидает точку с запятой
+CSV_DELIMITER = ';'
+
+EXPORT_KINDS = {
+    'player_stats': "Статистика игроков по матчам",
+    'matches': "Итоги матчей",
+    'team': "Итоги команды по сезонам",
+}
+FORMATS = ('.csv', '.xlsx')
+# Строк в одной странице выгрузки через сервер клуба
+EXPORT_PAGE_SIZE = 5000
+
+def keyset(query, key, after=None):
+    """Упорядочивает запрос по столбцам key и добавляет их в конец каждой строки.
+
+    after - значения key последней выгруженной строки: выбираются следующие
+    строки. Страница находится по индексу, а не пропуском offset строк, и не
+    теряет и не повторяет строки, если между страницами данные изменились.
+    """
+    query = query.select_extend(*key).order_by(*key)
+    if after is not None:
+        query = query.where(Tuple(*key) > Tuple(*after))
+    return query
+
+def player_stats_query(player_id=None, date_from=None, date_to=None, after=None):
+    """Строки статистики игроков с датой и соперником"""
+    query = (PlayerStats
+             .select(Match.date, Match.opponent, Player.name, Player.jersey_number,
+                     PlayerStats.goals, PlayerStats.assists,
+                     PlayerStats.yellow_cards, PlayerStats.red_cards)
+             .join(Match)
+             .switch(PlayerStats)
+             .join(Player))
+    if player_id is not None:
+        query = query.where(PlayerStats.player == player_id)
+    query = date_range(query, Match.date, date_from, date_to)
+    return keyset(query, (Match.date, Match.id, Player.name, PlayerStats.id), after)
+
+def matches_query(player_id=None, date_from=None, date_to=None, after=None):
+    """Итоги каждого матча по статистике игроков"""
+    query = (Match
+             .select(Match.date, Match.opponent, Match.location, Match.score,
+                     fn.COUNT(PlayerStats.id),
+                     fn.COALESCE(fn.SUM(PlayerStats.goals), 0),
+                     fn.COALESCE(fn.SUM(PlayerStats.assists), 0),
+                     fn.COALESCE(fn.SUM(PlayerStats.yellow_cards), 0),
+                     fn.COALESCE(fn.SUM(PlayerStats.red_cards), 0))
+             .join(PlayerStats, JOIN.LEFT_OUTER)
+             .group_by(Match.id))
+    query = date_range(query, Match.date, date_from, date_to)
+    return keyset(query, (Match.date, Match.id), after)
+
+def team_query(player_id=None, date_from=None, date_to=None, after=None):
+    """Итоги команды по сезонам.
+
+    За все время итоги берутся из таблицы итогов игроков, за период -
+    считаются по статистике матчей этого периода.
+    """
+    if date_from is None and date_to is None:
+        query = (PlayerSeasonTotals
+                 .select(PlayerSeasonTotals.season,
+                         fn.COUNT(PlayerSeasonTotals.player),
+                         fn.SUM(PlayerSeasonTotals.appearances),
+                         fn.SUM(PlayerSeasonTotals.goals),
+                         fn.SUM(PlayerSeasonTotals.assists),
+                         fn.SUM(PlayerSeasonTotals.yellow_cards),
+                         fn.SUM(PlayerSeasonTotals.red_cards))
+                 .group_by(PlayerSeasonTotals.season))
+        return keyset(query, (PlayerSeasonTotals.season,), after)
+
+    # Сезон по дате матча, как в models.season_of
+    season = (fn.strftime('%Y', Match.date).cast('INTEGER')
+              - (fn.strftime('%m', Match.date).cast('INTEGER') < SEASON_START_MONTH))
+    query = (PlayerStats
+             .select(season,
+                     fn.COUNT(PlayerStats.player.distinct()),
+                     fn.COUNT(PlayerStats.id),
+                     fn.SUM(PlayerStats.goals),
+                     fn.SUM(PlayerStats.assists),
+                     fn.SUM(PlayerStats.yellow_cards),
+                     fn.SUM(PlayerStats.red_cards))
+             .join(Match)
+             .group_by(season))
+    query = date_range(query, Match.date, date_from, date_to)
+    return keyset(query, (season,), after)
+
+def team_row(row):
+    return (season_label(row[0]),) + row[1:]
+
+# Вид выгрузки -> (заголовок, запрос, преобразование строки)
+EXPORTS = {
+    'player_stats': (
+        ("Дата", "Соперник", "Игрок", "Номер", "Голы", "Передачи", "ЖК", "КК"),
+        player_stats_query, None
+    ),
+    'matches': (
+        ("Дата", "Соперник", "Место", "Счет", "Игроков", "Голы", "Передачи", "ЖК", "КК"),
+        matches_query, None
+    ),
+    'team': (
+        ("Сезон", "Игроков", "Матчей игроков", "Голы", "Передачи", "ЖК", "КК"),
+        team_query, team_row
+    ),
+}
+
+def export_query(kind, **filters):
+    """Заголовок, запрос и преобразование строк для выгрузки вида kind.
+
+    Последние столбцы строк запроса - ключ упорядочения для keyset, их
+    отрезает split_key.
+    """
+    if kind not in EXPORTS:
+        raise ValueError(f"Неизвестный вид выгрузки: {kind}")
+    header, make_query, convert = EXPORTS[kind]
+    return header, make_query(**filters).bind(reading_database()), convert
+
+def split_key(header, row):
+    """Строка выгрузки и ключ упорядочения из строки запроса"""
+    return row[:len(header)], row[len(header):]
+
+def xlsx_workbook():
+    """Класс Workbook из openpyxl; пакет импортируется только для выгрузки в XLSX"""
+    try:
+        from openpyxl import Workbook
+    except ImportError:  # выгрузка в XLSX доступна только с установленным openpyxl
+        raise ValueError("Для выгрузки в XLSX установите пакет openpyxl")
+    return Workbook
+
+def export_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Неподдерживаемый формат файла: {ext}")
+    if ext == '.xlsx':
+        xlsx_workbook()
+    return ext
+
+def with_progress(rows, total, progress):
+    """Передает строки дальше и каждые PROGRESS_STEP строк вызывает progress(done, total)"""
+    done = 0
+    for row in rows:
+        yield row
+        done += 1
+        if done % PROGRESS_STEP == 0:
+            progress(done, total)
+    progress(done, total)
+
+def write_csv(path, header, rows):
+    # utf-8-sig, чтобы Excel правильно определил кодировку
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f, delimiter=CSV_DELIMITER)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+def write_xlsx(path, header, rows):
+    # В режиме write_only строки сразу сбрасываются на диск
+    workbook = xlsx_workbook()(write_only=True)
+    sheet = workbook.create_sheet("Статистика")
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+WRITERS = {
+    '.csv': write_csv,
+    '.xlsx': write_xlsx,
+}
+
+def write_rows(path, header, rows, total=None, progress=None):
+    """Пишет строки в CSV или XLSX по расширению path; возвращает их количество"""
+    writer = WRITERS[export_format(path)]
+    written = 0
+
+    def report(done, total):
+        nonlocal written
+        written = done
+        if progress is not None:
+            progress(done, total)
+
+    writer(path, header, with_progress(rows, total, report))
+    return written
+
+def export_file(kind, path, progress=None, **filters):
+    """Выгружает данные вида kind в файл path.
+
+    filters - player_id, date_from, date_to. progress(done, total) вызывается
+    из потока выгрузки по мере записи строк.
+    """
+    export_format(path)
+    header, query, convert = export_query(kind, **filters)
+    rows = (split_key(header, row)[0] for row in query.tuples().iterator())
+    if convert is not None:
+        rows = map(convert, rows)
+    return write_rows(path, header, rows, progress=progress)
+
+if __name__ == "__main__":
+    import sys
+    from models import ensure_database
+    ensure_database()
+
+    if len(sys.argv) != 3:
+        print(f"Использование: python export.py {{{'|'.join(EXPORT_KINDS)}}} файл.csv|файл.xlsx")
+        sys.exit(1)
+    count = export_file(sys.argv[1], sys.argv[2],
+                        progress=lambda done, total: print(f"\r{done}", end="", flush=True))
+    print(f"\nВыгружено строк: {count}")
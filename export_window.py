@@ -0,0 +1,131 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from functools import partial
+from export import EXPORT_KINDS
+from backend import get_backend
+from db_worker import get_worker
+from widgets import DateRangeBar
+
+# Как часто окно перечитывает ход выгрузки, мс
+PROGRESS_INTERVAL = 100
+
+class ExportWindow:
+    """Окно выгрузки статистики в CSV/XLSX с индикатором выполнения.
+
+    kinds - доступные виды выгрузки, filters - постоянные условия,
+    например player_id для выгрузки игроком своей статистики.
+    """
+
+    def __init__(self, root, kinds=tuple(EXPORT_KINDS), **filters):
+        self.backend = get_backend()
+        self.worker = get_worker()
+        self.filters = filters
+        # (выгружено, всего) - обновляется потоком выгрузки
+        self.progress = None
+        self.running = False
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Экспорт статистики")
+        self.window.resizable(False, False)
+
+        frame = tk.Frame(self.window, padx=10, pady=10)
+        frame.pack(expand=True, fill=tk.BOTH)
+
+        tk.Label(frame, text="Что выгрузить:").pack(anchor="w")
+        self.kind_var = tk.StringVar(value=kinds[0])
+        for kind in kinds:
+            tk.Radiobutton(frame, text=EXPORT_KINDS[kind], variable=self.kind_var, value=kind).pack(anchor="w")
+
+        # Период по умолчанию - текущий сезон; пустое поле - без ограничения
+        self.period = DateRangeBar(frame)
+        self.period.pack(fill=tk.X, pady=5)
+
+        tk.Label(
+            frame,
+            text="Формат определяется расширением файла: CSV или XLSX.\n"
+                 "Итоги команды выгружаются по сезонам за выбранный период.",
+            justify=tk.LEFT,
+            fg="gray"
+        ).pack(anchor="w", pady=5)
+
+        self.progress_bar = ttk.Progressbar(frame, length=300, mode='determinate')
+        self.progress_bar.pack(fill=tk.X, pady=5)
+        self.status_var = tk.StringVar()
+        tk.Label(frame, textvariable=self.status_var, fg="gray").pack(anchor="w")
+
+        self.export_button = tk.Button(
+            frame,
+            text="Сохранить в файл...",
+            command=self.export,
+            bg="#2196F3",
+            fg="white"
+        )
+        self.export_button.pack(pady=5, fill=tk.X)
+
+    def export(self):
+        """Выгружает данные в выбранный файл в фоновом потоке"""
+        try:
+            period = self.period.filters()
+        except ValueError as e:
+            messagebox.showerror("Ошибка ввода", str(e), parent=self.window)
+            return
+
+        kind = self.kind_var.get()
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".csv",
+            initialfile=f"{kind}.csv",
+            filetypes=[("CSV", "*.csv"), ("Excel", "*.xlsx")]
+        )
+        if not path:
+            return
+
+        self.progress = None
+        self.running = True
+        self.export_button.config(state=tk.DISABLED)
+        self.status_var.set("Выгрузка...")
+        # Число строк заранее не считается: индикатор показывает только ход работы
+        self.progress_bar.config(mode='indeterminate', value=0)
+        self.progress_bar.start(PROGRESS_INTERVAL)
+        self.worker.read(
+            partial(self.backend.export_file, kind, path, progress=self.on_progress,
+                    **period, **self.filters),
+            partial(self.on_exported, path),
+            self.on_export_error
+        )
+        self.poll_progress()
+
+    def on_progress(self, done, total):
+        # Вызывается из потока выгрузки, виджеты обновляет poll_progress
+        self.progress = (done, total)
+
+    def poll_progress(self):
+        if not self.running or not self.window.winfo_exists():
+            return
+        if self.progress is not None:
+            done, total = self.progress
+            if total:
+                self.progress_bar.stop()
+                self.progress_bar.config(mode='determinate', maximum=total, value=done)
+            self.status_var.set(f"Выгружено строк: {done}" + (f" из {total}" if total else ""))
+        self.window.after(PROGRESS_INTERVAL, self.poll_progress)
+
+    def finish(self):
+        self.running = False
+        if self.window.winfo_exists():
+            self.progress_bar.stop()
+            self.progress_bar.config(mode='determinate', value=0)
+            self.export_button.config(state=tk.NORMAL)
+
+    def on_exported(self, path, count):
+        self.finish()
+        if self.window.winfo_exists():
+            self.progress_bar.config(maximum=max(count, 1), value=max(count, 1))
+            self.status_var.set(f"Выгружено строк: {count}")
+        messagebox.showinfo("Экспорт завершен", f"Выгружено строк: {count}\nФайл: {path}")
+
+    def on_export_error(self, error):
+        self.finish()
+        if self.window.winfo_exists():
+            self.status_var.set("")
+        messagebox.showerror("Ошибка", f"Не удалось выгрузить данные: {str(error)}")
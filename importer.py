@@ -0,0 +1,230 @@
+import csv
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from peewee import chunked
+from models import DB, User, Player, Match, Training, PlayerStats, ROLE_COACH
+from match_index import match_index
+
+DATE_FORMAT = '%Y-%m-%d'
+# Строк в одном INSERT и пачек в одной транзакции
+CHUNK_SIZE = 500
+CHUNKS_PER_TRANSACTION = 20
+
+IMPORT_KINDS = {
+    'matches': "Матчи",
+    'trainings': "Тренировки",
+    'stats': "Статистика игроков",
+}
+
+class ImportResult:
+    """Итог импорта: количество добавленных записей и отклоненные строки"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.rejected = []
+
+    def reject(self, line, reason):
+        self.rejected.append((line, reason))
+
+    def summary(self, limit=10):
+        lines = [f"Добавлено записей: {self.inserted}", f"Отклонено строк: {len(self.rejected)}"]
+        for line, reason in self.rejected[:limit]:
+            lines.append(f"  строка {line}: {reason}")
+        if len(self.rejected) > limit:
+            lines.append(f"  ... и еще {len(self.rejected) - limit}")
+        return "\n".join(lines)
+
+def read_rows(path):
+    """Построчно читает CSV, JSON Lines или JSON-массив и возвращает пары (номер строки, словарь)"""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if ext == '.csv':
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            except csv.Error:
+                # Разделитель не определяется, например в файле один столбец
+                dialect = csv.excel
+            reader = csv.DictReader(f, dialect=dialect)
+            for row in reader:
+                yield reader.line_num, row
+        elif ext in ('.jsonl', '.ndjson'):
+            for line_num, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_num, json.loads(line)
+        elif ext == '.json':
+            # Обычный JSON-массив читается целиком, для больших файлов используйте JSON Lines
+            for index, row in enumerate(json.load(f), 1):
+                yield index, row
+        else:
+            raise ValueError(f"Неподдерживаемый формат файла: {ext}")
+
+def text(row, field, required=True):
+    value = str(row.get(field) or '').strip()
+    if required and not value:
+        raise ValueError(f"Не заполнено поле {field}")
+    return value or None
+
+def parse_date(row, field='date'):
+    value = text(row, field)
+    try:
+        return datetime.strptime(value, DATE_FORMAT).date()
+    except ValueError:
+        raise ValueError(f"Неверная дата в поле {field}: {value}")
+
+def parse_count(row, field):
+    value = text(row, field, required=False) or '0'
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"Поле {field} должно быть целым числом")
+    if number < 0:
+        raise ValueError(f"Поле {field} не может быть отрицательным")
+    return number
+
+# Отметка в справочнике матчей: с такими датой и соперником их несколько
+AMBIGUOUS = object()
+
+class KeyResolver:
+    """Поиск тренеров, игроков и матчей по естественному ключу.
+
+    Справочники загружаются одним запросом при первом обращении.
+    """
+
+    def __init__(self):
+        self._coaches = None
+        self._players = None
+        self._matches = None
+
+    def coach(self, username):
+        if self._coaches is None:
+            self._coaches = dict(User
+                                 .select(User.username, User.id)
+                                 .where(User.role == ROLE_COACH)
+                                 .tuples())
+        if username not in self._coaches:
+            raise ValueError(f"Тренер не найден: {username}")
+        return self._coaches[username]
+
+    def player(self, username):
+        if self._players is None:
+            self._players = dict(Player
+                                 .select(User.username, Player.id)
+                                 .join(User)
+                                 .tuples())
+        if username not in self._players:
+            raise ValueError(f"Игрок не найден: {username}")
+        return self._players[username]
+
+    def matches(self):
+        if self._matches is None:
+            self._matches = {}
+            for pk, date, opponent in Match.select(Match.id, Match.date, Match.opponent).tuples():
+                key = (date, opponent)
+                self._matches[key] = AMBIGUOUS if key in self._matches else pk
+        return self._matches
+
+    def match(self, date, opponent):
+        key = (date, opponent)
+        if key not in self.matches():
+            raise ValueError(f"Матч не найден: {date:%Y-%m-%d} - {opponent}")
+        if self.matches()[key] is AMBIGUOUS:
+            raise ValueError(f"Найдено несколько матчей: {date:%Y-%m-%d} - {opponent}")
+        return self.matches()[key]
+
+def parse_match(row, resolver, defaults):
+    data = {
+        'opponent': text(row, 'opponent'),
+        'date': parse_date(row),
+        'location': text(row, 'location'),
+        'score': text(row, 'score', required=False),
+        'notes': text(row, 'notes', required=False),
+    }
+    # Повторный импорт расписания не должен создавать дубликаты матчей
+    key = (data['date'], data['opponent'])
+    if key in resolver.matches():
+        raise ValueError("Матч уже существует")
+    resolver.matches()[key] = None
+    return data
+
+def parse_training(row, resolver, defaults):
+    coach = text(row, 'coach', required=False)
+    data = {
+        'coach': resolver.coach(coach) if coach else defaults.get('coach'),
+        'date': parse_date(row),
+        'duration': parse_count(row, 'duration'),
+        'focus_area': text(row, 'focus_area'),
+        'notes': text(row, 'notes', required=False),
+    }
+    if data['coach'] is None:
+        raise ValueError("Не указан тренер")
+    if data['duration'] <= 0:
+        raise ValueError("Длительность должна быть положительным числом")
+    return data
+
+def parse_stats(row, resolver, defaults):
+    return {
+        'player': resolver.player(text(row, 'player')),
+        'match': resolver.match(parse_date(row, 'match_date'), text(row, 'opponent')),
+        'goals': parse_count(row, 'goals'),
+        'assists': parse_count(row, 'assists'),
+        'yellow_cards': parse_count(row, 'yellow_cards'),
+        'red_cards': parse_count(row, 'red_cards'),
+    }
+
+IMPORTERS = {
+    'matches': (Match, parse_match),
+    'trainings': (Training, parse_training),
+    'stats': (PlayerStats, parse_stats),
+}
+
+def valid_rows(rows, parse, result, resolver, defaults):
+    """Возвращает проверенные строки, отклоненные записывает в result"""
+    for line, row in rows:
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("Ожидался объект с полями")
+            yield parse(row, resolver, defaults)
+        except ValueError as e:
+            result.reject(line, str(e))
+
+def insert_chunks(model, rows):
+    """Вставляет строки пачками insert_many, по нескольку пачек в транзакции"""
+    inserted = 0
+    chunks = chunked(rows, CHUNK_SIZE)
+    while True:
+        batch = list(islice(chunks, CHUNKS_PER_TRANSACTION))
+        if not batch:
+            return inserted
+        with DB.atomic():
+            for chunk in batch:
+                model.insert_many(chunk).execute()
+                inserted += len(chunk)
+
+def import_file(kind, path, **defaults):
+    """Импортирует файл с данными вида kind (matches, trainings, stats).
+
+    defaults - значения по умолчанию, например coach для тренировок.
+    """
+    if kind not in IMPORTERS:
+        raise ValueError(f"Неизвестный вид данных: {kind}")
+    model, parse = IMPORTERS[kind]
+    result = ImportResult()
+    rows = valid_rows(read_rows(path), parse, result, KeyResolver(), defaults)
+    result.inserted = insert_chunks(model, rows)
+    if model is Match and result.inserted:
+        match_index.invalidate()
+    return result
+
+if __name__ == "__main__":
+    import sys
+    from models import ensure_database
+    ensure_database()
+
+    if len(sys.argv) != 3 or sys.argv[1] not in IMPORTERS:
+        print(f"Использование: python importer.py {{{'|'.join(IMPORTERS)}}} файл.csv|.json|.jsonl")
+        sys.exit(1)
+    print(import_file(sys.argv[1], sys.argv[2]).summary(limit=100))
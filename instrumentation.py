@@ -0,0 +1,231 @@
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from peewee import SqliteDatabase
+from settings import load_section, boolean
+import startup
+
+# Настройки диагностики (раздел [diagnostics] в fclub.ini)
+DIAGNOSTICS_OPTIONS = {
+    'enabled': ('on', boolean),
+    'slow_query_ms': ('100', float),
+    'slow_query_log': ('slow_queries.log', str),
+    'startup_log': ('startup.log', str),
+}
+SETTINGS = load_section('diagnostics', DIAGNOSTICS_OPTIONS)[0]
+
+# Модули, кадры которых пропускаются при поиске вызвавшего запрос экрана
+INFRASTRUCTURE_MODULES = ('peewee', 'instrumentation', 'db_worker', 'widgets',
+                          'threading', 'concurrent', 'queue', 'tkinter', 'functools',
+                          'importlib', '_frozen_importlib', '_frozen_importlib_external')
+UNKNOWN_SCREEN = "<неизвестно>"
+# Сколько последних медленных запросов хранить для окна диагностики
+SLOW_QUERIES_KEPT = 100
+
+class ScreenStats:
+    """Счетчики запросов одного экрана (метода интерфейса)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.queries = 0
+        self.rows = 0
+        self.seconds = 0.0
+
+    def as_dict(self):
+        calls = max(self.calls, 1)
+        return {
+            'calls': self.calls,
+            'queries': self.queries,
+            'rows': self.rows,
+            'time_ms': round(self.seconds * 1000, 3),
+            'queries_per_call': round(self.queries / calls, 2),
+            'rows_per_call': round(self.rows / calls, 2),
+            'ms_per_call': round(self.seconds * 1000 / calls, 3),
+        }
+
+_lock = threading.Lock()
+_stats = {}
+_slow_queries = []
+_local = threading.local()
+_slow_log = None
+
+def _screen_stats(label):
+    if label not in _stats:
+        _stats[label] = ScreenStats()
+    return _stats[label]
+
+def _is_infrastructure(frame):
+    module = frame.f_globals.get('__name__', '')
+    return module.split('.')[0] in INFRASTRUCTURE_MODULES
+
+def caller_screen():
+    """Определяет по стеку вызовов метод интерфейса, выполняющий запрос"""
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        if not _is_infrastructure(frame):
+            owner = frame.f_locals.get('self')
+            if owner is not None:
+                return f"{type(owner).__name__}.{frame.f_code.co_name}"
+            if fallback is None:
+                fallback = f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback or UNKNOWN_SCREEN
+
+def current_screen():
+    """Экран, к которому относятся запросы текущего потока"""
+    return getattr(_local, 'screen', None) or caller_screen()
+
+def explicit_screen():
+    """Экран, заданный блоком screen(), или None - стек вызовов не просматривается"""
+    return getattr(_local, 'screen', None)
+
+@contextmanager
+def screen(label):
+    """Относит все запросы внутри блока к экрану label"""
+    previous = getattr(_local, 'screen', None)
+    _local.screen = label
+    try:
+        yield
+    finally:
+        _local.screen = previous
+
+def run_in_screen(label, func):
+    """Выполняет задачу как одно обращение экрана label к БД"""
+    with _lock:
+        _screen_stats(label).calls += 1
+    with screen(label):
+        return func()
+
+def slow_log():
+    global _slow_log
+    if _slow_log is None:
+        _slow_log = logging.getLogger('fclub.slow_queries')
+        _slow_log.setLevel(logging.INFO)
+        _slow_log.propagate = False
+        handler = logging.FileHandler(SETTINGS['slow_query_log'], encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        _slow_log.addHandler(handler)
+    return _slow_log
+
+def log_startup():
+    """Дописывает отметки времени запуска в журнал запусков"""
+    with open(SETTINGS['startup_log'], 'a', encoding='utf-8') as f:
+        f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} запуск приложения\n{startup.report()}\n")
+
+def record_query(label, sql, params, seconds):
+    """Учитывает выполненный запрос и возвращает экран, к которому он отнесен.
+
+    Без экрана, заданного блоком screen(), стек вызовов просматривается
+    только для медленного запроса; остальные относятся к UNKNOWN_SCREEN.
+    """
+    milliseconds = seconds * 1000
+    slow = milliseconds >= SETTINGS['slow_query_ms']
+    if label is None:
+        label = caller_screen() if slow else UNKNOWN_SCREEN
+    with _lock:
+        stats = _screen_stats(label)
+        stats.queries += 1
+        stats.seconds += seconds
+
+    if slow:
+        entry = {'screen': label, 'time_ms': round(milliseconds, 3), 'sql': sql, 'params': repr(params)}
+        with _lock:
+            _slow_queries.append(entry)
+            del _slow_queries[:-SLOW_QUERIES_KEPT]
+        slow_log().info("%.1f мс [%s] %s %r", milliseconds, label, sql, params)
+    return label
+
+def record_fetch(label, rows, seconds):
+    with _lock:
+        stats = _screen_stats(label)
+        stats.rows += rows
+        stats.seconds += seconds
+
+class CountingCursor:
+    """Обертка курсора, считающая прочитанные строки и время выборки.
+
+    Строки, читаемые по одной, копятся в самом курсоре и попадают в
+    счетчики одним вызовом, когда курсор исчерпан или закрыт: чтение строки
+    не берет общую блокировку и не замеряет время. Время выборки
+    учитывается для fetchmany и fetchall - по одному замеру на пачку.
+    """
+
+    def __init__(self, cursor, label):
+        self._cursor = cursor
+        self._label = label
+        self._rows = 0
+
+    def _flush(self):
+        if self._rows:
+            record_fetch(self._label, self._rows, 0.0)
+            self._rows = 0
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is None:
+            self._flush()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(*args)
+        record_fetch(self._label, len(rows), time.perf_counter() - start)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        record_fetch(self._label, len(rows), time.perf_counter() - start)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._flush()
+        self._cursor.close()
+
+    def __del__(self):
+        # Курсор, брошенный до конца выборки
+        self._flush()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class InstrumentedSqliteDatabase(SqliteDatabase):
+    """SqliteDatabase, записывающая длительность каждого запроса и вызвавший его экран"""
+
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        if not SETTINGS['enabled']:
+            return super().execute_sql(sql, params, *args, **kwargs)
+
+        start = time.perf_counter()
+        cursor = super().execute_sql(sql, params, *args, **kwargs)
+        label = record_query(explicit_screen(), sql, params, time.perf_counter() - start)
+        return CountingCursor(cursor, label)
+
+def snapshot():
+    """Текущие счетчики по экранам и последние медленные запросы"""
+    with _lock:
+        return {
+            'screens': {label: stats.as_dict() for label, stats in _stats.items()},
+            'slow_queries': list(_slow_queries),
+            'startup': startup.marks(),
+        }
+
+def reset():
+    """Обнуляет счетчики"""
+    with _lock:
+        _stats.clear()
+        _slow_queries.clear()
+
+def dump(path):
+    """Сохраняет счетчики и медленные запросы в JSON-файл"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot(), f, ensure_ascii=False, indent=2)
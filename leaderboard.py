@@ -0,0 +1,116 @@
+import threading
+from peewee import fn
+from models import DB, Player, Match, PlayerStats, StatsRevision
+from snapshot import reading_database
+
+# Желтых карточек, после которых игрок пропускает матч
+YELLOW_CARDS_FOR_SUSPENSION = 5
+# Сколько разных выборок (диапазонов дат) хранится в кэше
+CACHE_SIZE = 32
+
+# Любое изменение данных, влияющих на таблицу лидеров, увеличивает счетчик
+# stats_revision. Кэш сверяет счетчик одним запросом к таблице из одной строки
+# и пересчитывает результат, только если статистика изменилась, в том числе
+# из другого процесса или через сервер клуба.
+BUMP_REVISION = "UPDATE stats_revision SET revision = revision + 1;"
+
+REVISION_TRIGGERS = {
+    "player_stats_revision_insert": "AFTER INSERT ON player_stats",
+    "player_stats_revision_update": "AFTER UPDATE ON player_stats",
+    "player_stats_revision_delete": "AFTER DELETE ON player_stats",
+    "matches_revision_update": "AFTER UPDATE OF date ON matches",
+    "players_revision_update": "AFTER UPDATE OF name, jersey_number ON players",
+}
+
+def create_revision_triggers(db=DB):
+    """Создает таблицу счетчика и триггеры, увеличивающие его"""
+    db.create_tables([StatsRevision], safe=True)
+    if not StatsRevision.select().exists():
+        StatsRevision.create(revision=0)
+    for name, event in REVISION_TRIGGERS.items():
+        db.execute_sql(f'CREATE TRIGGER IF NOT EXISTS "{name}" {event} BEGIN {BUMP_REVISION} END')
+
+def current_revision():
+    # Счетчик читается из той же БД, что и сама таблица лидеров
+    return StatsRevision.select(StatsRevision.revision).bind(reading_database()).scalar()
+
+class LeaderboardCache:
+    """Результаты таблицы лидеров для одной версии статистики"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revision = None
+        self._results = {}
+
+    def get(self, key, revision):
+        with self._lock:
+            if revision != self._revision:
+                self._results.clear()
+                self._revision = revision
+            return self._results.get(key)
+
+    def put(self, key, revision, rows):
+        with self._lock:
+            if revision != self._revision:
+                return
+            self._results[key] = rows
+            if len(self._results) > CACHE_SIZE:
+                del self._results[next(iter(self._results))]
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._revision = None
+
+cache = LeaderboardCache()
+
+def query_leaderboard(date_from=None, date_to=None):
+    """Итоги всех игроков за период с местами по голам, передачам и карточкам"""
+    appearances = fn.COUNT(PlayerStats.id)
+    goals = fn.SUM(PlayerStats.goals)
+    assists = fn.SUM(PlayerStats.assists)
+    yellow_cards = fn.SUM(PlayerStats.yellow_cards)
+    red_cards = fn.SUM(PlayerStats.red_cards)
+
+    query = (PlayerStats
+             .select(
+                 Player.id.alias('player_id'),
+                 Player.name,
+                 Player.jersey_number,
+                 appearances.alias('appearances'),
+                 goals.alias('goals'),
+                 assists.alias('assists'),
+                 yellow_cards.alias('yellow_cards'),
+                 red_cards.alias('red_cards'),
+                 fn.RANK().over(order_by=[goals.desc()]).alias('goals_rank'),
+                 fn.RANK().over(order_by=[assists.desc()]).alias('assists_rank'),
+                 fn.RANK().over(order_by=[yellow_cards.desc(), red_cards.desc()]).alias('cards_rank'))
+             .join(Player))
+
+    # Без фильтра по датам соединение с матчами не нужно
+    if date_from is not None or date_to is not None:
+        query = query.switch(PlayerStats).join(Match)
+        if date_from is not None:
+            query = query.where(Match.date >= date_from)
+        if date_to is not None:
+            query = query.where(Match.date <= date_to)
+
+    return list(query
+                .group_by(Player.id)
+                .order_by(goals.desc(), assists.desc(), Player.name)
+                .bind(reading_database())
+                .namedtuples())
+
+def leaderboard(date_from=None, date_to=None):
+    """Таблица лидеров за период; повторные вызовы без изменений статистики не выполняют подсчет"""
+    key = (date_from, date_to)
+    revision = current_revision()
+    rows = cache.get(key, revision)
+    if rows is None:
+        rows = query_leaderboard(date_from, date_to)
+        cache.put(key, revision, rows)
+    return rows
+
+def cards_to_suspension(yellow_cards):
+    """Сколько желтых карточек осталось до пропуска матча"""
+    return YELLOW_CARDS_FOR_SUSPENSION - yellow_cards % YELLOW_CARDS_FOR_SUSPENSION
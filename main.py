@@ -1,11 +1,14 @@
+import startup  # первым: отсчет времени запуска
 import tkinter as tk
 from tkinter import messagebox
 from functools import partial
-from models import ROLE_PLAYER, ROLE_COACH, ROLE_ADMIN, User
-from commands import register_user, authenticate_user
-from player_interface import PlayerInterface
-from coach_interface import CoachInterface
-from admin_interface import AdminInterface
+from models import ROLE_PLAYER, ROLE_COACH, ROLE_ADMIN
+from backend import get_backend
+from db_worker import init_worker, get_worker
+import instrumentation
+
+# Интерфейсы ролей и окно диагностики импортируются при первом открытии,
+# чтобы окно входа появлялось без загрузки всех экранов приложения.
 
 class AuthWindow:
     def __init__(self, root, on_auth_success):
@@ -32,7 +35,8 @@ class AuthWindow:
         btn_frame = tk.Frame(frame)
         btn_frame.grid(row=2, columnspan=2, pady=10)
         
-        tk.Button(btn_frame, text="Войти", command=self.login).pack(side=tk.LEFT, padx=5)
+        self.login_button = tk.Button(btn_frame, text="Войти", command=self.login)
+        self.login_button.pack(side=tk.LEFT, padx=5)
         tk.Button(btn_frame, text="Регистрация", command=self.register).pack(side=tk.LEFT, padx=5)
         
         self.center_window(self.auth_window)
@@ -53,14 +57,26 @@ class AuthWindow:
             messagebox.showerror("Ошибка", "Введите логин и пароль")
             return
             
-        success, message, role = authenticate_user(username, password)
-        
+        # Вход выполняется в фоне: БД может еще готовиться, а сервер - отвечать долго
+        self.login_button.config(state=tk.DISABLED)
+        get_worker().read(
+            partial(get_backend().authenticate_user, username, password),
+            self.on_login_result,
+            self.on_login_error
+        )
+
+    def on_login_result(self, result):
+        success, message, session = result
         if success:
-            user = User.get(User.username == username)
-            self.on_auth_success(username, role, user.id)
+            self.on_auth_success(session)
             self.auth_window.destroy()
         else:
+            self.login_button.config(state=tk.NORMAL)
             messagebox.showerror("Ошибка", message)
+
+    def on_login_error(self, error):
+        self.login_button.config(state=tk.NORMAL)
+        messagebox.showerror("Ошибка", f"Не удалось выполнить вход: {str(error)}")
     
     def register(self):
         reg_window = tk.Toplevel(self.auth_window)
@@ -116,13 +132,17 @@ class AuthWindow:
             messagebox.showerror("Ошибка", "Пароли не совпадают")
             return
             
-        success, message = register_user(
-            self.username.get(),
-            email.get(),
-            self.password.get(),
-            role_var.get()
+        # register_user сам выполняет проверку и вставку в одной транзакции
+        get_worker().write(
+            partial(get_backend().register_user, self.username.get(), email.get(),
+                    self.password.get(), role_var.get()),
+            partial(self.on_register_result, window),
+            lambda e: messagebox.showerror("Ошибка", f"Не удалось зарегистрироваться: {str(e)}"),
+            transaction=False
         )
-        
+
+    def on_register_result(self, window, result):
+        success, message = result
         if success:
             messagebox.showinfo("Успех", message)
             window.destroy()
@@ -134,9 +154,7 @@ class MainApp:
         self.root = root
         self.root.title("Футбольный клуб - Главное меню")
         self.root.geometry("1200x800")
-        self.current_user = None
-        self.user_role = None
-        self.user_id = None
+        self.session = None
         
         self.create_menu()
         
@@ -146,6 +164,13 @@ class MainApp:
                             relief=tk.SUNKEN, anchor=tk.W, padx=5)
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
+        # Индикатор выполнения запросов к БД
+        self.busy_var = tk.StringVar()
+        tk.Label(status_bar, textvariable=self.busy_var, fg="gray").pack(side=tk.RIGHT)
+        self.backend = get_backend()
+        self.worker = init_worker(root, database=self.backend.database)
+        self.worker.add_busy_listener(self.on_busy)
+        
         self.main_frame = tk.Frame(root)
         self.main_frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
         
@@ -155,6 +180,8 @@ class MainApp:
         menubar = tk.Menu(self.root)
         
         file_menu = tk.Menu(menubar, tearoff=0)
+        file_menu.add_command(label="Диагностика запросов", command=self.show_diagnostics)
+        file_menu.add_separator()
         file_menu.add_command(label="Выход", command=self.root.quit)
         menubar.add_cascade(label="Файл", menu=file_menu)
         
@@ -167,11 +194,23 @@ class MainApp:
     def show_auth_window(self):
         self.root.withdraw()
         AuthWindow(self.root, self.on_auth_success)
+        self.root.after_idle(self.on_auth_window_shown)
+
+    def on_auth_window_shown(self):
+        """Пока пользователь вводит логин, БД подготавливается в фоне"""
+        startup.mark("окно входа показано")
+        self.worker.read(self.backend.prepare, self.on_database_ready, self.on_database_error)
+
+    def on_database_ready(self, _):
+        startup.mark("БД готова")
+        instrumentation.log_startup()
+
+    def on_database_error(self, error):
+        messagebox.showerror("Ошибка", f"Не удалось открыть базу данных: {str(error)}")
     
-    def on_auth_success(self, username, role, user_id):
-        self.current_user = username
-        self.user_role = role
-        self.user_id = user_id
+    def on_auth_success(self, session):
+        self.session = session
+        role = session.role
         self.root.deiconify()
         
         role_names = {
@@ -179,23 +218,42 @@ class MainApp:
             ROLE_COACH: "Тренер", 
             ROLE_PLAYER: "Игрок"
         }
-        self.status_var.set(f"Авторизован: {username} ({role_names.get(role, 'Неизвестная роль')})")
+        status = f"Авторизован: {session.username} ({role_names.get(role, 'Неизвестная роль')})"
+        if self.backend.remote:
+            status += f" - сервер {self.backend.url}"
+        self.status_var.set(status)
         
         for widget in self.main_frame.winfo_children():
             widget.destroy()
         
         if role == ROLE_ADMIN:
-            AdminInterface(self.main_frame, user_id)
+            from admin_interface import AdminInterface
+            AdminInterface(self.main_frame, session)
         elif role == ROLE_COACH:
-            CoachInterface(self.main_frame, user_id)
+            from coach_interface import CoachInterface
+            CoachInterface(self.main_frame, session)
         else:
-            PlayerInterface(self.main_frame, user_id)
+            from player_interface import PlayerInterface
+            PlayerInterface(self.main_frame, session)
+        startup.mark("интерфейс пользователя открыт")
+    
+    def show_diagnostics(self):
+        from diagnostics_window import DiagnosticsWindow
+        DiagnosticsWindow(self.root)
+    
+    def on_busy(self, busy):
+        """Показывает, что выполняется запрос к БД"""
+        self.busy_var.set("Загрузка..." if busy else "")
+        self.root.config(cursor="watch" if busy else "")
     
     def show_about(self):
         messagebox.showinfo("О программе", 
                           "Приложение футбольного клуба\nВерсия 3.0\n\n2023")
 
 if __name__ == "__main__":
+    startup.mark("модули загружены")
     root = tk.Tk()
     app = MainApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.backend.logout()
+    app.worker.shutdown()
\ No newline at end of file
@@ -0,0 +1,68 @@
+import threading
+from models import Match
+
+class MatchIndex:
+    """Общий для всех окон индекс матчей для выпадающих списков.
+
+    Хранит подписи матчей (новые сверху) и соответствие подпись -> id матча.
+    Строится одним запросом и перестраивается только после invalidate().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._labels = []
+        self._ids = {}
+        self._stale = True
+        # Увеличивается при каждом invalidate(), чтобы не потерять сброс во время перестройки
+        self._version = 0
+
+    @staticmethod
+    def make_label(date, opponent, location):
+        return f"{date.strftime('%Y-%m-%d')} - {opponent} ({location})"
+
+    def labels(self):
+        """Возвращает подписи матчей, при необходимости перестраивая индекс"""
+        with self._lock:
+            if not self._stale:
+                return list(self._labels)
+            version = self._version
+
+        # Внутри одной даты матчи идут по возрастанию id: у первого матча
+        # подпись без номера, поэтому подписи не меняют смысл при добавлении дублей
+        rows = (Match
+                .select(Match.id, Match.date, Match.opponent, Match.location)
+                .order_by(Match.date.desc(), Match.id.asc())
+                .tuples())
+        labels, ids = [], {}
+        for match_id, date, opponent, location in rows:
+            label = self.make_label(date, opponent, location)
+            # Матчи с одинаковыми датой и соперником различаются по номеру
+            if label in ids:
+                label = f"{label} #{match_id}"
+            labels.append(label)
+            ids[label] = match_id
+
+        with self._lock:
+            self._labels, self._ids = labels, ids
+            self._stale = self._version != version
+        return list(labels)
+
+    def cached_labels(self):
+        """Подписи без обращения к БД или None, если индекс нужно перестроить"""
+        with self._lock:
+            return None if self._stale else list(self._labels)
+
+    def match_id(self, label):
+        """id матча по подписи из выпадающего списка"""
+        with self._lock:
+            if label not in self._ids:
+                raise Match.DoesNotExist(label)
+            return self._ids[label]
+
+    def invalidate(self):
+        """Помечает индекс устаревшим; известные подписи остаются действительными"""
+        with self._lock:
+            self._stale = True
+            self._version += 1
+
+match_index = MatchIndex()
@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+from models import DB, SchemaVersion, Player, Training, PlayerStats, PlayerSeasonTotals
+from peewee import fn, ForeignKeyField, IntegrityError
+from totals import create_totals_triggers, drop_totals_triggers, rebuild_season_totals
+from leaderboard import create_revision_triggers
+from search import create_search_index
+
+# Упорядоченный список шагов миграции: (версия, описание, функция, внешние ключи)
+MIGRATIONS = []
+
+def migration(version, description, foreign_keys=True):
+    """Регистрирует функцию как шаг миграции с указанной версией.
+
+    foreign_keys=False - шаг перестраивает таблицы и выполняется с отключенной
+    проверкой внешних ключей; целостность проверяется перед фиксацией.
+    """
+    def decorator(func):
+        MIGRATIONS.append((version, description, func, foreign_keys))
+        MIGRATIONS.sort(key=lambda step: step[0])
+        return func
+    return decorator
+
+def current_version():
+    """Возвращает номер последней применённой миграции (0, если миграций не было)"""
+    DB.create_tables([SchemaVersion], safe=True)
+    return SchemaVersion.select(fn.MAX(SchemaVersion.version)).scalar() or 0
+
+@contextmanager
+def foreign_keys_disabled(db):
+    """Отключает проверку внешних ключей; PRAGMA действует только вне транзакции"""
+    enabled = db.foreign_keys
+    db.foreign_keys = 0
+    try:
+        yield
+    finally:
+        db.foreign_keys = enabled
+
+def check_foreign_keys(db):
+    violations = db.execute_sql('PRAGMA foreign_key_check').fetchall()
+    if violations:
+        table, rowid, parent, _ = violations[0]
+        raise IntegrityError(
+            f"Нарушение внешнего ключа после миграции: {table} (rowid {rowid}) -> {parent}, "
+            f"всего нарушений: {len(violations)}"
+        )
+
+def run_migrations():
+    """Применяет по порядку все миграции новее текущей версии схемы"""
+    applied = []
+    version = current_version()
+    for step_version, description, func, foreign_keys in MIGRATIONS:
+        if step_version <= version:
+            continue
+        if foreign_keys:
+            with DB.atomic():
+                func(DB)
+                SchemaVersion.create(version=step_version, description=description)
+        else:
+            with foreign_keys_disabled(DB), DB.atomic():
+                func(DB)
+                check_foreign_keys(DB)
+                SchemaVersion.create(version=step_version, description=description)
+        applied.append((step_version, description))
+    return applied
+
+def rebuild_table(db, model):
+    """Пересоздает таблицу по текущему описанию модели, сохраняя данные и индексы.
+
+    SQLite не позволяет изменить внешние ключи существующей таблицы, поэтому
+    создается новая таблица, в нее копируются строки, старая удаляется, а новая
+    переименовывается. Строки, ссылающиеся на удаленные записи, не копируются.
+    """
+    table = model._meta.table_name
+    new_table = f"{table}__new"
+    indexes = db.execute_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    ).fetchall()
+
+    create_sql, params = model._schema._create_table(safe=False).query()
+    db.execute_sql(create_sql.replace(f'"{table}"', f'"{new_table}"', 1), params)
+
+    columns = ", ".join(f'"{field.column_name}"' for field in model._meta.sorted_fields)
+    references = [
+        f'"{field.column_name}" IN (SELECT "{field.rel_field.column_name}" '
+        f'FROM "{field.rel_model._meta.table_name}")'
+        for field in model._meta.sorted_fields if isinstance(field, ForeignKeyField)
+    ]
+    where = f" WHERE {' AND '.join(references)}" if references else ""
+    db.execute_sql(f'INSERT INTO "{new_table}" ({columns}) SELECT {columns} FROM "{table}"{where}')
+
+    db.execute_sql(f'DROP TABLE "{table}"')
+    db.execute_sql(f'ALTER TABLE "{new_table}" RENAME TO "{table}"')
+    for (sql,) in indexes:
+        db.execute_sql(sql)
+
+def table_sql(db, table):
+    row = db.execute_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    return row[0] if row else ""
+
+# Индексы создаются с теми же именами, что и у peewee при create_tables,
+# поэтому для новой базы миграции ничего не меняют.
+
+@migration(1, "Индексы по дате матчей и тренировок")
+def add_date_indexes(db):
+    db.execute_sql('CREATE INDEX IF NOT EXISTS "match_date" ON "matches" ("date")')
+    db.execute_sql('CREATE INDEX IF NOT EXISTS "training_date" ON "trainings" ("date")')
+
+@migration(2, "Индекс по роли пользователя")
+def add_user_role_index(db):
+    db.execute_sql('CREATE INDEX IF NOT EXISTS "user_role" ON "users" ("role")')
+
+@migration(3, "Составной индекс статистики по игроку и матчу")
+def add_player_stats_index(db):
+    db.execute_sql(
+        'CREATE INDEX IF NOT EXISTS "playerstats_player_id_match_id" '
+        'ON "player_stats" ("player_id", "match_id")'
+    )
+
+@migration(4, "Итоги игроков по сезонам")
+def add_player_season_totals(db):
+    db.create_tables([PlayerSeasonTotals], safe=True)
+    create_totals_triggers(db)
+    rebuild_season_totals(db)
+
+@migration(5, "Каскадное удаление зависимых записей", foreign_keys=False)
+def add_cascade_deletes(db):
+    # Триггеры итогов ссылаются на перестраиваемые таблицы, поэтому
+    # удаляются на время перестройки и создаются заново
+    drop_totals_triggers(db)
+    # Родительские таблицы перестраиваются раньше дочерних, чтобы
+    # строки удаленных игроков не попали в статистику
+    for model in (Player, Training, PlayerStats, PlayerSeasonTotals):
+        if 'ON DELETE CASCADE' not in table_sql(db, model._meta.table_name):
+            rebuild_table(db, model)
+    create_totals_triggers(db)
+    rebuild_season_totals(db)
+
+@migration(6, "Счетчик изменений статистики для кэша таблицы лидеров")
+def add_stats_revision(db):
+    create_revision_triggers(db)
+
+@migration(7, "Полнотекстовый поиск по тренировкам и матчам")
+def add_search_index(db):
+    create_search_index(db)
+
+@migration(8, "Удаление индекса статистики по игроку, покрытого составным")
+def drop_player_stats_player_index(db):
+    db.execute_sql('DROP INDEX IF EXISTS "playerstats_player_id"')
+
+if __name__ == "__main__":
+    with DB:
+        for version, description in run_migrations():
+            print(f"Применена миграция {version}: {description}")
+        print(f"Текущая версия схемы: {current_version()}")
@@ -1,13 +1,64 @@
+import threading
+from pathlib import Path
 from peewee import *
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from settings import load_database_settings, database_pragmas
+from instrumentation import InstrumentedSqliteDatabase
 
-DB = SqliteDatabase('sqlitedb.db')
+# Путь к файлу и PRAGMA задаются в fclub.ini или переменными окружения (см. settings.py)
+DATABASE_SETTINGS = load_database_settings()
+# Каждый запрос учитывается в счетчиках диагностики (см. instrumentation.py)
+DB = InstrumentedSqliteDatabase(DATABASE_SETTINGS['path'], pragmas=database_pragmas(DATABASE_SETTINGS))
 
 # Константы для ролей
 ROLE_ADMIN = 'admin'
 ROLE_COACH = 'coach'
 ROLE_PLAYER = 'player'
 
+# Месяц, с которого начинается новый сезон
+SEASON_START_MONTH = 7
+
+def season_of(date):
+    """Возвращает сезон (год его начала), к которому относится дата"""
+    return date.year if date.month >= SEASON_START_MONTH else date.year - 1
+
+def season_label(season):
+    """Название сезона вида 2024/25"""
+    return f"{season}/{(season + 1) % 100:02d}"
+
+def season_range(season):
+    """Первый и последний день сезона"""
+    return date(season, SEASON_START_MONTH, 1), date(season + 1, SEASON_START_MONTH, 1) - timedelta(days=1)
+
+# PRAGMA, допустимые для подключения только на чтение: не меняют файл БД
+READ_ONLY_PRAGMAS = ('cache_size', 'mmap_size', 'busy_timeout')
+
+def configure_database(path, read_only=False):
+    """Переключает подключение на другой файл БД с теми же PRAGMA.
+
+    read_only=True открывает файл через URI с mode=ro: запись в такое
+    подключение невозможна, а БД считается уже подготовленной.
+    """
+    global _bootstrapped
+    if not DB.is_closed():
+        DB.close()
+    if read_only:
+        pragmas = {name: value for name, value in database_pragmas(DATABASE_SETTINGS).items()
+                   if name in READ_ONLY_PRAGMAS}
+        pragmas['query_only'] = 1
+        DB.init(f"{Path(path).absolute().as_uri()}?mode=ro", uri=True, pragmas=pragmas)
+    else:
+        DB.init(path, pragmas=database_pragmas(DATABASE_SETTINGS))
+    _bootstrapped = read_only
+    # Записи из кэша и снимок для отчетов относятся к прежнему файлу
+    import cache
+    import snapshot
+    cache.clear()
+    snapshot.reset()
+
+# Зависимые записи (игрок, тренировки, статистика, итоги) удаляются
+# вместе с пользователем, игроком или матчем через ON DELETE CASCADE
+
 class BaseModel(Model):
     class Meta:
         database = DB
@@ -16,14 +67,14 @@ class User(BaseModel):
     username = CharField(unique=True)
     password = CharField()
     email = CharField(null=True)
-    role = CharField(default=ROLE_PLAYER)
+    role = CharField(default=ROLE_PLAYER, index=True)
 
     class Meta:
         table_name = 'users'
 
 class Player(BaseModel):
     id = AutoField()
-    user = ForeignKeyField(User, unique=True)
+    user = ForeignKeyField(User, unique=True, on_delete='CASCADE')
     name = CharField()
     position = CharField()
     jersey_number = IntegerField()
@@ -34,8 +85,8 @@ class Player(BaseModel):
 
 class Training(BaseModel):
     id = AutoField()
-    coach = ForeignKeyField(User)
-    date = DateField()
+    coach = ForeignKeyField(User, on_delete='CASCADE')
+    date = DateField(index=True)
     duration = IntegerField()  # в минутах
     focus_area = CharField()
     notes = TextField(null=True)
@@ -46,7 +97,7 @@ class Training(BaseModel):
 class Match(BaseModel):
     id = AutoField()
     opponent = CharField()
-    date = DateField()
+    date = DateField(index=True)
     location = CharField()
     score = CharField(null=True)
     notes = TextField(null=True)
@@ -56,8 +107,9 @@ class Match(BaseModel):
 
 class PlayerStats(BaseModel):
     id = AutoField()
-    player = ForeignKeyField(Player, backref='stats')
-    match = ForeignKeyField(Match, backref='player_stats')
+    # Отдельный индекс по игроку не нужен: его покрывает составной (player, match)
+    player = ForeignKeyField(Player, backref='stats', on_delete='CASCADE', index=False)
+    match = ForeignKeyField(Match, backref='player_stats', on_delete='CASCADE')
     goals = IntegerField(default=0)
     assists = IntegerField(default=0)
     yellow_cards = IntegerField(default=0)
@@ -65,10 +117,43 @@ class PlayerStats(BaseModel):
 
     class Meta:
         table_name = 'player_stats'
+        indexes = (
+            (('player', 'match'), False),
+        )
+
+class PlayerSeasonTotals(BaseModel):
+    """Итоги игрока за сезон, поддерживаются триггерами на player_stats"""
+    player = ForeignKeyField(Player, backref='season_totals', on_delete='CASCADE')
+    season = IntegerField()
+    appearances = IntegerField(default=0)
+    goals = IntegerField(default=0)
+    assists = IntegerField(default=0)
+    yellow_cards = IntegerField(default=0)
+    red_cards = IntegerField(default=0)
+
+    class Meta:
+        table_name = 'player_season_totals'
+        primary_key = CompositeKey('player', 'season')
+
+class StatsRevision(BaseModel):
+    """Счетчик изменений статистики; увеличивается триггерами (см. leaderboard.py)"""
+    revision = IntegerField(default=0)
+
+    class Meta:
+        table_name = 'stats_revision'
+
+class SchemaVersion(BaseModel):
+    """Применённые миграции схемы БД"""
+    version = IntegerField(primary_key=True)
+    description = CharField()
+    applied_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        table_name = 'schema_version'
 
 def initialize_database():
     with DB:
-        DB.create_tables([User, Player, Training, Match, PlayerStats])
+        DB.create_tables([User, Player, Training, Match, PlayerStats, PlayerSeasonTotals, StatsRevision, SchemaVersion])
         
         # Создаем тестового администратора
         if not User.select().where(User.username == 'admin').exists():
@@ -105,5 +190,27 @@ def initialize_database():
                 jersey_number=10
             )
 
+_bootstrap_lock = threading.Lock()
+_bootstrapped = False
+
+def ensure_database():
+    """Подготавливает БД при первом обращении к данным.
+
+    Подключается к БД, при необходимости создает таблицы с начальными
+    пользователями и применяет миграции. Повторные вызовы ничего не делают.
+    """
+    global _bootstrapped
+    if _bootstrapped:
+        return
+    with _bootstrap_lock:
+        if _bootstrapped:
+            return
+        from migrations import run_migrations
+        DB.connect(reuse_if_open=True)
+        if not User.table_exists():
+            initialize_database()
+        run_migrations()
+        _bootstrapped = True
+
 if __name__ == "__main__":
-    initialize_database()
\ No newline at end of file
+    ensure_database()
\ No newline at end of file
@@ -1,23 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from models import Player, Match, PlayerStats, DB, Training, User
+from models import Match, season_of, season_label
+from analytics import FORM_WINDOW
 from datetime import datetime
 from functools import partial
+from backend import get_backend
+from db_worker import get_worker
+from widgets import PagedTreeview, DateRangeBar, sorted_position, in_period
+from search_window import SearchBox
+from export_window import ExportWindow
 
 class PlayerInterface:
-    def __init__(self, root, user_id):
+    def __init__(self, root, session):
         self.root = root
-        self.user = User.get(User.id == user_id)
+        self.session = session
+        self.user = session.user
+        self.player = session.player
+        self.player_exists = self.player is not None
+        self.backend = get_backend()
+        self.worker = get_worker()
         self.frame = tk.Frame(root)
         self.frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
         
-        try:
-            self.player = Player.get(Player.user == self.user)
-            self.player_exists = True
-        except Player.DoesNotExist:
-            self.player = None
-            self.player_exists = False
-        
         self.create_player_info_section()
         self.create_stats_section()
         self.create_trainings_button()
@@ -37,6 +41,12 @@ class PlayerInterface:
             pady=5
         ).pack(pady=5, fill=tk.X)
 
+        # Поиск по темам и заметкам тренировок и матчей
+        search_frame = tk.Frame(btn_frame)
+        search_frame.pack(fill=tk.X)
+        tk.Label(search_frame, text="Поиск по тренировкам и матчам:").pack(side=tk.LEFT)
+        SearchBox(search_frame, self.root).pack(side=tk.LEFT)
+
     def show_trainings(self):
         """Показывает окно со списком всех тренировок"""
         trainings_window = tk.Toplevel(self.root)
@@ -46,6 +56,10 @@ class PlayerInterface:
         # Основной фрейм
         main_frame = tk.Frame(trainings_window, padx=10, pady=10)
         main_frame.pack(expand=True, fill=tk.BOTH)
+
+        # Период списка, по умолчанию текущий сезон
+        trainings_period = DateRangeBar(main_frame, self.filter_trainings)
+        trainings_period.pack(fill=tk.X, pady=5)
         
         # Таблица тренировок
         columns = ("id", "date", "duration", "focus_area", "coach")
@@ -74,7 +88,10 @@ class PlayerInterface:
             orient="vertical", 
             command=self.trainings_tree.yview
         )
-        self.trainings_tree.configure(yscrollcommand=scrollbar.set)
+        self.trainings_list = PagedTreeview(
+            self.trainings_tree, scrollbar, self.backend.trainings_page, self.format_training_row,
+            runner=self.worker.read, filters=trainings_period.filters()
+        )
         
         # Размещение элементов
         self.trainings_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -97,22 +114,21 @@ class PlayerInterface:
 
     def update_trainings_list(self):
         """Загружает список тренировок из БД"""
-        for item in self.trainings_tree.get_children():
-            self.trainings_tree.delete(item)
-            
-        trainings = (Training
-                    .select(Training, User)
-                    .join(User)
-                    .order_by(Training.date.desc()))
-        
-        for training in trainings:
-            self.trainings_tree.insert("", tk.END, values=(
-                training.id,
-                training.date.strftime('%Y-%m-%d'),
-                training.duration,
-                training.focus_area,
-                training.coach.username
-            ))
+        self.trainings_list.reload()
+
+    def filter_trainings(self, filters):
+        """Показывает тренировки за выбранный период"""
+        self.trainings_list.set_filters(filters)
+
+    def format_training_row(self, training):
+        """Формирует строку таблицы тренировок"""
+        return (
+            training.id,
+            training.date.strftime('%Y-%m-%d'),
+            training.duration,
+            training.focus_area,
+            training.coach.username
+        )
 
     def create_player_info_section(self):
         info_frame = tk.LabelFrame(self.frame, text="Информация об игроке", padx=10, pady=10)
@@ -158,7 +174,10 @@ class PlayerInterface:
         
         tk.Label(match_frame, text="Матч:").pack(side=tk.LEFT)
         self.match_var = tk.StringVar()
-        self.match_combobox = ttk.Combobox(match_frame, textvariable=self.match_var, state="readonly")
+        self.match_combobox = ttk.Combobox(
+            match_frame, textvariable=self.match_var, state="readonly",
+            postcommand=self.refresh_matches_list
+        )
         self.match_combobox.pack(side=tk.LEFT, padx=5, expand=True, fill=tk.X)
         self.update_matches_list()
         
@@ -191,7 +210,18 @@ class PlayerInterface:
             bg="#2196F3",
             fg="white"
         ).grid(row=1, columnspan=8, pady=10, sticky="ew")
-        
+
+        tk.Button(
+            stats_entry_frame,
+            text="Экспорт статистики...",
+            command=self.show_export_window
+        ).grid(row=2, columnspan=8, sticky="ew")
+        
+        # Период таблицы статистики, по умолчанию текущий сезон
+        self.stats_period = DateRangeBar(stats_frame, self.filter_stats)
+        self.stats_period.pack(fill=tk.X, pady=5)
+        self.stats_filters = self.stats_period.filters()
+
         # Таблица статистики
         self.stats_tree = ttk.Treeview(stats_frame, columns=("match", "goals", "assists", "yellow", "red"), show="headings")
         
@@ -209,39 +239,112 @@ class PlayerInterface:
         self.stats_tree.column("red", width=70, anchor='center')
         
         self.stats_tree.pack(fill=tk.BOTH, expand=True)
+        # Ключи строк (дата матча, id) для вставки новой строки на ее место
+        self.stats_keys = {}
+        
+        # Итоги за сезон и за карьеру
+        self.totals_var = tk.StringVar()
+        tk.Label(stats_frame, textvariable=self.totals_var, anchor="w", justify=tk.LEFT).pack(fill=tk.X, pady=5)
+        # Форма и показатели за 90 минут за выбранный период
+        self.form_var = tk.StringVar()
+        tk.Label(stats_frame, textvariable=self.form_var, anchor="w", justify=tk.LEFT).pack(fill=tk.X)
         self.update_stats_table()
 
     def update_matches_list(self):
         """Обновляет список матчей в выпадающем меню"""
-        matches = Match.select().order_by(Match.date.desc())
-        match_list = [f"{m.date.strftime('%Y-%m-%d')} - {m.opponent} ({m.location})" for m in matches]
+        self.worker.read(self.backend.match_index.labels, self.fill_matches_list)
+
+    def refresh_matches_list(self):
+        """Перед открытием списка подставляет актуальные матчи из общего индекса"""
+        match_list = self.backend.match_index.cached_labels()
+        if match_list is None:
+            self.update_matches_list()
+        else:
+            self.match_combobox['values'] = match_list
+
+    def fill_matches_list(self, match_list):
         self.match_combobox['values'] = match_list
-        if match_list:
+        if match_list and self.match_var.get() not in match_list:
             self.match_var.set(match_list[0])
 
     def update_stats_table(self):
         """Обновляет таблицу статистики"""
-        for item in self.stats_tree.get_children():
-            self.stats_tree.delete(item)
-            
         if not self.player_exists:
             return
             
-        stats = (PlayerStats
-                .select(PlayerStats, Match)
-                .join(Match)
-                .where(PlayerStats.player == self.player)
-                .order_by(Match.date.desc()))
-        
+        self.load_stats()
+        self.update_totals()
+
+    def load_stats(self):
+        """Загружает статистику за выбранный период"""
+        self.worker.read(
+            partial(self.backend.player_stats, self.player.id, **self.stats_filters),
+            self.fill_stats_table
+        )
+        self.update_form()
+
+    def filter_stats(self, filters):
+        self.stats_filters = filters
+        if self.player_exists:
+            self.load_stats()
+
+    def update_totals(self):
+        """Обновляет итоги игрока по сезонам"""
+        self.worker.read(partial(self.backend.player_season_totals, self.player.id), self.fill_totals)
+
+    def update_form(self):
+        """Обновляет форму игрока за выбранный период"""
+        self.worker.read(
+            partial(self.backend.player_form, self.player.id, **self.stats_filters),
+            self.fill_form
+        )
+
+    def fill_form(self, form):
+        if form is None:
+            self.form_var.set("")
+            return
+        self.form_var.set(
+            f"Форма (последние {FORM_WINDOW} матчей): {form.form:.2f} гола+передачи за матч\n"
+            f"За 90 минут: голов {form.goals_per_90:.2f}, передач {form.assists_per_90:.2f}, "
+            f"карточек {form.cards_per_90:.2f}\n"
+            f"Матчей с голом подряд: {form.goal_streak} (лучшая серия {form.best_goal_streak})"
+        )
+
+    def fill_totals(self, totals):
+        """Показывает итоги текущего сезона и всей карьеры"""
+        current = season_of(datetime.now().date())
+        season = next((t for t in totals if t.season == current), None)
+        career = [sum(getattr(t, field) for t in totals)
+                  for field in ("appearances", "goals", "assists", "yellow_cards", "red_cards")]
+        
+        lines = []
+        if season:
+            lines.append(
+                f"Сезон {season_label(current)}: матчей {season.appearances}, голов {season.goals}, "
+                f"передач {season.assists}, ЖК {season.yellow_cards}, КК {season.red_cards}"
+            )
+        lines.append(
+            "За карьеру: матчей {}, голов {}, передач {}, ЖК {}, КК {}".format(*career)
+        )
+        self.totals_var.set("\n".join(lines))
+
+    def fill_stats_table(self, stats):
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        self.stats_keys.clear()
         for stat in stats:
-            match_info = f"{stat.match.date.strftime('%Y-%m-%d')} - {stat.match.opponent}"
-            self.stats_tree.insert("", tk.END, values=(
-                match_info,
-                stat.goals,
-                stat.assists,
-                stat.yellow_cards,
-                stat.red_cards
-            ))
+            self.insert_stats_row(stat, tk.END)
+
+    def insert_stats_row(self, stat, index):
+        iid = str(stat.id)
+        self.stats_keys[iid] = (stat.match.date, stat.id)
+        match_info = f"{stat.match.date.strftime('%Y-%m-%d')} - {stat.match.opponent}"
+        self.stats_tree.insert("", index, iid=iid, values=(
+            match_info,
+            stat.goals,
+            stat.assists,
+            stat.yellow_cards,
+            stat.red_cards
+        ))
 
     def save_player_info(self):
         """Сохраняет информацию об игроке в БД"""
@@ -262,24 +365,39 @@ class PlayerInterface:
             if data['jersey_number'] < 0:
                 raise ValueError("Номер игрока не может быть отрицательным")
             
-            with DB.atomic() as transaction:
-                if self.player_exists:
-                    # Обновляем существующую запись
-                    Player.update(**data).where(Player.id == self.player.id).execute()
-                else:
-                    # Создаем новую запись
-                    self.player = Player.create(**data)
-                    self.player_exists = True
-                
-                messagebox.showinfo("Успех", "Данные игрока успешно сохранены")
-                self.update_stats_table()
-                
         except ValueError as ve:
             messagebox.showerror("Ошибка ввода", str(ve))
+            return
         except Exception as e:
-            messagebox.showerror("Ошибка базы данных", f"Не удалось сохранить данные: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.on_player_save_error(e)
+            return
+        
+        # Существующая запись обновляется, иначе создается новая
+        player_id = self.player.id if self.player_exists else None
+        self.worker.write(
+            partial(self.backend.save_player, player_id, **data),
+            self.on_player_saved,
+            self.on_player_save_error
+        )
+
+    def on_player_saved(self, player):
+        self.player = player
+        self.player_exists = True
+        self.session.player = player
+        messagebox.showinfo("Успех", "Данные игрока успешно сохранены")
+        self.update_stats_table()
+
+    def on_player_save_error(self, error):
+        messagebox.showerror("Ошибка базы данных", f"Не удалось сохранить данные: {str(error)}")
+        import traceback
+        traceback.print_exception(error)
+
+    def show_export_window(self):
+        """Открывает окно выгрузки своей статистики"""
+        if not self.player_exists:
+            messagebox.showerror("Ошибка", "Сначала сохраните информацию об игроке")
+            return
+        ExportWindow(self.root, kinds=('player_stats',), player_id=self.player.id)
 
     def save_player_stats(self):
         """Сохраняет статистику игрока для выбранного матча"""
@@ -291,21 +409,11 @@ class PlayerInterface:
             match_text = self.match_var.get()
             if not match_text:
                 raise ValueError("Не выбран матч")
-                
-            # Парсим выбранный матч
-            match_date_str, rest = match_text.split(" - ", 1)
-            opponent = rest.split(" (")[0]
-            match_date = datetime.strptime(match_date_str, '%Y-%m-%d').date()
-            
-            # Находим матч в БД
-            match = Match.get(
-                (Match.date == match_date) & 
-                (Match.opponent == opponent))
             
             # Подготавливаем данные статистики
             stats_data = {
-                'player': self.player,
-                'match': match,
+                'player': self.player.id,
+                'match': self.backend.match_index.match_id(match_text),
                 'goals': self.goals_var.get(),
                 'assists': self.assists_var.get(),
                 'yellow_cards': self.yellow_var.get(),
@@ -317,18 +425,34 @@ class PlayerInterface:
                   stats_data['yellow_cards'], stats_data['red_cards']]):
                 raise ValueError("Значения статистики не могут быть отрицательными")
             
-            with DB.atomic():
-                PlayerStats.create(**stats_data)
-                self.update_stats_table()
-                self.clear_stats_fields()
-                messagebox.showinfo("Успех", "Статистика успешно сохранена")
-                
         except ValueError as ve:
             messagebox.showerror("Ошибка ввода", str(ve))
-        except Match.DoesNotExist:
-            messagebox.showerror("Ошибка", "Выбранный матч не найден в базе данных")
+            return
         except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось сохранить статистику: {str(e)}")
+            self.on_stats_save_error(e)
+            return
+        
+        self.worker.write(
+            partial(self.backend.add_player_stats, **stats_data),
+            self.on_stats_saved,
+            self.on_stats_save_error
+        )
+
+    def on_stats_saved(self, stats):
+        # Добавляется только новая строка, итоги перечитываются одним запросом
+        if in_period(self.stats_filters, stats.match.date):
+            index, _ = sorted_position(self.stats_tree, self.stats_keys, (stats.match.date, stats.id))
+            self.insert_stats_row(stats, index)
+        self.update_totals()
+        self.update_form()
+        self.clear_stats_fields()
+        messagebox.showinfo("Успех", "Статистика успешно сохранена")
+
+    def on_stats_save_error(self, error):
+        if isinstance(error, Match.DoesNotExist):
+            messagebox.showerror("Ошибка", "Выбранный матч не найден в базе данных")
+        else:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить статистику: {str(error)}")
 
     def clear_stats_fields(self):
         """Очищает поля ввода статистики"""
@@ -0,0 +1,128 @@
+import threading
+from collections import namedtuple
+from peewee import Value, Alias, Field, DateField, DateTimeField
+from models import DB
+
+# Подготовленные запросы. Часто выполняемый запрос описывается функцией,
+# которая строит его средствами peewee, но вместо значений получает места
+# параметров (Param). Запрос компилируется в SQL один раз - отдельно для
+# каждого набора переданных параметров, так как от него зависят условия
+# WHERE, - и затем выполняется с подставленными значениями без повторной
+# сборки цепочки select().where().order_by() и без создания объектов
+# моделей: результат - кортежи значений столбцов. Даты преобразуются так
+# же, как это делают поля моделей.
+
+Compiled = namedtuple('Compiled', 'sql values columns converters')
+
+class Slot:
+    """Место параметра name в списке значений скомпилированного запроса"""
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"<{self.name}>"
+
+class Param(Value):
+    """Параметр запроса: при компиляции в SQL становится местом '?'"""
+
+    def __init__(self, name):
+        super().__init__(Slot(name), converter=False)
+
+def selected_columns(query):
+    """Столбцы запроса: (имя, узел), модели раскрываются на свои поля"""
+    columns = []
+    for node in query._returning:
+        if isinstance(node, type):
+            columns.extend((field.name, field) for field in node._meta.sorted_fields)
+        elif isinstance(node, Alias):
+            columns.append((node._alias, node.node))
+        else:
+            columns.append((node.name if isinstance(node, Field) else None, node))
+    return columns
+
+class PreparedQuery:
+    """Именованный запрос, скомпилированный в SQL заранее.
+
+    build(**params) строит запрос peewee. Параметры со значением None не
+    передаются в build, поэтому build сам решает, какие условия добавить.
+    """
+
+    def __init__(self, name, build):
+        self.name = name
+        self.build = build
+        self._lock = threading.Lock()
+        # frozenset имен переданных параметров -> Compiled
+        self._variants = {}
+        self.executions = 0
+
+    def query(self, **params):
+        """Запрос peewee с подставленными значениями - обычный путь через ORM"""
+        return self.build(**{name: value for name, value in params.items() if value is not None})
+
+    def compile(self, names):
+        with self._lock:
+            compiled = self._variants.get(names)
+        if compiled is None:
+            query = self.build(**{name: Param(name) for name in names})
+            sql, values = query.sql()
+            columns = selected_columns(query)
+            converters = tuple(
+                (index, node.python_value) for index, (_, node) in enumerate(columns)
+                if isinstance(node, (DateField, DateTimeField))
+            )
+            compiled = Compiled(sql, values, tuple(name for name, _ in columns), converters)
+            with self._lock:
+                self._variants.setdefault(names, compiled)
+        return compiled
+
+    def execute(self, **params):
+        """Выполняет запрос и возвращает список кортежей"""
+        params = {name: value for name, value in params.items() if value is not None}
+        compiled = self.compile(frozenset(params))
+        values = [params[value.name] if isinstance(value, Slot) else value for value in compiled.values]
+        rows = DB.execute_sql(compiled.sql, values).fetchall()
+        with self._lock:
+            self.executions += 1
+        if not compiled.converters:
+            return rows
+        converted = []
+        for row in rows:
+            row = list(row)
+            for index, convert in compiled.converters:
+                row[index] = convert(row[index])
+            converted.append(tuple(row))
+        return converted
+
+    def instances(self, model, **params):
+        """Выполняет запрос по одной модели и возвращает ее объекты"""
+        columns = self.compile(frozenset(name for name, value in params.items() if value is not None)).columns
+        result = []
+        for row in self.execute(**params):
+            instance = model(__no_default__=1, **dict(zip(columns, row)))
+            instance._dirty.clear()
+            result.append(instance)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {'variants': len(self._variants), 'executions': self.executions}
+
+# Имя запроса -> PreparedQuery
+REGISTRY = {}
+
+def register(name, build):
+    """Добавляет запрос в реестр и возвращает его PreparedQuery"""
+    prepared_query = PreparedQuery(name, build)
+    REGISTRY[name] = prepared_query
+    return prepared_query
+
+def prepared(name):
+    """Декоратор: функция построения запроса становится подготовленным запросом name"""
+    def decorator(build):
+        return register(name, build)
+    return decorator
+
+def stats():
+    return {name: prepared_query.stats() for name, prepared_query in REGISTRY.items()}
@@ -0,0 +1,139 @@
+from collections import namedtuple
+from peewee import fn, JOIN
+from models import Training, User, Match, Player, PlayerStats, PlayerSeasonTotals, ROLE_COACH
+from prepared import prepared
+import cache
+
+# Количество строк, загружаемых за один запрос в списках
+PAGE_SIZE = 100
+
+def row_type(model):
+    """Тип строки подготовленного запроса с полями модели в ее порядке"""
+    return namedtuple(f"{model.__name__}Row", [field.name for field in model._meta.sorted_fields])
+
+TrainingRow = row_type(Training)
+MatchRow = row_type(Match)
+StatsRow = row_type(PlayerStats)
+TotalsRow = row_type(PlayerSeasonTotals)
+
+def keyset_query(query, date_field, id_field, after_date=None, after_id=None,
+                 before_date=None, before_id=None, limit=PAGE_SIZE):
+    """Запрос страницы, упорядоченный по (дата, id) по убыванию.
+
+    after - ключ (дата, id) последней загруженной строки: выбираются более старые записи.
+    before - ключ первой загруженной строки: выбираются более новые записи, по
+    возрастанию, поэтому страницу нужно развернуть.
+    """
+    if before_date is not None:
+        return (query
+                .where((date_field > before_date) | ((date_field == before_date) & (id_field > before_id)))
+                .order_by(date_field.asc(), id_field.asc())
+                .limit(limit))
+
+    if after_date is not None:
+        query = query.where((date_field < after_date) | ((date_field == after_date) & (id_field < after_id)))
+    return query.order_by(date_field.desc(), id_field.desc()).limit(limit)
+
+def keyset_page(prepared_query, after=None, before=None, limit=PAGE_SIZE, **filters):
+    """Выполняет подготовленный запрос страницы и возвращает кортежи по убыванию ключа"""
+    after_date, after_id = after or (None, None)
+    before_date, before_id = before or (None, None)
+    rows = prepared_query.execute(after_date=after_date, after_id=after_id, before_date=before_date,
+                                  before_id=before_id, limit=limit, **filters)
+    return rows[::-1] if before is not None else rows
+
+def date_range(query, date_field, date_from=None, date_to=None):
+    """Ограничивает запрос периодом; границы включаются, None - без ограничения.
+
+    Условия на сам столбец даты, поэтому выборка идет по индексу на нем.
+    """
+    if date_from is not None:
+        query = query.where(date_field >= date_from)
+    if date_to is not None:
+        query = query.where(date_field <= date_to)
+    return query
+
+@prepared('trainings_page')
+def trainings_page_query(date_from=None, date_to=None, **page):
+    query = date_range(Training.select(), Training.date, date_from, date_to)
+    return keyset_query(query, Training.date, Training.id, **page)
+
+@prepared('matches_page')
+def matches_page_query(date_from=None, date_to=None, **page):
+    query = date_range(Match.select(), Match.date, date_from, date_to)
+    return keyset_query(query, Match.date, Match.id, **page)
+
+@prepared('player_stats')
+def player_stats_query(player_id, date_from=None, date_to=None):
+    query = (PlayerStats
+             .select(PlayerStats, Match)
+             .join(Match)
+             .where(PlayerStats.player == player_id))
+    return (date_range(query, Match.date, date_from, date_to)
+            .order_by(Match.date.desc(), PlayerStats.id.desc()))
+
+@prepared('player_season_totals')
+def player_season_totals_query(player_id):
+    return (PlayerSeasonTotals
+            .select()
+            .where(PlayerSeasonTotals.player == player_id)
+            .order_by(PlayerSeasonTotals.season.desc()))
+
+def trainings_page(after=None, before=None, limit=PAGE_SIZE, date_from=None, date_to=None):
+    """Страница тренировок за период вместе с тренером.
+
+    Тренеров немного, поэтому они берутся из кэша записей вместо соединения
+    с users на каждой странице.
+    """
+    rows = keyset_page(trainings_page_query, after, before, limit, date_from=date_from, date_to=date_to)
+    coaches = cache.users.get_many(row[1] for row in rows)
+    return [TrainingRow(row[0], coaches[row[1]], *row[2:]) for row in rows]
+
+def matches_page(after=None, before=None, limit=PAGE_SIZE, date_from=None, date_to=None):
+    """Страница матчей за период"""
+    rows = keyset_page(matches_page_query, after, before, limit, date_from=date_from, date_to=date_to)
+    return [MatchRow._make(row) for row in rows]
+
+def player_stats(player_id, date_from=None, date_to=None):
+    """Статистика игрока по матчам за период вместе с данными матчей"""
+    size = len(StatsRow._fields)
+    return [StatsRow(*row[:2], MatchRow._make(row[size:]), *row[3:size])
+            for row in player_stats_query.execute(player_id=player_id, date_from=date_from, date_to=date_to)]
+
+def match_sheet(match_id):
+    """Лист матча: все игроки по номерам и их статистика за матч.
+
+    played - есть ли у игрока строки за матч; несколько строк одного
+    игрока суммируются.
+    """
+    totals = (PlayerStats
+              .select(PlayerStats.player.alias('player_id'),
+                      fn.SUM(PlayerStats.goals).alias('goals'),
+                      fn.SUM(PlayerStats.assists).alias('assists'),
+                      fn.SUM(PlayerStats.yellow_cards).alias('yellow_cards'),
+                      fn.SUM(PlayerStats.red_cards).alias('red_cards'))
+              .where(PlayerStats.match == match_id)
+              .group_by(PlayerStats.player)
+              .alias('totals'))
+    return list(Player
+                .select(Player.id.alias('player_id'), Player.name, Player.jersey_number, Player.position,
+                        totals.c.player_id.is_null(False).alias('played'),
+                        fn.COALESCE(totals.c.goals, 0).alias('goals'),
+                        fn.COALESCE(totals.c.assists, 0).alias('assists'),
+                        fn.COALESCE(totals.c.yellow_cards, 0).alias('yellow_cards'),
+                        fn.COALESCE(totals.c.red_cards, 0).alias('red_cards'))
+                .join(totals, JOIN.LEFT_OUTER, on=(Player.id == totals.c.player_id))
+                .order_by(Player.jersey_number, Player.name)
+                .namedtuples())
+
+def player_season_totals(player_id):
+    """Итоги игрока по сезонам, начиная с последнего"""
+    return [TotalsRow._make(row) for row in player_season_totals_query.execute(player_id=player_id)]
+
+def coaches():
+    """Все тренеры по алфавиту"""
+    return list(User.select().where(User.role == ROLE_COACH).order_by(User.username))
+
+def players():
+    """Все игроки по алфавиту"""
+    return list(Player.select().join(User).order_by(Player.name))
@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from html import escape
+from models import (DB, Player, PlayerSeasonTotals, configure_database,
+                    season_label, season_range)
+import analytics
+import queries
+import snapshot
+
+# Отчеты игроков за сезон в HTML. Игроки распределяются по процессам
+# ProcessPoolExecutor: каждый процесс открывает свое подключение к файлу БД
+# только на чтение и сам записывает файлы отчетов, поэтому отчеты всей
+# команды строятся параллельно на всех ядрах. Процессы запускаются методом
+# spawn, как в Windows, чтобы не наследовать открытые подключения к БД.
+
+REPORT_STYLE = """
+body { font-family: sans-serif; margin: 2em; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+th, td { border: 1px solid #999; padding: 4px 10px; text-align: center; }
+th { background: #eee; }
+td.text { text-align: left; }
+"""
+
+def report_name(player_id):
+    return f"player_{player_id}.html"
+
+def html_page(title, body):
+    return (
+        "<!DOCTYPE html>\n<html lang=\"ru\">\n<head>\n<meta charset=\"utf-8\">\n"
+        f"<title>{escape(title)}</title>\n<style>{REPORT_STYLE}</style>\n</head>\n"
+        f"<body>\n<h1>{escape(title)}</h1>\n{body}\n</body>\n</html>\n"
+    )
+
+def html_table(header, rows, text_columns=()):
+    lines = ["<table>", "<tr>" + "".join(f"<th>{escape(name)}</th>" for name in header) + "</tr>"]
+    for row in rows:
+        cells = "".join(
+            f"<td class=\"text\">{escape(str(value))}</td>" if index in text_columns
+            else f"<td>{escape(str(value))}</td>"
+            for index, value in enumerate(row)
+        )
+        lines.append(f"<tr>{cells}</tr>")
+    lines.append("</table>")
+    return "\n".join(lines)
+
+def render_player_report(player_id, season):
+    """HTML-отчет игрока за сезон: итоги, форма и статистика по матчам"""
+    player = Player.get_by_id(player_id)
+    date_from, date_to = season_range(season)
+    totals = PlayerSeasonTotals.get_or_none(
+        (PlayerSeasonTotals.player == player_id) & (PlayerSeasonTotals.season == season)
+    )
+    stats = queries.player_stats(player_id, date_from, date_to)[::-1]
+    form = analytics.player_form(player_id, date_from=date_from, date_to=date_to)
+
+    parts = [f"<p>Номер {player.jersey_number}, {escape(player.position)}. "
+             f"Сезон {season_label(season)}.</p>"]
+    parts.append("<h2>Итоги сезона</h2>")
+    if totals is None:
+        parts.append("<p>В сезоне нет сыгранных матчей.</p>")
+    else:
+        parts.append(html_table(
+            ("Матчей", "Голы", "Передачи", "ЖК", "КК"),
+            [(totals.appearances, totals.goals, totals.assists, totals.yellow_cards, totals.red_cards)]
+        ))
+    if form is not None:
+        parts.append(html_table(
+            ("Форма, г+п за матч", "Голов за 90 мин", "Передач за 90 мин", "Серия матчей с голом", "Лучшая серия"),
+            [(f"{form.form:.2f}", f"{form.goals_per_90:.2f}", f"{form.assists_per_90:.2f}",
+              form.goal_streak, form.best_goal_streak)]
+        ))
+
+    parts.append("<h2>Матчи</h2>")
+    parts.append(html_table(
+        ("Дата", "Соперник", "Стадион", "Счет", "Голы", "Передачи", "ЖК", "КК"),
+        [(stat.match.date.strftime('%Y-%m-%d'), stat.match.opponent, stat.match.location,
+          stat.match.score or "", stat.goals, stat.assists, stat.yellow_cards, stat.red_cards)
+         for stat in stats],
+        text_columns=(1, 2)
+    ))
+    return player.name, html_page(f"{player.name} - отчет за сезон {season_label(season)}", "\n".join(parts))
+
+def init_report_worker(database_path):
+    """Подключает процесс отчетов к файлу БД только на чтение"""
+    configure_database(database_path, read_only=True)
+
+def write_player_report(player_id, season, output_dir):
+    """Выполняется в процессе отчетов: строит и записывает отчет игрока"""
+    name, page = render_player_report(player_id, season)
+    path = os.path.join(output_dir, report_name(player_id))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return player_id, name
+
+def write_index(season, output_dir, names):
+    """Оглавление со ссылками на отчеты игроков"""
+    links = "\n".join(
+        f"<li><a href=\"{report_name(player_id)}\">{escape(name)}</a></li>"
+        for player_id, name in sorted(names.items(), key=lambda item: item[1])
+    )
+    path = os.path.join(output_dir, "index.html")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html_page(f"Отчеты игроков за сезон {season_label(season)}", f"<ul>\n{links}\n</ul>"))
+    return path
+
+def generate_reports(season, output_dir, player_ids=None, workers=None, progress=None):
+    """Строит отчеты игроков за сезон в output_dir и возвращает путь к оглавлению.
+
+    player_ids - игроки для отчетов, по умолчанию все. progress(done, total)
+    вызывается по мере готовности отчетов.
+    """
+    if player_ids is None:
+        player_ids = [pk for (pk,) in Player.select(Player.id).order_by(Player.id).tuples()]
+    os.makedirs(output_dir, exist_ok=True)
+    # Процессы читают свежий снимок для отчетов, если он включен, иначе рабочий файл БД
+    if snapshot.SETTINGS['snapshot']:
+        snapshot.refresh()
+        database_path = snapshot.snapshot_path()
+    else:
+        database_path = DB.database
+
+    names = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_report_worker,
+        initargs=(database_path,)
+    ) as pool:
+        futures = [pool.submit(write_player_report, player_id, season, output_dir) for player_id in player_ids]
+        for future in as_completed(futures):
+            player_id, name = future.result()
+            names[player_id] = name
+            if progress is not None:
+                progress(len(names), len(futures))
+    return write_index(season, output_dir, names)
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import datetime
+    from models import ensure_database, season_of
+
+    parser = argparse.ArgumentParser(description="Отчеты игроков за сезон в HTML")
+    parser.add_argument('--season', type=int, default=season_of(datetime.now().date()),
+                        help="год начала сезона, по умолчанию текущий")
+    parser.add_argument('--output', default='reports', help="папка для отчетов")
+    parser.add_argument('--workers', type=int, help="число процессов, по умолчанию по числу ядер")
+    parser.add_argument('players', nargs='*', type=int, help="id игроков, по умолчанию все")
+    args = parser.parse_args()
+
+    ensure_database()
+    index = generate_reports(
+        args.season, args.output, args.players or None, args.workers,
+        progress=lambda done, total: print(f"\r{done}/{total}", end="", flush=True)
+    )
+    print(f"\nОтчеты: {index}")
@@ -0,0 +1,107 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from datetime import datetime
+from functools import partial
+from models import season_of
+from backend import get_backend
+from db_worker import get_worker
+
+# Как часто окно перечитывает ход построения отчетов, мс
+PROGRESS_INTERVAL = 200
+
+class ReportsWindow:
+    """Окно построения отчетов всех игроков за сезон"""
+
+    def __init__(self, root):
+        self.backend = get_backend()
+        self.worker = get_worker()
+        # (готово, всего) - обновляется потоком, ожидающим процессы отчетов
+        self.progress = None
+        self.running = False
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Отчеты игроков за сезон")
+        self.window.resizable(False, False)
+
+        frame = tk.Frame(self.window, padx=10, pady=10)
+        frame.pack(expand=True, fill=tk.BOTH)
+
+        season_frame = tk.Frame(frame)
+        season_frame.pack(fill=tk.X, pady=5)
+        tk.Label(season_frame, text="Сезон (год начала):").pack(side=tk.LEFT)
+        self.season_var = tk.IntVar(value=season_of(datetime.now().date()))
+        tk.Entry(season_frame, textvariable=self.season_var, width=6).pack(side=tk.LEFT, padx=5)
+
+        tk.Label(
+            frame,
+            text="Для каждого игрока создается HTML-файл с итогами сезона\n"
+                 "и списком матчей, а также оглавление index.html.",
+            justify=tk.LEFT,
+            fg="gray"
+        ).pack(anchor="w", pady=5)
+
+        self.progress_bar = ttk.Progressbar(frame, length=300, mode='determinate')
+        self.progress_bar.pack(fill=tk.X, pady=5)
+        self.status_var = tk.StringVar()
+        tk.Label(frame, textvariable=self.status_var, fg="gray").pack(anchor="w")
+
+        self.generate_button = tk.Button(
+            frame,
+            text="Выбрать папку и построить...",
+            command=self.generate,
+            bg="#2196F3",
+            fg="white"
+        )
+        self.generate_button.pack(pady=5, fill=tk.X)
+
+    def generate(self):
+        """Строит отчеты в фоновом потоке, сами отчеты - в отдельных процессах"""
+        try:
+            season = self.season_var.get()
+        except tk.TclError:
+            messagebox.showerror("Ошибка ввода", "Сезон указывается годом его начала", parent=self.window)
+            return
+        output_dir = filedialog.askdirectory(parent=self.window, mustexist=False)
+        if not output_dir:
+            return
+
+        self.progress = None
+        self.running = True
+        self.generate_button.config(state=tk.DISABLED)
+        self.status_var.set("Построение отчетов...")
+        self.worker.read(
+            partial(self.backend.generate_reports, season, output_dir, progress=self.on_progress),
+            self.on_generated,
+            self.on_error
+        )
+        self.poll_progress()
+
+    def on_progress(self, done, total):
+        # Вызывается из фонового потока, виджеты обновляет poll_progress
+        self.progress = (done, total)
+
+    def poll_progress(self):
+        if not self.running or not self.window.winfo_exists():
+            return
+        if self.progress is not None:
+            done, total = self.progress
+            self.progress_bar.config(maximum=total, value=done)
+            self.status_var.set(f"Готово отчетов: {done} из {total}")
+        self.window.after(PROGRESS_INTERVAL, self.poll_progress)
+
+    def finish(self):
+        self.running = False
+        if self.window.winfo_exists():
+            self.generate_button.config(state=tk.NORMAL)
+
+    def on_generated(self, index):
+        self.finish()
+        if self.window.winfo_exists():
+            self.status_var.set(f"Оглавление: {index}")
+        messagebox.showinfo("Отчеты построены", f"Оглавление отчетов: {index}")
+
+    def on_error(self, error):
+        self.finish()
+        if self.window.winfo_exists():
+            self.status_var.set("")
+        messagebox.showerror("Ошибка", f"Не удалось построить отчеты: {str(error)}")
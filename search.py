@@ -0,0 +1,113 @@
+import re
+from collections import namedtuple
+from datetime import datetime
+from models import DB
+
+# Полнотекстовый поиск по тренировкам и матчам (таблица FTS5 search_index).
+# Индекс хранит копию текста и поддерживается триггерами на trainings и
+# matches. rowid строки индекса = id записи * 2 + вид (0 - тренировка,
+# 1 - матч), поэтому триггеры находят строку индекса по rowid без перебора.
+
+KIND_TRAINING = 'training'
+KIND_MATCH = 'match'
+KINDS = (KIND_TRAINING, KIND_MATCH)
+
+# Максимум результатов поиска
+SEARCH_LIMIT = 50
+# Вес совпадения в заголовке относительно текста заметок (bm25)
+TITLE_WEIGHT = 5.0
+
+SearchResult = namedtuple('SearchResult', 'kind id date title snippet')
+
+# Заголовок и текст строки индекса для тренировки и матча
+SOURCES = {
+    KIND_TRAINING: ('trainings', "{row}.focus_area", "COALESCE({row}.notes, '')"),
+    KIND_MATCH: ('matches', "{row}.opponent || ' - ' || {row}.location", "COALESCE({row}.notes, '')"),
+}
+
+CREATE_INDEX = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "date UNINDEXED, title, body, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+def index_rowid(kind, id_sql):
+    return f"{id_sql} * 2 + {KINDS.index(kind)}"
+
+def insert_sql(kind, row):
+    table, title, body = SOURCES[kind]
+    return (
+        "INSERT INTO search_index (rowid, date, title, body) VALUES "
+        f"({index_rowid(kind, f'{row}.id')}, {row}.date, "
+        f"{title.format(row=row)}, {body.format(row=row)});"
+    )
+
+def delete_sql(kind, row):
+    return f"DELETE FROM search_index WHERE rowid = {index_rowid(kind, f'{row}.id')};"
+
+def search_triggers():
+    """Триггеры, поддерживающие индекс: имя -> (событие, тело)"""
+    triggers = {}
+    for kind, (table, _, _) in SOURCES.items():
+        triggers[f"{table}_search_insert"] = (f"AFTER INSERT ON {table}", insert_sql(kind, "NEW"))
+        triggers[f"{table}_search_update"] = (
+            f"AFTER UPDATE ON {table}", delete_sql(kind, "OLD") + insert_sql(kind, "NEW")
+        )
+        triggers[f"{table}_search_delete"] = (f"AFTER DELETE ON {table}", delete_sql(kind, "OLD"))
+    return triggers
+
+def create_search_index(db=DB):
+    """Создает индекс с триггерами и заполняет его существующими записями"""
+    db.execute_sql(CREATE_INDEX)
+    for name, (event, body) in search_triggers().items():
+        db.execute_sql(f'CREATE TRIGGER IF NOT EXISTS "{name}" {event} BEGIN {body} END')
+    rebuild_search_index(db)
+
+def rebuild_search_index(db=DB):
+    """Заново заполняет индекс по таблицам trainings и matches"""
+    with db.atomic():
+        db.execute_sql("DELETE FROM search_index")
+        for kind, (table, title, body) in SOURCES.items():
+            db.execute_sql(
+                "INSERT INTO search_index (rowid, date, title, body) "
+                f"SELECT {index_rowid(kind, 't.id')}, t.date, {title.format(row='t')}, {body.format(row='t')} "
+                f"FROM {table} t"
+            )
+
+def match_expression(text):
+    """Запрос FTS5 из введенного текста: все слова, каждое как префикс.
+
+    Слова берутся в кавычки, поэтому символы синтаксиса FTS5 в запросе
+    не приводят к ошибке.
+    """
+    words = re.findall(r'\w+', text)
+    return " ".join(f'"{word}"*' for word in words)
+
+def search(text, kind=None, limit=SEARCH_LIMIT):
+    """Ищет тренировки и матчи по тексту; лучшие совпадения первыми"""
+    expression = match_expression(text)
+    if not expression:
+        return []
+    where = "search_index MATCH ?"
+    params = [expression]
+    if kind is not None:
+        where += " AND rowid % 2 = ?"
+        params.append(KINDS.index(kind))
+    cursor = DB.execute_sql(
+        "SELECT rowid, date, title, snippet(search_index, -1, '[', ']', '...', 12) "
+        f"FROM search_index WHERE {where} "
+        f"ORDER BY bm25(search_index, 0, {TITLE_WEIGHT}, 1.0) LIMIT ?",
+        params + [limit]
+    )
+    return [
+        SearchResult(KINDS[rowid % 2], rowid // 2, datetime.strptime(date, '%Y-%m-%d').date(), title, snippet)
+        for rowid, date, title, snippet in cursor.fetchall()
+    ]
+
+if __name__ == "__main__":
+    import sys
+    from models import ensure_database
+    ensure_database()
+
+    for result in search(" ".join(sys.argv[1:])):
+        print(f"{result.date:%Y-%m-%d} {result.kind:<8} {result.title}: {result.snippet}")
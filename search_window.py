@@ -0,0 +1,83 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from functools import partial
+from backend import get_backend
+from db_worker import get_worker
+from search import KIND_TRAINING, KIND_MATCH
+
+KIND_NAMES = {
+    KIND_TRAINING: "Тренировка",
+    KIND_MATCH: "Матч",
+}
+
+class SearchBox:
+    """Поле поиска по тренировкам и матчам; результаты открываются в отдельном окне"""
+
+    def __init__(self, parent, root):
+        self.root = root
+        self.backend = get_backend()
+        self.worker = get_worker()
+        self.window = None
+
+        self.frame = tk.Frame(parent)
+        self.query_var = tk.StringVar()
+        entry = tk.Entry(self.frame, textvariable=self.query_var, width=25)
+        entry.pack(side=tk.LEFT, padx=5)
+        entry.bind("<Return>", lambda _: self.search())
+        tk.Button(self.frame, text="Найти", command=self.search).pack(side=tk.LEFT)
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    def search(self):
+        """Ищет введенный текст в фоновом потоке"""
+        text = self.query_var.get().strip()
+        if not text:
+            return
+        self.worker.read(
+            partial(self.backend.search, text),
+            partial(self.show_results, text),
+            lambda e: messagebox.showerror("Ошибка", f"Не удалось выполнить поиск: {str(e)}")
+        )
+
+    def show_results(self, text, results):
+        if self.window is None or not self.window.winfo_exists():
+            self.create_window()
+        self.window.title(f"Поиск: {text}")
+        self.status_var.set(f"Найдено: {len(results)}" if results else "Ничего не найдено")
+        self.results_tree.delete(*self.results_tree.get_children())
+        for result in results:
+            self.results_tree.insert("", tk.END, values=(
+                result.date.strftime('%Y-%m-%d'),
+                KIND_NAMES[result.kind],
+                result.title,
+                result.snippet
+            ))
+        self.window.lift()
+
+    def create_window(self):
+        self.window = tk.Toplevel(self.root)
+        self.window.geometry("900x400")
+
+        main_frame = tk.Frame(self.window, padx=10, pady=10)
+        main_frame.pack(expand=True, fill=tk.BOTH)
+
+        self.status_var = tk.StringVar()
+        tk.Label(main_frame, textvariable=self.status_var, fg="gray").pack(anchor="w")
+
+        columns = ("date", "kind", "title", "snippet")
+        self.results_tree = ttk.Treeview(main_frame, columns=columns, show="headings")
+        self.results_tree.heading("date", text="Дата")
+        self.results_tree.heading("kind", text="Тип")
+        self.results_tree.heading("title", text="Тема / соперник")
+        self.results_tree.heading("snippet", text="Фрагмент")
+
+        self.results_tree.column("date", width=90)
+        self.results_tree.column("kind", width=90)
+        self.results_tree.column("title", width=200)
+        self.results_tree.column("snippet", width=450)
+
+        scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=self.results_tree.yview)
+        self.results_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.results_tree.pack(fill=tk.BOTH, expand=True)
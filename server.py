@@ -0,0 +1,454 @@
+import json
+import logging
+import os
+import secrets
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import date, datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from peewee import Model, ForeignKeyField, DoesNotExist
+from models import DB, User, ROLE_ADMIN, ROLE_COACH, ROLE_PLAYER, ensure_database
+from settings import load_server_settings
+from match_index import match_index
+import commands
+import queries
+import importer
+import leaderboard
+import search
+import export
+import analytics
+import snapshot
+
+# Сервер клуба: единственный процесс, открывающий файл БД.
+# Настольные приложения в режиме клиента (client.py) обращаются к нему по HTTP.
+
+ALL_ROLES = (ROLE_ADMIN, ROLE_COACH, ROLE_PLAYER)
+# Тип тела запроса с загружаемым файлом (импорт); остальные запросы - JSON
+UPLOAD_CONTENT_TYPE = 'application/octet-stream'
+# Размер блока при чтении загружаемого файла, байт
+UPLOAD_BLOCK_SIZE = 64 * 1024
+# Поля, которые никогда не отправляются клиенту
+HIDDEN_FIELDS = (User.password,)
+
+log = logging.getLogger('fclub.server')
+
+# Маршруты: (метод, путь) -> (функция, роли, запись, транзакция)
+ROUTES = {}
+
+def route(method, path, roles=ALL_ROLES, write=False, transaction=True):
+    """Регистрирует обработчик запроса.
+
+    roles=None - обработчик доступен без входа. write=True - обработчик
+    выполняется единственным потоком записи, по умолчанию в одной транзакции.
+    """
+    def decorator(func):
+        ROUTES[(method, path)] = (func, roles, write, transaction)
+        return func
+    return decorator
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def to_data(value):
+    """Преобразует результат команды или запроса в данные для JSON.
+
+    Связанные записи включаются, только если уже загружены запросом (join),
+    чтобы сериализация не выполняла дополнительных запросов.
+    """
+    if hasattr(value, '_asdict'):
+        return to_data(value._asdict())
+    if isinstance(value, dict):
+        return {name: to_data(item) for name, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_data(item) for item in value]
+    if isinstance(value, Model):
+        data = {}
+        for field in value._meta.sorted_fields:
+            # Поля peewee переопределяют ==, поэтому сравнение по is
+            if any(field is hidden for hidden in HIDDEN_FIELDS):
+                continue
+            if isinstance(field, ForeignKeyField) and field.name in value.__rel__:
+                data[field.name] = to_data(value.__rel__[field.name])
+            else:
+                data[field.name] = to_data(value.__data__.get(field.name))
+        return data
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def parse_day(value, name):
+    try:
+        return datetime.strptime(value, importer.DATE_FORMAT).date()
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"Неверная дата в поле {name}: {value}")
+
+def date_filters(params):
+    """Период date_from/date_to вида ГГГГ-ММ-ДД; отсутствующая граница - None"""
+    return {name: parse_day(params[name], name) if params.get(name) else None
+            for name in ('date_from', 'date_to')}
+
+def page_params(params):
+    """Параметры страницы: after/before вида ГГГГ-ММ-ДД,id, limit и период"""
+    page = date_filters(params)
+    page['limit'] = min(int(params.get('limit', queries.PAGE_SIZE)), 10 * queries.PAGE_SIZE)
+    for name in ('after', 'before'):
+        if name in params:
+            day, _, pk = params[name].partition(',')
+            page[name] = (parse_day(day, name), int(pk))
+    return page
+
+def require_player(session):
+    if session.player is None:
+        raise HTTPError(400, "Сначала сохраните информацию об игроке")
+    return session.player.id
+
+# Регистрация и вход
+
+@route('POST', '/register', roles=None, write=True)
+def register(server, session, params, body):
+    success, message = commands.register_user(
+        body.get('username'), body.get('email'), body.get('password'), body.get('role')
+    )
+    return {'success': success, 'message': message}
+
+@route('POST', '/login', roles=None)
+def login(server, session, params, body):
+    success, message, session = commands.authenticate_user(body.get('username'), body.get('password'))
+    result = {'success': success, 'message': message}
+    if success:
+        result.update(
+            token=server.open_session(session),
+            user=to_data(session.user),
+            player=to_data(session.player)
+        )
+    return result
+
+@route('POST', '/logout')
+def logout(server, session, params, body):
+    server.end_session(session)
+
+# Тренировки и матчи
+
+@route('GET', '/trainings')
+def trainings(server, session, params, body):
+    return to_data(queries.trainings_page(**page_params(params)))
+
+@route('POST', '/trainings', roles=(ROLE_COACH,), write=True)
+def add_training(server, session, params, body):
+    return to_data(commands.add_training(
+        coach=session.user_id,
+        date=parse_day(body.get('date'), 'date'),
+        duration=int(body['duration']),
+        focus_area=body['focus_area'],
+        notes=body.get('notes')
+    ))
+
+@route('GET', '/matches')
+def matches(server, session, params, body):
+    return to_data(queries.matches_page(**page_params(params)))
+
+@route('GET', '/matches/index')
+def matches_index(server, session, params, body):
+    labels = match_index.labels()
+    return [[label, match_index.match_id(label)] for label in labels]
+
+@route('POST', '/matches', roles=(ROLE_COACH,), write=True)
+def add_match(server, session, params, body):
+    return to_data(commands.add_match(
+        opponent=body['opponent'],
+        date=parse_day(body.get('date'), 'date'),
+        location=body['location'],
+        score=body.get('score'),
+        notes=body.get('notes')
+    ))
+
+@route('GET', '/matches/sheet', roles=(ROLE_COACH,))
+def match_sheet(server, session, params, body):
+    return to_data(queries.match_sheet(int(params['match'])))
+
+@route('POST', '/matches/sheet', roles=(ROLE_COACH,), write=True)
+def save_match_sheet(server, session, params, body):
+    return commands.save_match_sheet(int(body['match']), body.get('played', []), body.get('absent', []))
+
+@route('POST', '/import', roles=(ROLE_COACH,), write=True, transaction=False)
+def import_data(server, session, params, body):
+    # Файл передается телом запроса и уже сохранен во временный файл (read_upload)
+    if 'path' not in body:
+        raise HTTPError(400, "Ожидался файл для импорта")
+    result = importer.import_file(params.get('kind'), body['path'], coach=session.user_id)
+    return {'inserted': result.inserted, 'rejected': result.rejected}
+
+@route('GET', '/leaderboard', roles=(ROLE_COACH, ROLE_ADMIN))
+def leaders(server, session, params, body):
+    return to_data(leaderboard.leaderboard(**date_filters(params)))
+
+@route('GET', '/search')
+def search_records(server, session, params, body):
+    kind = params.get('kind')
+    if kind is not None and kind not in search.KINDS:
+        raise HTTPError(400, f"Неизвестный вид записей: {kind}")
+    return to_data(search.search(params.get('q', ''), kind))
+
+# Игрок и статистика
+
+@route('POST', '/player', roles=(ROLE_PLAYER,), write=True)
+def save_player(server, session, params, body):
+    player_id = session.player.id if session.player else None
+    player = commands.save_player(
+        player_id,
+        user=session.user_id,
+        name=body['name'],
+        position=body['position'],
+        jersey_number=int(body['jersey_number']),
+        join_date=parse_day(body.get('join_date'), 'join_date')
+    )
+    session.player = player
+    return to_data(player)
+
+@route('GET', '/stats', roles=(ROLE_PLAYER,))
+def stats(server, session, params, body):
+    return to_data(queries.player_stats(require_player(session), **date_filters(params)))
+
+@route('GET', '/stats/totals', roles=(ROLE_PLAYER,))
+def season_totals(server, session, params, body):
+    return to_data(queries.player_season_totals(require_player(session)))
+
+@route('GET', '/stats/form', roles=(ROLE_PLAYER,))
+def player_form(server, session, params, body):
+    return to_data(analytics.player_form(require_player(session), **date_filters(params)))
+
+@route('POST', '/stats', roles=(ROLE_PLAYER,), write=True)
+def add_stats(server, session, params, body):
+    counts = {name: int(body.get(name, 0)) for name in ('goals', 'assists', 'yellow_cards', 'red_cards')}
+    return to_data(commands.add_player_stats(player=require_player(session), match=int(body['match']), **counts))
+
+# Выгрузка: клиент получает строки страницами и сам пишет их в файл
+
+@route('GET', '/export')
+def export_page(server, session, params, body):
+    kind = params.get('kind')
+    filters = date_filters(params)
+    if session.role == ROLE_PLAYER:
+        # Игрок выгружает только свою статистику
+        if kind != 'player_stats':
+            raise HTTPError(403, "Недостаточно прав")
+        filters['player_id'] = require_player(session)
+    elif params.get('player_id'):
+        filters['player_id'] = int(params['player_id'])
+    if params.get('after'):
+        # Ключ последней строки предыдущей страницы - JSON-список значений
+        filters['after'] = json.loads(params['after'])
+    header, query, convert = export.export_query(kind, **filters)
+    rows, key = [], None
+    for row in query.limit(export.EXPORT_PAGE_SIZE).tuples():
+        row, key = export.split_key(header, row)
+        rows.append(convert(row) if convert is not None else row)
+    return {
+        'header': header,
+        'rows': to_data(rows),
+        # Ключ для следующей страницы; None - строк больше нет
+        'after': to_data(list(key)) if len(rows) == export.EXPORT_PAGE_SIZE else None,
+    }
+
+# Администрирование
+
+@route('GET', '/coaches', roles=(ROLE_ADMIN,))
+def coaches(server, session, params, body):
+    return to_data(queries.coaches())
+
+@route('GET', '/players', roles=(ROLE_ADMIN,))
+def players(server, session, params, body):
+    return to_data(queries.players())
+
+@route('POST', '/users/delete', roles=(ROLE_ADMIN,), write=True)
+def delete_users(server, session, params, body):
+    commands.delete_users([int(pk) for pk in body.get('ids', [])])
+    server.close_sessions()
+
+@route('POST', '/players/delete', roles=(ROLE_ADMIN,), write=True)
+def delete_players(server, session, params, body):
+    commands.delete_players([int(pk) for pk in body.get('ids', [])])
+    server.close_sessions()
+
+class RequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.handle_route('GET')
+
+    def do_POST(self):
+        self.handle_route('POST')
+
+    def handle_route(self, method):
+        url = urlparse(self.path)
+        try:
+            if (method, url.path) not in ROUTES:
+                raise HTTPError(404, f"Неизвестный адрес: {url.path}")
+            func, roles, write, transaction = ROUTES[(method, url.path)]
+            session = self.server.find_session(self.headers.get('Authorization', ''))
+            if roles is not None:
+                if session is None:
+                    raise HTTPError(401, "Требуется вход в систему")
+                if session.role not in roles:
+                    raise HTTPError(403, "Недостаточно прав")
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            with ExitStack() as cleanup:
+                if self.headers.get('Content-Type') == UPLOAD_CONTENT_TYPE:
+                    body = {'path': self.read_upload(cleanup.enter_context(tempfile.TemporaryDirectory()),
+                                                     params.get('filename', ''))}
+                else:
+                    body = self.read_body()
+                result = self.server.execute(func, session, params, body, write, transaction)
+            self.send_json(200, result)
+        except HTTPError as e:
+            self.send_json(e.status, {'error': str(e)})
+        except DoesNotExist as e:
+            self.send_json(404, {'error': f"Запись не найдена: {str(e)}"})
+        except (KeyError, ValueError, TypeError) as e:
+            self.send_json(400, {'error': f"Неверный запрос: {str(e)}"})
+        except Exception as e:
+            log.exception("Ошибка обработки %s %s", method, url.path)
+            self.send_json(500, {'error': str(e)})
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        body = json.loads(self.rfile.read(length).decode('utf-8'))
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Ожидался JSON-объект")
+        return body
+
+    def read_upload(self, directory, filename):
+        """Копирует тело запроса в файл в directory по частям и возвращает путь к нему.
+
+        Расширение берется из filename: по нему импорт определяет формат.
+        """
+        path = os.path.join(directory, f"upload{os.path.splitext(filename)[1]}")
+        length = int(self.headers.get('Content-Length') or 0)
+        with open(path, 'wb') as f:
+            while length > 0:
+                block = self.rfile.read(min(length, UPLOAD_BLOCK_SIZE))
+                if not block:
+                    raise HTTPError(400, "Файл передан не полностью")
+                f.write(block)
+                length -= len(block)
+        return path
+
+    def send_json(self, status, data):
+        payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        log.info("%s %s", self.address_string(), format % args)
+
+class ClubServer(ThreadingHTTPServer):
+    """HTTP-сервер клуба.
+
+    Запросы принимаются в отдельных потоках, но к БД обращаются только
+    небольшой пул потоков чтения и один поток записи, как в DBWorker:
+    записи всех клиентов выполняются строго по очереди и не спорят за
+    блокировку файла, а чтение в режиме WAL идет параллельно с записью.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, read_threads, session_ttl):
+        self.readers = ThreadPoolExecutor(max_workers=read_threads, thread_name_prefix="db-read")
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+        # Сессия закрывается, если по ней session_ttl секунд не было запросов
+        self.session_ttl = session_ttl
+        # Токен -> (сессия, момент истечения по time.monotonic)
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+        super().__init__(address, RequestHandler)
+
+    def execute(self, func, session, params, body, write, transaction):
+        """Выполняет обработчик в потоке чтения или записи и ждет результат"""
+        def job():
+            if write and transaction:
+                with DB.atomic():
+                    return func(self, session, params, body)
+            return func(self, session, params, body)
+        return (self.writer if write else self.readers).submit(job).result()
+
+    def open_session(self, session):
+        token = secrets.token_urlsafe(32)
+        now = time.monotonic()
+        with self.sessions_lock:
+            # Заодно забываем истекшие сессии клиентов, которые не вышли явно
+            for expired in [token for token, (_, expires) in self.sessions.items() if expires <= now]:
+                del self.sessions[expired]
+            self.sessions[token] = (session, now + self.session_ttl)
+        return token
+
+    def find_session(self, authorization):
+        """Сессия по токену; каждый запрос продлевает ее на session_ttl"""
+        scheme, _, token = authorization.partition(' ')
+        if scheme != 'Bearer':
+            return None
+        now = time.monotonic()
+        with self.sessions_lock:
+            if token not in self.sessions:
+                return None
+            session, expires = self.sessions[token]
+            if expires <= now:
+                del self.sessions[token]
+                return None
+            self.sessions[token] = (session, now + self.session_ttl)
+            return session
+
+    def end_session(self, session):
+        """Закрывает сессию при выходе пользователя"""
+        with self.sessions_lock:
+            for token, (other, _) in list(self.sessions.items()):
+                if other is session:
+                    del self.sessions[token]
+
+    def close_sessions(self):
+        """Закрывает сессии удаленных пользователей"""
+        with self.sessions_lock:
+            user_ids = {session.user_id for session, _ in self.sessions.values()}
+            existing = {pk for (pk,) in User.select(User.id).where(User.id.in_(list(user_ids))).tuples()}
+            for token, (session, _) in list(self.sessions.items()):
+                if session.user_id not in existing:
+                    del self.sessions[token]
+
+    def server_close(self):
+        super().server_close()
+        self.readers.shutdown(wait=False, cancel_futures=True)
+        self.writer.shutdown(wait=True)
+
+def serve(host, port, read_threads, session_hours):
+    ensure_database()
+    snapshot.start()
+    server = ClubServer((host, port), read_threads, session_hours * 3600)
+    print(f"Сервер клуба запущен: http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    import argparse
+
+    settings = load_server_settings()
+    parser = argparse.ArgumentParser(description="Сервер клуба: доступ к общей БД по HTTP")
+    parser.add_argument('--host', default=settings['host'])
+    parser.add_argument('--port', type=int, default=settings['port'])
+    parser.add_argument('--read-threads', type=int, default=settings['read_threads'])
+    parser.add_argument('--session-hours', type=float, default=settings['session_hours'])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    serve(args.host, args.port, args.read_threads, args.session_hours)
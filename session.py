@@ -0,0 +1,18 @@
+class Session:
+    """Сессия вошедшего пользователя: пользователь, его роль и связанный игрок"""
+
+    def __init__(self, user, player=None):
+        self.user = user
+        self.player = player
+
+    @property
+    def user_id(self):
+        return self.user.id
+
+    @property
+    def username(self):
+        return self.user.username
+
+    @property
+    def role(self):
+        return self.user.role
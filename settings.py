@@ -0,0 +1,121 @@
+import configparser
+import os
+
+# Файл настроек; путь можно переопределить переменной окружения FCLUB_CONFIG
+CONFIG_FILE = os.environ.get('FCLUB_CONFIG', 'fclub.ini')
+ENV_PREFIX = 'FCLUB'
+
+def choice(*allowed):
+    """Конвертер, допускающий только перечисленные значения"""
+    def convert(value):
+        value = value.strip().lower()
+        if value not in allowed:
+            raise ValueError(f"допустимые значения: {', '.join(allowed)}")
+        return value
+    return convert
+
+def boolean(value):
+    value = value.strip().lower()
+    if value in ('1', 'true', 'yes', 'on'):
+        return True
+    if value in ('0', 'false', 'no', 'off'):
+        return False
+    raise ValueError("ожидается on/off")
+
+# Параметры подключения к SQLite: имя -> (значение по умолчанию, конвертер).
+# WAL позволяет читать во время записи; на сетевых дисках WAL не работает,
+# там следует выбрать journal_mode = delete.
+DATABASE_OPTIONS = {
+    'path': ('sqlitedb.db', str),
+    'journal_mode': ('wal', choice('delete', 'truncate', 'persist', 'memory', 'wal', 'off')),
+    'synchronous': ('normal', choice('off', 'normal', 'full', 'extra')),
+    'cache_size': ('-65536', int),           # отрицательное значение - в КиБ (64 МБ)
+    'mmap_size': ('268435456', int),         # 256 МБ
+    'busy_timeout': ('5000', int),           # мс ожидания снятия блокировки
+    'foreign_keys': ('on', boolean),
+}
+
+# Сервер клуба (server.py) и режим клиента. Если задан url, приложение
+# работает с БД через сервер, а не открывает файл БД напрямую.
+SERVER_OPTIONS = {
+    'url': ('', str),                        # например http://192.168.1.10:8765
+    'host': ('127.0.0.1', str),              # адрес, на котором слушает сервер
+    'port': ('8765', int),
+    'read_threads': ('4', int),              # потоков чтения на сервере
+    'timeout': ('30', float),                # с ожидания ответа сервера в клиенте
+    'session_hours': ('12', float),          # ч без обращений, после которых сессия закрывается
+}
+
+# Снимок БД для отчетов (snapshot.py). Таблица лидеров, выгрузка и
+# аналитика читают копию файла БД, которая обновляется по расписанию через
+# backup API SQLite, и не конкурируют с сохранением данных тренерами.
+# Особенно нужен при journal_mode = delete, где долгое чтение блокирует запись.
+REPORTING_OPTIONS = {
+    'snapshot': ('off', boolean),            # читать отчеты из снимка
+    'snapshot_path': ('', str),              # по умолчанию <имя БД>.snapshot.db рядом с БД
+    'refresh_minutes': ('10', float),        # период обновления снимка; 0 - только вручную
+}
+
+def read_config(path=None):
+    config = configparser.ConfigParser()
+    config.read(path or CONFIG_FILE, encoding='utf-8')
+    return config
+
+def load_section(section, options, config=None):
+    """Читает раздел настроек.
+
+    Приоритет: переменная окружения FCLUB_<РАЗДЕЛ>_<ИМЯ>, затем файл
+    настроек, затем значение по умолчанию. Возвращает словарь значений
+    и словарь источников каждого значения.
+    """
+    config = config or read_config()
+    values, sources = {}, {}
+    for name, (default, convert) in options.items():
+        env_name = f"{ENV_PREFIX}_{section}_{name}".upper()
+        if env_name in os.environ:
+            raw, source = os.environ[env_name], f"переменная {env_name}"
+        elif config.has_option(section, name):
+            raw, source = config.get(section, name), f"файл {CONFIG_FILE}"
+        else:
+            raw, source = default, "по умолчанию"
+        try:
+            values[name] = convert(raw)
+        except ValueError as e:
+            raise ValueError(f"Неверное значение настройки {section}.{name} = {raw!r}: {e}")
+        sources[name] = source
+    return values, sources
+
+def load_database_settings(config=None):
+    """Настройки подключения к БД"""
+    return load_section('database', DATABASE_OPTIONS, config)[0]
+
+def load_server_settings(config=None):
+    """Настройки сервера клуба и режима клиента"""
+    return load_section('server', SERVER_OPTIONS, config)[0]
+
+def load_reporting_settings(config=None):
+    """Настройки снимка БД для отчетов"""
+    return load_section('reporting', REPORTING_OPTIONS, config)[0]
+
+def database_pragmas(settings):
+    """PRAGMA, выполняемые peewee при каждом новом подключении"""
+    return {name: int(value) if isinstance(value, bool) else value
+            for name, value in settings.items() if name != 'path'}
+
+def effective_pragmas(db):
+    """Фактические значения PRAGMA для текущего подключения"""
+    return {name: db.execute_sql(f'PRAGMA {name}').fetchone()[0]
+            for name in DATABASE_OPTIONS if name != 'path'}
+
+if __name__ == "__main__":
+    from models import DB
+
+    values, sources = load_section('database', DATABASE_OPTIONS)
+    print(f"Файл настроек: {CONFIG_FILE}")
+    for name, value in values.items():
+        print(f"  {name} = {value} ({sources[name]})")
+
+    print("Действующие значения PRAGMA:")
+    with DB:
+        for name, value in effective_pragmas(DB).items():
+            print(f"  {name} = {value}")
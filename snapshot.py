@@ -0,0 +1,133 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from instrumentation import InstrumentedSqliteDatabase
+from models import DB, DATABASE_SETTINGS, READ_ONLY_PRAGMAS
+from settings import load_reporting_settings, database_pragmas
+
+# Снимок БД для тяжелых чтений. Таблица лидеров, выгрузка, аналитика и
+# отчеты за сезон читают не рабочий файл БД, а его копию, которую backup
+# API SQLite обновляет по расписанию или по запросу. Долгие агрегаты по
+# player_stats и matches не держат блокировок на рабочем файле, поэтому
+# сохранение тренировок и статистики не ждет отчетов. Данные в отчетах
+# отстают от рабочей БД не больше чем на период обновления снимка.
+
+SETTINGS = load_reporting_settings()
+log = logging.getLogger('fclub.snapshot')
+
+# Страниц, копируемых за шаг backup без WAL: между шагами рабочая БД
+# свободна для записи
+BACKUP_PAGES = 1024
+# Пауза между шагами backup, с
+BACKUP_SLEEP = 0.01
+
+SNAPSHOT_DB = InstrumentedSqliteDatabase(None)
+
+_lock = threading.Lock()
+# Подключение, через которое снимок перезаписывается; остается открытым,
+# чтобы процессы отчетов могли читать снимок в режиме только для чтения
+_target = None
+# Время последнего обновления снимка в этом процессе; до первого обновления
+# чтения идут в рабочую БД
+_refreshed_at = None
+_scheduler = None
+_stop = None
+# Номер снимка: reset увеличивает его. Подключения SNAPSHOT_DB у каждого
+# потока свои, и закрыть их может только сам поток, поэтому поток
+# закрывает свое подключение, увидев новый номер (см. reading_database)
+_generation = 0
+_local = threading.local()
+
+def snapshot_path():
+    if SETTINGS['snapshot_path']:
+        return SETTINGS['snapshot_path']
+    root, ext = os.path.splitext(DB.database)
+    return f"{root}.snapshot{ext or '.db'}"
+
+def refresh():
+    """Копирует рабочую БД в снимок и возвращает время снимка.
+
+    В режиме WAL копия снимается за один шаг в одной транзакции чтения,
+    которая не мешает записи. В остальных режимах журнала копирование
+    идет шагами по BACKUP_PAGES страниц, отпуская блокировку между ними.
+    """
+    global _target, _refreshed_at
+    with _lock:
+        path = snapshot_path()
+        source = sqlite3.connect(DB.database, timeout=DATABASE_SETTINGS['busy_timeout'] / 1000)
+        try:
+            wal = source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            if _target is None:
+                _target = sqlite3.connect(path, timeout=DATABASE_SETTINGS['busy_timeout'] / 1000,
+                                          check_same_thread=False)
+            source.backup(_target, pages=-1 if wal else BACKUP_PAGES, sleep=BACKUP_SLEEP)
+        finally:
+            source.close()
+        if _refreshed_at is None:
+            pragmas = {name: value for name, value in database_pragmas(DATABASE_SETTINGS).items()
+                       if name in READ_ONLY_PRAGMAS}
+            pragmas['query_only'] = 1
+            SNAPSHOT_DB.init(path, pragmas=pragmas)
+        _refreshed_at = datetime.now()
+        return _refreshed_at
+
+def refreshed_at():
+    return _refreshed_at
+
+def reading_database():
+    """БД для тяжелых чтений: снимок, если он включен и уже снят, иначе рабочая БД"""
+    if SETTINGS['snapshot'] and _refreshed_at is not None:
+        if getattr(_local, 'generation', None) != _generation:
+            # Подключение потока могло остаться от снимка до reset
+            if not SNAPSHOT_DB.is_closed():
+                SNAPSHOT_DB.close()
+            _local.generation = _generation
+        return SNAPSHOT_DB
+    return DB
+
+def refresh_periodically(interval, stop):
+    while True:
+        try:
+            refresh()
+        except Exception:
+            log.exception("Не удалось обновить снимок БД")
+        if interval <= 0 or stop.wait(interval):
+            return
+
+def start():
+    """Снимает первый снимок и обновляет его по расписанию в фоновом потоке.
+
+    Ничего не делает, если снимок выключен или уже обновляется.
+    """
+    global _scheduler, _stop
+    if not SETTINGS['snapshot'] or _scheduler is not None:
+        return
+    # При refresh_minutes = 0 снимок снимается один раз, дальше - только вручную
+    _stop = threading.Event()
+    _scheduler = threading.Thread(target=refresh_periodically, args=(SETTINGS['refresh_minutes'] * 60, _stop),
+                                  name="snapshot", daemon=True)
+    _scheduler.start()
+
+def reset():
+    """Останавливает обновление и забывает снимок, например при смене файла БД"""
+    global _target, _refreshed_at, _scheduler, _generation
+    if _stop is not None:
+        _stop.set()
+    with _lock:
+        _generation += 1
+        if not SNAPSHOT_DB.is_closed():
+            SNAPSHOT_DB.close()
+        if _target is not None:
+            _target.close()
+            _target = None
+        _refreshed_at = None
+        _scheduler = None
+
+if __name__ == "__main__":
+    from models import ensure_database
+    ensure_database()
+
+    snapshot_time = refresh()
+    print(f"Снимок {snapshot_path()} обновлен: {snapshot_time:%Y-%m-%d %H:%M:%S}")
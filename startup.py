@@ -0,0 +1,20 @@
+import time
+
+# Отметки времени запуска приложения от импорта этого модуля: main.py
+# импортирует его первым, поэтому отсчет идет почти от старта процесса.
+_started = time.perf_counter()
+_marks = []
+
+def mark(name):
+    """Запоминает, сколько прошло от запуска до события name"""
+    if any(recorded == name for recorded, _ in _marks):
+        return
+    _marks.append((name, time.perf_counter() - _started))
+
+def marks():
+    """Отметки запуска: список (событие, мс от старта)"""
+    return [(name, round(seconds * 1000, 1)) for name, seconds in _marks]
+
+def report():
+    """Отчет о запуске для журнала и окна диагностики"""
+    return "\n".join(f"{ms:>9.1f} мс  {name}" for name, ms in marks())
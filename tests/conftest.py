@@ -0,0 +1,57 @@
+import os
+import shutil
+import sys
+import tempfile
+
+# Тесты работают только с временными базами: пути к БД, журналам и
+# настройкам переопределяются до импорта модулей приложения
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRATCH_DIR = tempfile.mkdtemp(prefix='fclub_tests_')
+CONFIG_PATH = os.path.join(SCRATCH_DIR, 'fclub.ini')
+with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
+    f.write("[diagnostics]\n"
+            f"slow_query_log = {os.path.join(SCRATCH_DIR, 'slow_queries.log')}\n"
+            f"startup_log = {os.path.join(SCRATCH_DIR, 'startup.log')}\n")
+os.environ['FCLUB_CONFIG'] = CONFIG_PATH
+os.environ['FCLUB_BENCH_DIR'] = SCRATCH_DIR
+os.environ['FCLUB_DATABASE_PATH'] = os.path.join(SCRATCH_DIR, 'scratch.db')
+sys.path.insert(0, ROOT)
+
+import pytest
+import leaderboard
+from models import DB, configure_database, ensure_database
+from match_index import match_index
+from benchmarks.generate import generate, PASSWORD
+
+# Объемы тестовых данных: пользователи, матчи, тренировки, строки статистики
+TEST_SIZES = (30, 60, 80, 600)
+
+def use_database(path):
+    """Подключается к копии БД и сбрасывает кэши, относящиеся к прежнему файлу"""
+    configure_database(str(path))
+    ensure_database()
+    leaderboard.cache.clear()
+    match_index.invalidate()
+
+@pytest.fixture(scope='session')
+def generated_db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('generated') / 'generated.db')
+    generate(path, *TEST_SIZES)
+    DB.close()
+    return path
+
+@pytest.fixture
+def database(generated_db, tmp_path):
+    """Копия сгенерированной БД, к которой подключено приложение"""
+    path = tmp_path / 'club.db'
+    shutil.copy(generated_db, path)
+    use_database(path)
+    yield path
+    DB.close()
+
+@pytest.fixture
+def password():
+    return PASSWORD
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
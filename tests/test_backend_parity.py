@@ -0,0 +1,108 @@
+import json
+import threading
+from datetime import date
+from types import SimpleNamespace
+import pytest
+from backend import LocalBackend
+from client import ServerClient, to_record
+from models import User, Player, ROLE_COACH
+from server import ClubServer, to_data
+
+def plain(value):
+    """Данные для сравнения: объекты клиента - словари, списки - списки"""
+    if isinstance(value, SimpleNamespace):
+        return {name: plain(item) for name, item in vars(value).items()}
+    if isinstance(value, list):
+        return [plain(item) for item in value]
+    return value
+
+def local_plain(value):
+    # Локальный результат проходит то же преобразование, что и ответ сервера
+    return plain(to_record(json.loads(json.dumps(to_data(value)))))
+
+@pytest.fixture
+def server(database):
+    club_server = ClubServer(('127.0.0.1', 0), 2, 3600)
+    thread = threading.Thread(target=club_server.serve_forever, daemon=True)
+    thread.start()
+    yield club_server
+    club_server.shutdown()
+    club_server.server_close()
+
+def backends(server, username, password):
+    local = LocalBackend()
+    remote = ServerClient(f"http://127.0.0.1:{server.server_address[1]}", 10)
+    local_result = local.authenticate_user(username, password)
+    remote_result = remote.authenticate_user(username, password)
+    assert local_result[0] and remote_result[0]
+    assert plain(remote_result[2].user) == local_plain(local_result[2].user)
+    return local, remote, local_result[2]
+
+# Пароль PASSWORD у сгенерированных пользователей userN
+
+def coach_name():
+    return (User.select(User.username)
+            .where((User.role == ROLE_COACH) & User.username.startswith('user'))
+            .scalar())
+
+def player_name():
+    return (User.select(User.username)
+            .join(Player, on=(Player.user == User.id))
+            .where(User.username.startswith('user'))
+            .scalar())
+
+def assert_same(local, remote):
+    assert plain(remote) == local_plain(local)
+
+def test_coach_lists(server, password):
+    local, remote, _ = backends(server, coach_name(), password)
+    period = {'date_from': date(2018, 7, 1), 'date_to': date(2021, 6, 30)}
+
+    for name in ('trainings_page', 'matches_page'):
+        first = getattr(local, name)(limit=7, **period)
+        assert_same(first, getattr(remote, name)(limit=7, **period))
+        after = (first[-1].date, first[-1].id)
+        assert_same(getattr(local, name)(after=after, limit=7, **period),
+                    getattr(remote, name)(after=after, limit=7, **period))
+
+    assert_same(local.leaderboard(**period), remote.leaderboard(**period))
+    assert_same(local.search("стандарт"), remote.search("стандарт"))
+
+def test_player_stats(server, password):
+    local, remote, session = backends(server, player_name(), password)
+    player_id = session.player.id
+    period = {'date_from': date(2017, 1, 1), 'date_to': date(2022, 12, 31)}
+
+    assert_same(local.player_stats(player_id, **period), remote.player_stats(player_id, **period))
+    assert_same(local.player_season_totals(player_id), remote.player_season_totals(player_id))
+
+def test_admin_lists(server):
+    local, remote, _ = backends(server, 'admin', 'admin123')
+
+    assert_same(local.coaches(), remote.coaches())
+    assert_same(local.players(), remote.players())
+
+@pytest.mark.parametrize('kind', ['player_stats', 'matches', 'team'])
+def test_export(server, password, tmp_path, monkeypatch, kind):
+    # Несколько страниц выгрузки через сервер
+    monkeypatch.setattr('export.EXPORT_PAGE_SIZE', 50)
+    local, remote, _ = backends(server, coach_name(), password)
+    period = {'date_from': date(2018, 1, 1), 'date_to': date(2022, 6, 30)}
+
+    local_count = local.export_file(kind, str(tmp_path / 'local.csv'), **period)
+    remote_count = remote.export_file(kind, str(tmp_path / 'remote.csv'), **period)
+
+    assert local_count == remote_count
+    assert (tmp_path / 'local.csv').read_bytes() == (tmp_path / 'remote.csv').read_bytes()
+
+def test_import(server, password, tmp_path):
+    local, remote, _ = backends(server, coach_name(), password)
+    path = tmp_path / 'matches.csv'
+    path.write_text("opponent;date;location\nТест;2031-08-01;Дома\nТест;2031-08-01;Дома\n",
+                    encoding='utf-8-sig')
+
+    result = remote.import_file('matches', str(path))
+
+    assert (result.inserted, result.rejected) == (1, [(3, "Матч уже существует")])
+    period = {'date_from': date(2031, 8, 1), 'date_to': date(2031, 8, 1)}
+    assert [match.opponent for match in local.matches_page(**period)] == ["Тест"]
@@ -0,0 +1,60 @@
+import sqlite3
+import instrumentation
+import cache
+from commands import authenticate_user, hash_password
+from models import User, Player, ROLE_COACH
+
+def queries_of(label):
+    return instrumentation.snapshot()['screens'].get(label, {}).get('queries', 0)
+
+def player_user():
+    return User.select().join(Player, on=(Player.user == User.id)).where(User.username.startswith('user')).get()
+
+def test_login_is_one_query_and_fills_the_identity_map(database, password):
+    user = player_user()
+    instrumentation.reset()
+
+    with instrumentation.screen('login'):
+        success, _, session = authenticate_user(user.username, password)
+    with instrumentation.screen('after login'):
+        assert cache.users.get(user.id) is session.user
+        assert cache.users.get_by('username', user.username) is session.user
+        assert cache.players.get(session.player.id) is session.player
+
+    assert success
+    assert session.player.user_id == user.id
+    assert queries_of('login') == 1
+    assert queries_of('after login') == 0
+
+def test_user_without_player(database, password):
+    coach = User.get((User.role == ROLE_COACH) & User.username.startswith('user'))
+
+    success, _, session = authenticate_user(coach.username, password)
+
+    assert success and session.player is None
+    assert cache.users.get(coach.id) is session.user
+
+def test_password_changed_by_another_process(database, password):
+    user = player_user()
+    assert authenticate_user(user.username, password)[0]
+
+    with sqlite3.connect(database) as connection:
+        connection.execute("UPDATE users SET password = ? WHERE id = ?", (hash_password("new"), user.id))
+
+    assert authenticate_user(user.username, password)[:2] == (False, "Неверный пароль")
+    assert authenticate_user(user.username, "new")[0]
+
+def test_user_deleted_by_another_process(database, password):
+    user = player_user()
+    assert authenticate_user(user.username, password)[0]
+
+    with sqlite3.connect(database) as connection:
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.execute("DELETE FROM users WHERE id = ?", (user.id,))
+
+    assert authenticate_user(user.username, password)[:2] == (False, "Пользователь не найден")
+    # Запись удаленного пользователя убрана из кэша: поиск идет в БД
+    instrumentation.reset()
+    with instrumentation.screen('lookup'):
+        assert cache.users.get_by('username', user.username) is None
+    assert queries_of('lookup') == 1
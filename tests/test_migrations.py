@@ -0,0 +1,52 @@
+import shutil
+import sqlite3
+from conftest import ROOT, use_database
+from models import DB
+from migrations import MIGRATIONS, current_version, run_migrations
+
+# База из первой версии приложения: таблицы без индексов, итогов и версии схемы
+BASELINE_DB = f"{ROOT}/sqlitedb.db"
+TABLES = ('users', 'players', 'trainings', 'matches', 'player_stats')
+
+def row_counts(path):
+    with sqlite3.connect(path) as connection:
+        return {table: connection.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                for table in TABLES}
+
+def schema():
+    """Таблицы, индексы и триггеры текущей БД без служебных объектов SQLite"""
+    return sorted(DB.execute_sql(
+        "SELECT type, name, tbl_name FROM sqlite_master "
+        "WHERE name NOT LIKE 'sqlite_%' ORDER BY type, name"
+    ).fetchall())
+
+def test_baseline_database_is_migrated(tmp_path):
+    path = str(tmp_path / 'baseline.db')
+    shutil.copy(BASELINE_DB, path)
+    counts = row_counts(path)
+
+    use_database(path)
+
+    assert current_version() == MIGRATIONS[-1][0]
+    assert row_counts(path) == counts
+    assert DB.execute_sql('PRAGMA foreign_key_check').fetchall() == []
+    assert run_migrations() == []
+
+def test_migrated_schema_matches_new_database(tmp_path):
+    baseline = str(tmp_path / 'baseline.db')
+    shutil.copy(BASELINE_DB, baseline)
+    use_database(baseline)
+    migrated = schema()
+
+    use_database(tmp_path / 'new.db')
+
+    assert migrated == schema()
+
+def test_player_stats_indexes(tmp_path):
+    baseline = str(tmp_path / 'baseline.db')
+    shutil.copy(BASELINE_DB, baseline)
+    use_database(baseline)
+
+    indexes = {name for kind, name, table in schema() if kind == 'index' and table == 'player_stats'}
+    assert 'playerstats_player_id_match_id' in indexes
+    assert 'playerstats_player_id' not in indexes
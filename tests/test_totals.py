@@ -0,0 +1,63 @@
+from datetime import date
+from models import DB, Player, Match, PlayerStats, PlayerSeasonTotals, User, SEASON_START_MONTH
+from totals import season_sql, STAT_COLUMNS
+
+def totals():
+    return sorted(PlayerSeasonTotals
+                  .select(PlayerSeasonTotals.player, PlayerSeasonTotals.season,
+                          PlayerSeasonTotals.appearances,
+                          *(getattr(PlayerSeasonTotals, column) for column in STAT_COLUMNS))
+                  .tuples())
+
+def expected_totals():
+    """Итоги, посчитанные заново по player_stats"""
+    sums = ", ".join(f"SUM(s.{column})" for column in STAT_COLUMNS)
+    return sorted(DB.execute_sql(
+        f"SELECT s.player_id, {season_sql('m.date')} AS season, COUNT(*), {sums} "
+        "FROM player_stats s JOIN matches m ON m.id = s.match_id GROUP BY s.player_id, season"
+    ).fetchall())
+
+def test_generated_totals_are_consistent(database):
+    assert totals() == expected_totals()
+
+def test_insert_update_and_delete_stats(database):
+    player = Player.select().first()
+    match = Match.create(opponent="Тест", date=date(2020, 8, 1), location="Дома")
+    other = Match.create(opponent="Тест", date=date(2021, 8, 1), location="Дома")
+
+    stats = PlayerStats.create(player=player, match=match, goals=2, yellow_cards=1)
+    PlayerStats.insert_many([
+        {'player': player.id, 'match': other.id, 'assists': 3},
+        {'player': player.id, 'match': match.id, 'red_cards': 1},
+    ]).execute()
+    assert totals() == expected_totals()
+
+    PlayerStats.update(goals=5).where(PlayerStats.id == stats.id).execute()
+    assert totals() == expected_totals()
+
+    PlayerStats.update(match=other).where(PlayerStats.id == stats.id).execute()
+    assert totals() == expected_totals()
+
+    PlayerStats.delete().where(PlayerStats.match == other.id).execute()
+    assert totals() == expected_totals()
+
+def test_match_moved_to_another_season(database):
+    match = Match.select().join(PlayerStats).first()
+    new_date = date(match.date.year + 3, SEASON_START_MONTH, 1)
+
+    Match.update(date=new_date).where(Match.id == match.id).execute()
+    assert totals() == expected_totals()
+
+    # Перенос внутри сезона итоги не меняет
+    Match.update(date=new_date.replace(day=20)).where(Match.id == match.id).execute()
+    assert totals() == expected_totals()
+
+def test_cascade_deletes(database):
+    Match.delete().where(Match.id == Match.select().join(PlayerStats).first().id).execute()
+    assert totals() == expected_totals()
+
+    Player.delete().where(Player.id == PlayerStats.select().first().player_id).execute()
+    assert totals() == expected_totals()
+
+    User.delete().where(User.id == Player.select().join(PlayerStats).first().user_id).execute()
+    assert totals() == expected_totals()
@@ -0,0 +1,117 @@
+from models import DB, PlayerSeasonTotals, SEASON_START_MONTH
+
+# Итоги игроков за сезон (таблица player_season_totals) поддерживаются
+# триггерами SQLite, поэтому обновляются в той же транзакции, что и
+# player_stats, при любом способе записи: create, insert_many, delete.
+
+def season_sql(date_column):
+    """SQL-выражение сезона для даты, согласованное с models.season_of"""
+    return (f"(CAST(strftime('%Y', {date_column}) AS INTEGER) - "
+            f"(CAST(strftime('%m', {date_column}) AS INTEGER) < {SEASON_START_MONTH}))")
+
+STAT_COLUMNS = ("goals", "assists", "yellow_cards", "red_cards")
+
+UPSERT_TOTALS = (
+    " ON CONFLICT (player_id, season) DO UPDATE SET"
+    " appearances = appearances + excluded.appearances, "
+    + ", ".join(f"{c} = {c} + excluded.{c}" for c in STAT_COLUMNS)
+)
+
+def add_stat_row_sql(row):
+    """Добавляет к итогам одну строку статистики (NEW или OLD в триггере)"""
+    values = ", ".join(f"{row}.{c}" for c in STAT_COLUMNS)
+    return (
+        "INSERT INTO player_season_totals "
+        f"(player_id, season, appearances, {', '.join(STAT_COLUMNS)}) "
+        f"SELECT {row}.player_id, {season_sql('m.date')}, 1, {values} "
+        f"FROM matches m WHERE m.id = {row}.match_id"
+        + UPSERT_TOTALS + ";"
+    )
+
+def subtract_stat_row_sql(row):
+    """Вычитает из итогов одну строку статистики"""
+    changes = ", ".join(f"{c} = {c} - {row}.{c}" for c in STAT_COLUMNS)
+    return (
+        f"UPDATE player_season_totals SET appearances = appearances - 1, {changes} "
+        f"WHERE player_id = {row}.player_id AND season = "
+        f"(SELECT {season_sql('m.date')} FROM matches m WHERE m.id = {row}.match_id);"
+    )
+
+def add_match_sql(row):
+    """Добавляет к итогам всю статистику матча с учетом его даты"""
+    sums = ", ".join(f"SUM(s.{c})" for c in STAT_COLUMNS)
+    return (
+        "INSERT INTO player_season_totals "
+        f"(player_id, season, appearances, {', '.join(STAT_COLUMNS)}) "
+        f"SELECT s.player_id, {season_sql(f'{row}.date')}, COUNT(*), {sums} "
+        f"FROM player_stats s WHERE s.match_id = {row}.id GROUP BY s.player_id"
+        + UPSERT_TOTALS + ";"
+    )
+
+def subtract_match_sql(row):
+    """Вычитает из итогов всю статистику матча"""
+    def played(expr):
+        return (f"(SELECT {expr} FROM player_stats s WHERE s.match_id = {row}.id "
+                "AND s.player_id = player_season_totals.player_id)")
+    changes = ", ".join(f"{c} = {c} - {played(f'SUM(s.{c})')}" for c in STAT_COLUMNS)
+    return (
+        f"UPDATE player_season_totals SET appearances = appearances - {played('COUNT(*)')}, "
+        f"{changes} WHERE season = {season_sql(f'{row}.date')} AND player_id IN "
+        f"(SELECT player_id FROM player_stats WHERE match_id = {row}.id);"
+    )
+
+DELETE_EMPTY_TOTALS = "DELETE FROM player_season_totals WHERE appearances <= 0;"
+
+TRIGGERS = {
+    "player_stats_totals_insert": (
+        "AFTER INSERT ON player_stats",
+        add_stat_row_sql("NEW"),
+    ),
+    "player_stats_totals_update": (
+        "AFTER UPDATE OF player_id, match_id, goals, assists, yellow_cards, red_cards ON player_stats",
+        subtract_stat_row_sql("OLD") + add_stat_row_sql("NEW") + DELETE_EMPTY_TOTALS,
+    ),
+    "player_stats_totals_delete": (
+        "AFTER DELETE ON player_stats",
+        subtract_stat_row_sql("OLD") + DELETE_EMPTY_TOTALS,
+    ),
+    # Перенос матча в другой сезон переносит и статистику игроков
+    "matches_totals_update": (
+        f"AFTER UPDATE OF date ON matches WHEN {season_sql('OLD.date')} != {season_sql('NEW.date')}",
+        subtract_match_sql("OLD") + add_match_sql("NEW") + DELETE_EMPTY_TOTALS,
+    ),
+    # Статистика удаляемого матча вычитается до того, как матч исчезнет
+    "matches_totals_delete": (
+        "BEFORE DELETE ON matches",
+        subtract_match_sql("OLD") + DELETE_EMPTY_TOTALS,
+    ),
+}
+
+def create_totals_triggers(db=DB):
+    """Создает триггеры, поддерживающие итоги игроков"""
+    for name, (event, body) in TRIGGERS.items():
+        db.execute_sql(f'CREATE TRIGGER IF NOT EXISTS "{name}" {event} BEGIN {body} END')
+
+def drop_totals_triggers(db=DB):
+    """Удаляет триггеры итогов (перед перестройкой таблиц)"""
+    for name in TRIGGERS:
+        db.execute_sql(f'DROP TRIGGER IF EXISTS "{name}"')
+
+def rebuild_season_totals(db=DB):
+    """Пересчитывает итоги всех игроков по таблице player_stats"""
+    sums = ", ".join(f"SUM(s.{c})" for c in STAT_COLUMNS)
+    with db.atomic():
+        PlayerSeasonTotals.delete().execute()
+        db.execute_sql(
+            "INSERT INTO player_season_totals "
+            f"(player_id, season, appearances, {', '.join(STAT_COLUMNS)}) "
+            f"SELECT s.player_id, {season_sql('m.date')} AS season, COUNT(*), {sums} "
+            "FROM player_stats s JOIN matches m ON m.id = s.match_id "
+            "GROUP BY s.player_id, season"
+        )
+    return PlayerSeasonTotals.select().count()
+
+if __name__ == "__main__":
+    from models import ensure_database
+    ensure_database()
+    print(f"Итоги пересчитаны, записей: {rebuild_season_totals()}")
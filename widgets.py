@@ -0,0 +1,304 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import datetime, timedelta
+from functools import partial
+from queries import PAGE_SIZE
+from models import season_of, season_range
+import instrumentation
+
+# Сколько страниц одновременно держим в таблице
+MAX_PAGES = 5
+# Доля прокрутки у края, при которой подгружается следующая страница
+SCROLL_THRESHOLD = 0.1
+
+def run_now(func, on_success, on_error):
+    """Синхронно выполняет загрузку и передает результат в колбэк"""
+    try:
+        result = func()
+    except Exception as e:
+        on_error(e)
+    else:
+        on_success(result)
+
+def month_range(today):
+    first = today.replace(day=1)
+    next_month = (first + timedelta(days=31)).replace(day=1)
+    return first, next_month - timedelta(days=1)
+
+# Готовые периоды фильтра списков: название -> функция(сегодня) -> (с, по)
+PERIODS = {
+    "Текущий сезон": lambda today: season_range(season_of(today)),
+    "Прошлый сезон": lambda today: season_range(season_of(today) - 1),
+    "Текущий месяц": month_range,
+    "Последние 30 дней": lambda today: (today - timedelta(days=30), today),
+    "За все время": lambda today: (None, None),
+}
+DEFAULT_PERIOD = "Текущий сезон"
+CUSTOM_PERIOD = "Свой период"
+
+def in_period(filters, day):
+    """Попадает ли дата в период фильтра {'date_from': ..., 'date_to': ...}"""
+    date_from, date_to = filters.get('date_from'), filters.get('date_to')
+    return (date_from is None or day >= date_from) and (date_to is None or day <= date_to)
+
+class DateRangeBar:
+    """Выбор периода списка: готовый период или свои даты.
+
+    on_change(filters) вызывается с новым фильтром {'date_from', 'date_to'},
+    который передается в запросы страниц как есть.
+    """
+
+    def __init__(self, parent, on_change=None, period=DEFAULT_PERIOD):
+        self.on_change = on_change
+        self.frame = tk.Frame(parent)
+
+        tk.Label(self.frame, text="Период:").pack(side=tk.LEFT)
+        self.period_var = tk.StringVar(value=period)
+        period_box = ttk.Combobox(
+            self.frame, textvariable=self.period_var, state="readonly", width=18,
+            values=list(PERIODS) + [CUSTOM_PERIOD]
+        )
+        period_box.pack(side=tk.LEFT, padx=5)
+        period_box.bind("<<ComboboxSelected>>", lambda _: self.on_period_selected())
+
+        tk.Label(self.frame, text="с").pack(side=tk.LEFT)
+        self.from_var = tk.StringVar()
+        from_entry = tk.Entry(self.frame, textvariable=self.from_var, width=12)
+        from_entry.pack(side=tk.LEFT, padx=5)
+        tk.Label(self.frame, text="по").pack(side=tk.LEFT)
+        self.to_var = tk.StringVar()
+        to_entry = tk.Entry(self.frame, textvariable=self.to_var, width=12)
+        to_entry.pack(side=tk.LEFT, padx=5)
+        for entry in (from_entry, to_entry):
+            entry.bind("<Return>", lambda _: self.apply())
+            entry.bind("<Key>", lambda _: self.period_var.set(CUSTOM_PERIOD), add=True)
+        if on_change is not None:
+            tk.Button(self.frame, text="Показать", command=self.apply).pack(side=tk.LEFT)
+
+        self.fill_dates()
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    def fill_dates(self):
+        """Подставляет в поля границы выбранного готового периода"""
+        period = PERIODS.get(self.period_var.get())
+        if period is None:
+            return
+        date_from, date_to = period(datetime.now().date())
+        self.from_var.set(date_from.strftime('%Y-%m-%d') if date_from else "")
+        self.to_var.set(date_to.strftime('%Y-%m-%d') if date_to else "")
+
+    def on_period_selected(self):
+        self.fill_dates()
+        if self.period_var.get() != CUSTOM_PERIOD:
+            self.apply()
+
+    def filters(self):
+        """Фильтр по введенным датам; пустое поле - без ограничения"""
+        try:
+            date_from, date_to = (
+                datetime.strptime(value, '%Y-%m-%d').date() if value else None
+                for value in (self.from_var.get().strip(), self.to_var.get().strip())
+            )
+        except ValueError:
+            raise ValueError("Даты периода указываются в формате ГГГГ-ММ-ДД")
+        if date_from is not None and date_to is not None and date_from > date_to:
+            raise ValueError("Начало периода позже его окончания")
+        return {'date_from': date_from, 'date_to': date_to}
+
+    def apply(self):
+        try:
+            filters = self.filters()
+        except ValueError as e:
+            messagebox.showerror("Ошибка ввода", str(e))
+            return
+        if self.on_change is not None:
+            self.on_change(filters)
+
+def sorted_position(tree, row_keys, key):
+    """Позиция для строки с ключом key в таблице, упорядоченной по ключу по убыванию.
+
+    Возвращает позицию и текущее число строк.
+    """
+    children = tree.get_children()
+    low, high = 0, len(children)
+    while low < high:
+        middle = (low + high) // 2
+        if row_keys[children[middle]] > key:
+            low = middle + 1
+        else:
+            high = middle
+    return low, len(children)
+
+class PagedTreeview:
+    """Постраничная подгрузка строк в ttk.Treeview по ключу (дата, id).
+
+    В таблице хранится не больше MAX_PAGES страниц: при прокрутке вниз
+    догружаются более старые записи, а верхние строки отбрасываются,
+    при прокрутке вверх - наоборот.
+
+    runner(func, on_success, on_error) выполняет загрузку страницы; по умолчанию
+    страница загружается синхронно, для фоновой загрузки передается DBWorker.read.
+    """
+
+    def __init__(self, tree, scrollbar, fetch_page, format_row,
+                 page_size=PAGE_SIZE, max_pages=MAX_PAGES, runner=None, filters=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        # Условия, с которыми запрашиваются страницы, например период
+        self.filters = filters or {}
+        self.format_row = format_row
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.runner = runner or run_now
+        # Подгрузка при прокрутке учитывается за экраном, создавшим таблицу
+        self.screen = instrumentation.caller_screen()
+
+        self.row_keys = {}
+        self.more_above = False
+        self.more_below = True
+        self.loading = False
+        # Номер загрузки: ответы, пришедшие после reload, отбрасываются
+        self.generation = 0
+
+        self.tree.configure(yscrollcommand=self.on_scroll)
+
+    def reload(self):
+        """Очищает таблицу и загружает первую страницу"""
+        self.tree.delete(*self.tree.get_children())
+        self.row_keys.clear()
+        self.more_above = False
+        self.more_below = True
+        self.loading = False
+        self.generation += 1
+        self.load_below()
+
+    def set_filters(self, filters):
+        """Меняет условия выборки и загружает таблицу заново"""
+        self.filters = filters
+        self.reload()
+
+    def on_scroll(self, first, last):
+        """Обновляет полосу прокрутки и подгружает строки у краёв таблицы"""
+        self.scrollbar.set(first, last)
+        if float(last) >= 1 - SCROLL_THRESHOLD and self.more_below:
+            self.tree.after_idle(self.load_below)
+        elif float(first) <= SCROLL_THRESHOLD and self.more_above:
+            self.tree.after_idle(self.load_above)
+
+    def load_below(self):
+        """Загружает страницу записей старше последней строки"""
+        if self.loading or not self.more_below:
+            return
+        children = self.tree.get_children()
+        after = self.row_keys[children[-1]] if children else None
+        self.loading = True
+        with instrumentation.screen(self.screen):
+            self.runner(
+                partial(self.fetch_page, after=after, limit=self.page_size, **self.filters),
+                partial(self.append_page, self.generation),
+                partial(self.on_load_error, self.generation)
+            )
+
+    def load_above(self):
+        """Загружает страницу записей новее первой строки"""
+        if self.loading or not self.more_above:
+            return
+        children = self.tree.get_children()
+        if not children:
+            return
+        self.loading = True
+        with instrumentation.screen(self.screen):
+            self.runner(
+                partial(self.fetch_page, before=self.row_keys[children[0]], limit=self.page_size,
+                        **self.filters),
+                partial(self.prepend_page, self.generation),
+                partial(self.on_load_error, self.generation)
+            )
+
+    def on_load_error(self, generation, error):
+        if generation != self.generation:
+            return
+        self.loading = False
+        messagebox.showerror("Ошибка", f"Не удалось загрузить данные: {str(error)}")
+
+    def append_page(self, generation, rows):
+        if generation != self.generation or not self.tree.winfo_exists():
+            return
+        self.loading = False
+        self.more_below = len(rows) == self.page_size
+        for row in rows:
+            self.insert_row(row, tk.END)
+        self.trim(from_top=True)
+
+    def prepend_page(self, generation, rows):
+        if generation != self.generation or not self.tree.winfo_exists():
+            return
+        self.loading = False
+        self.more_above = len(rows) == self.page_size
+        for row in reversed(rows):
+            self.insert_row(row, 0)
+        # Оставляем на экране ту же строку, что была видна до подгрузки
+        if rows:
+            self.tree.yview_moveto(len(rows) / len(self.tree.get_children()))
+        self.trim(from_top=False)
+
+    def insert_row(self, row, index):
+        iid = str(row.id)
+        if self.tree.exists(iid):
+            return
+        self.row_keys[iid] = (row.date, row.id)
+        self.tree.insert("", index, iid=iid, values=self.format_row(row))
+
+    def upsert(self, row):
+        """Добавляет новую или обновляет измененную строку без перезагрузки таблицы.
+
+        Строка, которая попадает за пределы загруженного окна, не добавляется:
+        она появится при прокрутке. Строка вне выбранного периода убирается.
+        """
+        if not self.tree.winfo_exists():
+            return
+        if not in_period(self.filters, row.date):
+            self.remove(row.id)
+            return
+        iid = str(row.id)
+        key = (row.date, row.id)
+        if self.row_keys.get(iid) == key:
+            self.tree.item(iid, values=self.format_row(row))
+            return
+
+        self.remove(row.id)
+        index, count = sorted_position(self.tree, self.row_keys, key)
+        if count and ((index == 0 and self.more_above) or (index == count and self.more_below)):
+            return
+        self.insert_row(row, index)
+
+    def remove(self, pk):
+        """Удаляет строку записи с первичным ключом pk, если она загружена"""
+        iid = str(pk)
+        if self.tree.winfo_exists() and self.tree.exists(iid):
+            self.tree.delete(iid)
+            del self.row_keys[iid]
+
+    def trim(self, from_top):
+        """Удаляет лишние строки с противоположного края окна"""
+        children = self.tree.get_children()
+        excess = len(children) - self.page_size * self.max_pages
+        if excess <= 0:
+            return
+
+        first_visible = self.tree.yview()[0] * len(children)
+        if from_top:
+            removed = children[:excess]
+            self.more_above = True
+            first_visible -= excess
+        else:
+            removed = children[-excess:]
+            self.more_below = True
+
+        self.tree.delete(*removed)
+        for iid in removed:
+            del self.row_keys[iid]
+        self.tree.yview_moveto(max(first_visible, 0) / (len(children) - excess))